@@ -0,0 +1,160 @@
+"""
+Benchmark de índices secundarios.
+
+Genera una base SQLite sintética en una carpeta temporal y mide las consultas
+calientes con y sin los índices de src/db_indexes.py:
+    - CashWindow.load_transactions (movimientos de la sesión de caja)
+    - generate_due_notifications
+    - calculate_outstanding_balance
+
+Uso: python bench_indexes.py [num_prestamos]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+from database import get_db_connection, init_db, close_all_connections
+from db_indexes import INDEXES
+from utils.notification_manager import generate_due_notifications
+from utils.loan_payment_manager import calculate_outstanding_balance
+
+# get_db_connection lee DB_PATH del módulo del backend
+backend = sys.modules[database.get_db_connection.__module__]
+
+NUM_LOANS = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+INSTALLMENTS_PER_LOAN = 12
+NUM_SESSIONS = 200
+OLD_NOTIFICATIONS = 20000
+
+
+def build_database(path):
+    backend.DB_PATH = path
+    init_db()
+
+    random.seed(42)
+    today = date.today()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    for i in range(NUM_LOANS):
+        cursor.execute("INSERT INTO clients (dni, first_name, last_name) VALUES (?, ?, ?)",
+                       (f"B{i:07d}", f"Cliente{i}", "Bench"))
+        client_id = cursor.lastrowid
+        start = today - timedelta(days=random.randint(0, 400))
+        status = random.choice(['active', 'active', 'paid', 'overdue'])
+        cursor.execute("""
+            INSERT INTO loans (client_id, loan_type, amount, interest_rate, start_date, due_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (client_id, random.choice(['rapidiario', 'empeno', 'bancario']), 1000, 10,
+              start.isoformat(), (start + timedelta(days=360)).isoformat(), status))
+        loan_id = cursor.lastrowid
+
+        rows = []
+        for n in range(1, INSTALLMENTS_PER_LOAN + 1):
+            due = start + timedelta(days=30 * n)
+            paid = status == 'paid' or due < today - timedelta(days=random.randint(0, 60))
+            rows.append((loan_id, n, due.isoformat(), 110.0, 'paid' if paid else 'pending',
+                         110.0 if paid else 0, due.isoformat() if paid else None))
+        cursor.executemany("""
+            INSERT INTO installments (loan_id, number, due_date, amount, status, paid_amount, payment_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+        cursor.executemany("""
+            INSERT INTO transactions (type, category, amount, description, date, loan_id, cash_session_id)
+            VALUES ('income', 'payment', 110, 'Pago', ?, ?, ?)
+        """, [(f"{r[6]} 10:00:00", loan_id, random.randint(1, NUM_SESSIONS)) for r in rows if r[6]])
+
+    old_day = (today - timedelta(days=1)).isoformat()
+    cursor.executemany("""
+        INSERT INTO notifications (description, notify_date, is_done, created_at)
+        VALUES (?, ?, 1, ?)
+    """, [(f"Recordatorio histórico {i}", old_day, f"{old_day} 08:00:00") for i in range(OLD_NOTIFICATIONS)])
+
+    conn.commit()
+    conn.close()
+    close_all_connections()
+
+
+def drop_indexes(path):
+    backend.DB_PATH = path
+    conn = get_db_connection()
+    for name, *_ in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+    conn.close()
+    close_all_connections()
+
+
+def load_transactions(session_id):
+    # Misma consulta que CashWindow.load_transactions
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT t.*, c.first_name, c.last_name
+        FROM transactions t
+        LEFT JOIN loans l ON t.loan_id = l.id
+        LEFT JOIN clients c ON l.client_id = c.id
+        WHERE t.cash_session_id = ? AND date(t.date) = ?
+        ORDER BY t.date DESC
+    """, (session_id, datetime.now().strftime("%Y-%m-%d")))
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run_suite(path):
+    backend.DB_PATH = path
+    loan_ids = random.sample(range(1, NUM_LOANS + 1), 200)
+    results = {
+        'load_transactions': timed(lambda i: load_transactions(i % NUM_SESSIONS + 1), 200),
+        'calculate_outstanding_balance': timed(lambda i: calculate_outstanding_balance(loan_ids[i]), 200),
+        # 1ra pasada inserta, 2da pasada sólo verifica duplicados
+        'generate_due_notifications': timed(lambda i: generate_due_notifications(), 2),
+    }
+    close_all_connections()
+    return results
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='bench_indexes_')
+    try:
+        base = os.path.join(workdir, 'base.db')
+        print(f"Generando base sintética: {NUM_LOANS} préstamos, "
+              f"{NUM_LOANS * INSTALLMENTS_PER_LOAN} cuotas...")
+        build_database(base)
+
+        plain = os.path.join(workdir, 'sin_indices.db')
+        shutil.copy2(base, plain)
+        drop_indexes(plain)
+
+        without = run_suite(plain)
+        with_idx = run_suite(base)
+
+        print("")
+        print(f"{'Operación':<32}{'Sin índices':>14}{'Con índices':>14}{'Mejora':>10}")
+        print("-" * 70)
+        for name in without:
+            speedup = without[name] / with_idx[name] if with_idx[name] else float('inf')
+            print(f"{name:<32}{without[name]:>11.2f} ms{with_idx[name]:>11.2f} ms{speedup:>9.1f}x")
+    finally:
+        close_all_connections()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
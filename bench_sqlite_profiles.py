@@ -0,0 +1,147 @@
+"""
+Benchmark de perfiles de conexión SQLite (src/sqlite_profiles.py).
+
+Genera una base sintética en una carpeta temporal y, para cada perfil, mide
+la latencia de commit de pagos de caja mientras un hilo escribe copias de
+seguridad completas (write_archive) sin parar, como create_backup en segundo
+plano.
+
+Uso: python bench_sqlite_profiles.py [num_prestamos] [num_pagos]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import database
+from database import get_db_connection, init_db, close_all_connections, set_profile
+from sqlite_profiles import PROFILES
+from utils.backup_archive import write_archive
+
+# get_db_connection lee DB_PATH del módulo del backend
+backend = sys.modules[database.get_db_connection.__module__]
+
+NUM_LOANS = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+NUM_PAYMENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+INSTALLMENTS_PER_LOAN = 12
+
+
+def build_database(path):
+    backend.DB_PATH = path
+    init_db()
+
+    random.seed(42)
+    today = date.today()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO clients (dni, first_name, last_name) VALUES (?, ?, ?)",
+                       [(f"B{i:07d}", f"Cliente{i}", "Bench") for i in range(NUM_LOANS)])
+    cursor.executemany("""
+        INSERT INTO loans (client_id, loan_type, amount, interest_rate, start_date, due_date, status)
+        VALUES (?, 'rapidiario', 1000, 10, ?, ?, 'active')
+    """, [(i + 1, today.isoformat(), (today + timedelta(days=360)).isoformat()) for i in range(NUM_LOANS)])
+    cursor.executemany("""
+        INSERT INTO installments (loan_id, number, due_date, amount, status, paid_amount)
+        VALUES (?, ?, ?, 110.0, 'pending', 0)
+    """, [(loan, n, (today + timedelta(days=30 * n)).isoformat())
+          for loan in range(1, NUM_LOANS + 1) for n in range(1, INSTALLMENTS_PER_LOAN + 1)])
+    cursor.executemany("INSERT INTO audit_logs (user_id, action, details) VALUES (1, 'bench', ?)",
+                       [(f"Registro {i}",) for i in range(NUM_LOANS * 10)])
+    conn.commit()
+    conn.close()
+    close_all_connections()
+
+
+def pay_installment(installment_id):
+    # Misma forma que un cobro en caja: pago + movimiento en una transacción
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE installments SET paid_amount = amount, status = 'paid' WHERE id = ?",
+                       (installment_id,))
+        cursor.execute("""
+            INSERT INTO transactions (type, category, amount, description, date, loan_id)
+            SELECT 'income', 'payment', amount, 'Pago', datetime('now'), loan_id
+            FROM installments WHERE id = ?
+        """, (installment_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_profile(path, profile, workdir):
+    backend.DB_PATH = path
+    set_profile(profile)
+    close_all_connections()
+
+    stop = threading.Event()
+    backups = [0]
+
+    def backup_loop():
+        conn = get_db_connection()
+        try:
+            while not stop.is_set():
+                write_archive(conn, os.path.join(workdir, f'bench_{profile}.ndjson.gz'))
+                conn.rollback()
+                backups[0] += 1
+        finally:
+            conn.close()
+
+    worker = threading.Thread(target=backup_loop)
+    worker.start()
+    time.sleep(0.2)  # La copia ya está leyendo cuando empiezan los pagos
+
+    latencies, errors = [], 0
+    ids = random.sample(range(1, NUM_LOANS * INSTALLMENTS_PER_LOAN + 1), NUM_PAYMENTS)
+    for installment_id in ids:
+        start = time.perf_counter()
+        try:
+            pay_installment(installment_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+        except sqlite3.OperationalError:
+            errors += 1  # database is locked
+
+    stop.set()
+    worker.join()
+    close_all_connections()
+
+    latencies.sort()
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] if latencies else float('nan')
+    return {'p50': pick(0.5), 'p95': pick(0.95), 'max': pick(1.0), 'errors': errors, 'backups': backups[0]}
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='bench_profiles_')
+    try:
+        base = os.path.join(workdir, 'base.db')
+        print(f"Generando base sintética: {NUM_LOANS} préstamos, "
+              f"{NUM_LOANS * INSTALLMENTS_PER_LOAN} cuotas...")
+        build_database(base)
+
+        results = {}
+        for profile in PROFILES:
+            path = os.path.join(workdir, f'{profile}.db')
+            shutil.copy2(base, path)
+            results[profile] = run_profile(path, profile, workdir)
+
+        print("")
+        print(f"{NUM_PAYMENTS} pagos con una copia de seguridad corriendo en paralelo")
+        print(f"{'Perfil':<12}{'p50':>11}{'p95':>11}{'máx':>11}{'bloqueos':>10}{'copias':>8}")
+        print("-" * 63)
+        for profile, r in results.items():
+            print(f"{profile:<12}{r['p50']:>8.2f} ms{r['p95']:>8.2f} ms{r['max']:>8.2f} ms"
+                  f"{r['errors']:>10}{r['backups']:>8}")
+    finally:
+        close_all_connections()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+"""
+Exporta a JSON comprimido y Excel las copias de cierre pendientes
+(backups/pending), sin abrir la aplicación. La aplicación también lo hace
+al iniciar; este script sirve para una tarea programada.
+
+Uso: python export_snapshots.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from utils.backup_manager import BackupManager
+
+
+if __name__ == "__main__":
+    BackupManager().export_pending_snapshots()
@@ -0,0 +1,26 @@
+"""
+Reconstruye el libro de saldos por préstamo (loan_balances) desde las cuotas
+y los pagos registrados. Útil tras editar datos a mano o importar registros.
+
+Uso: python rebuild_receivables.py
+"""
+from src.database import get_db_connection, init_db
+from src.utils.receivables_ledger import rebuild_loan_balances
+
+
+def rebuild():
+    init_db()
+    conn = get_db_connection()
+    try:
+        total = rebuild_loan_balances(conn.cursor())
+        conn.commit()
+        print(f"Libro de saldos reconstruido: {total} préstamos.")
+    except Exception as e:
+        conn.rollback()
+        print(f"Error: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    rebuild()
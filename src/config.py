@@ -23,3 +23,30 @@ else:
 # Image Compression Settings
 MAX_IMAGE_SIZE = (1024, 1024)  # Max width/height
 IMAGE_QUALITY = 80             # JPEG Quality
+
+# Connection Pool Settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))                # Max idle connections kept open
+DB_POOL_HEALTHCHECK = int(os.getenv("DB_POOL_HEALTHCHECK", 30))  # Idle seconds before re-validating
+
+# Background Tasks (UI)
+UI_WORKERS = int(os.getenv("UI_WORKERS", 3))  # Threads that run window queries off the Tk thread
+
+# Backups
+BACKUP_SNAPSHOT_PAGES = int(os.getenv("BACKUP_SNAPSHOT_PAGES", 256))  # Pages copied per step by the exit snapshot
+BACKUP_MAX_CHAIN = int(os.getenv("BACKUP_MAX_CHAIN", 6))      # Differential backups after each full one (LOCAL mode only)
+BACKUP_KEEP_CHAINS = int(os.getenv("BACKUP_KEEP_CHAINS", 10))  # Full backups (with their differentials) kept
+BACKUP_KEEP_PRE_RESTORE = int(os.getenv("BACKUP_KEEP_PRE_RESTORE", 5))  # .db copies taken before each restore kept
+EXCEL_WORKERS = int(os.getenv("EXCEL_WORKERS", 4))            # Threads filling Excel sheets in parallel
+
+# PDF documents (utils/pdf_batch.py)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", min(4, os.cpu_count() or 1)))  # Processes rendering PDFs in a batch
+
+# SQLite connection profile: 'balanced' (WAL), 'durable' or 'legacy' (see src/sqlite_profiles.py)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "balanced")
+
+# Settings cache (utils/settings_manager.py)
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", 5))  # Seconds between checks of settings_version
+
+# Scheduled jobs (python -m src.jobs)
+JOBS_POLL_SECONDS = int(os.getenv("JOBS_POLL_SECONDS", 30))    # Seconds between checks for due jobs
+JOBS_LOCK_MINUTES = int(os.getenv("JOBS_LOCK_MINUTES", 60))    # A job lock older than this is taken over
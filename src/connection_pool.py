@@ -0,0 +1,149 @@
+"""
+Connection Pool - Reutiliza conexiones de base de datos entre llamadas.
+
+Los helpers del sistema abren una conexión, ejecutan un par de consultas y la
+cierran. Con este pool, conn.close() devuelve la conexión en lugar de cerrarla,
+de modo que la siguiente llamada del mismo hilo la reutiliza sin volver a
+abrir el archivo SQLite ni repetir el handshake TLS contra PostgreSQL.
+
+Las conexiones que maneja el pool deben implementar:
+    - rollback(): descarta la transacción pendiente al devolverse
+    - ping(): consulta trivial para validar la conexión
+    - disconnect(): cierre real de la conexión
+"""
+
+import gc
+import threading
+import time
+import weakref
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones con afinidad por hilo.
+
+    Cada hilo reutiliza sólo las conexiones que él mismo devolvió, así una
+    conexión nunca se comparte entre hilos. Dos get_db_connection() anidados
+    en el mismo hilo reciben conexiones distintas, igual que antes.
+    """
+
+    def __init__(self, connect, size=5, healthcheck_after=30):
+        """
+        Args:
+            connect: Función que abre una conexión nueva
+            size: Máximo de conexiones inactivas retenidas (todos los hilos)
+            healthcheck_after: Segundos de inactividad tras los cuales se
+                valida la conexión con ping() antes de entregarla
+        """
+        self._connect = connect
+        self.size = size
+        self.healthcheck_after = healthcheck_after
+        self._lock = threading.Lock()
+        self._idle = {}  # thread ident -> [(conn, released_at), ...]
+        self._idle_count = 0
+        # Entregadas y aún no devueltas (todos los hilos). Referencias débiles:
+        # una conexión que nunca se cerró deja de contar cuando se libera
+        self._checked_out = weakref.WeakSet()
+        self._generation = 0
+
+    def acquire(self):
+        """Entrega una conexión inactiva del hilo actual o abre una nueva."""
+        ident = threading.get_ident()
+
+        while True:
+            with self._lock:
+                stack = self._idle.get(ident)
+                if not stack:
+                    break
+                conn, released_at = stack.pop()
+                self._idle_count -= 1
+
+            idle_for = time.monotonic() - released_at
+            if idle_for < self.healthcheck_after or self._is_healthy(conn):
+                conn._pool_idle = False
+                with self._lock:
+                    self._checked_out.add(conn)
+                return conn
+
+            self._discard(conn)
+
+        conn = self._connect()
+        conn._pool_generation = self._generation
+        conn._pool_idle = False
+        with self._lock:
+            self._checked_out.add(conn)
+        return conn
+
+    def release(self, conn):
+        """Devuelve una conexión al pool (la llama conn.close())."""
+        if getattr(conn, '_pool_idle', False):
+            return  # close() repetido sobre una conexión ya devuelta
+
+        with self._lock:
+            self._checked_out.discard(conn)
+
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._lock:
+            keep = conn._pool_generation == self._generation
+            if keep and self._idle_count >= self.size:
+                self._prune_dead_threads()
+                keep = self._idle_count < self.size
+
+            if keep:
+                conn._pool_idle = True
+                self._idle.setdefault(threading.get_ident(), []).append((conn, time.monotonic()))
+                self._idle_count += 1
+
+        if not keep:
+            self._discard(conn)
+
+    def close_all(self):
+        """
+        Cierra todas las conexiones inactivas. Las que estén en uso se cierran
+        cuando se devuelvan (por ejemplo, antes de reemplazar el archivo de BD).
+        """
+        with self._lock:
+            self._generation += 1
+            idle = [conn for stack in self._idle.values() for conn, _ in stack]
+            self._idle = {}
+            self._idle_count = 0
+
+        for conn in idle:
+            self._discard(conn)
+
+    def in_use(self):
+        """Conexiones entregadas que todavía no se devolvieron ni se liberaron."""
+        if self._checked_out:
+            # sqlite3.Connection queda en un ciclo de referencias: sin recolectar,
+            # una conexión ya inalcanzable seguiría contando
+            gc.collect()
+        with self._lock:
+            return len(self._checked_out)
+
+    def _prune_dead_threads(self):
+        # Llamar con self._lock tomado
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._idle if i not in alive]:
+            stack = self._idle.pop(ident)
+            self._idle_count -= len(stack)
+            for conn, _ in stack:
+                self._discard(conn)
+
+    def _is_healthy(self, conn):
+        try:
+            conn.ping()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        conn._pool_idle = True  # Evita que un close() tardío la devuelva
+        try:
+            conn.disconnect()
+        except Exception as e:
+            print(f"Error closing pooled connection: {e}")
@@ -0,0 +1,76 @@
+"""
+Índices secundarios - Etapa de migración de índices para init_db.
+
+Casi todas las consultas del sistema filtran por loan_id, client_id, estado o
+fechas. Aquí se define el conjunto curado de índices compuestos/cubrientes y
+su versión. migrate() (src/migrations) llama a apply_index_migrations() sólo
+cuando INDEX_VERSION es mayor que la versión registrada en schema_version.
+
+Para modificar un índice: cambiar su definición en INDEXES (o moverlo a
+OBSOLETE_INDEXES) e incrementar INDEX_VERSION.
+"""
+
+INDEX_VERSION = 2
+
+# (nombre, tabla, columnas clave, columnas cubiertas)
+# Las columnas cubiertas van en INCLUDE (...) en PostgreSQL; en SQLite se
+# agregan al final de la clave para que el índice cubra la consulta.
+INDEXES = [
+    # Cronograma de un préstamo ordenado por número de cuota
+    ('idx_installments_loan_number', 'installments', ('loan_id', 'number'), ()),
+    # Saldo de un préstamo y búsqueda de la siguiente cuota pendiente
+    ('idx_installments_loan_status', 'installments', ('loan_id', 'status'), ('amount', 'paid_amount')),
+    # Cuotas vencidas / por vencer (notificaciones, mora)
+    ('idx_installments_due_status', 'installments', ('due_date', 'status'), ('loan_id',)),
+    # Total pagado de un préstamo
+    ('idx_transactions_loan', 'transactions', ('loan_id', 'type', 'category'), ('amount',)),
+    # Movimientos de una sesión de caja
+    ('idx_transactions_session_date', 'transactions', ('cash_session_id', 'date'), ()),
+    # Préstamos de un cliente
+    ('idx_loans_client_status', 'loans', ('client_id', 'status'), ()),
+    # Cartera por estado y tipo
+    ('idx_loans_status_type', 'loans', ('status', 'loan_type'), ('amount',)),
+    # Recordatorios pendientes
+    ('idx_notifications_done_date', 'notifications', ('is_done', 'notify_date'), ()),
+]
+
+# Índices de versiones anteriores que deben eliminarse
+OBSOLETE_INDEXES = [
+    # La deduplicación de recordatorios usa ahora ux_notifications_installment_day (migración 0006)
+    'idx_notifications_desc_created',
+]
+
+
+def index_ddl(index, backend='sqlite'):
+    """Devuelve el CREATE INDEX de un índice para el backend indicado."""
+    name, table, columns, include = index
+    if backend == 'postgres' and include:
+        return (f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+                f"({', '.join(columns)}) INCLUDE ({', '.join(include)})")
+    return f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns + include)})"
+
+
+def apply_index_migrations(cursor, backend='sqlite'):
+    """
+    Crea o recrea el conjunto de índices. La llama migrate() cuando la versión
+    registrada en schema_version es anterior a INDEX_VERSION; no hace commit.
+    """
+    for name in OBSOLETE_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    tables = []
+    for index in INDEXES:
+        # Se recrea para que un cambio de definición con el mismo nombre se aplique
+        cursor.execute(f"DROP INDEX IF EXISTS {index[0]}")
+        cursor.execute(index_ddl(index, backend))
+        if index[1] not in tables:
+            tables.append(index[1])
+
+    # Estadísticas para que el planificador use los índices nuevos
+    if backend == 'postgres':
+        for table in tables:
+            cursor.execute(f"ANALYZE {table}")
+    else:
+        cursor.execute("ANALYZE")
+
+    print(f"Índices actualizados a la versión {INDEX_VERSION}.")
@@ -0,0 +1,12 @@
+"""
+Tareas programadas fuera de la interfaz gráfica.
+
+    python -m src.jobs                  Planificador continuo (Ctrl+C para detener)
+    python -m src.jobs --once           Ejecuta las tareas pendientes y termina
+    python -m src.jobs --run NOMBRE     Ejecuta una tarea ahora, le toque o no
+    python -m src.jobs --list           Horarios, última y próxima ejecución
+
+Las tareas están en jobs/tasks.py y el planificador en jobs/scheduler.py.
+Este paquete no importa nada al cargarse: __main__ agrega src/ a sys.path
+antes, igual que los scripts de la raíz.
+"""
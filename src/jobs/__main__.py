@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+
+# Los módulos de la aplicación se importan como en main.py (src/ en sys.path)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db
+from jobs import scheduler
+from jobs.tasks import JOBS
+
+
+def print_jobs():
+    jobs = {row['name']: row for row in scheduler.list_jobs()}
+    print(f"{'Tarea':<20}{'Horario':<16}{'Activa':<8}{'Última':<21}{'Estado':<8}{'s':>8}  {'Próxima':<19}")
+    for name, row in jobs.items():
+        last_run = scheduler.parse_time(row['last_run_at'])
+        next_run = scheduler.parse_time(row['next_run_at'])
+        duration = f"{row['last_duration']:.2f}" if row['last_duration'] is not None else ''
+        print(f"{name:<20}{row['schedule']:<16}{'sí' if row['enabled'] else 'no':<8}"
+              f"{scheduler.format_time(last_run) or '-':<21}{row['last_status'] or '-':<8}{duration:>8}  "
+              f"{scheduler.format_time(next_run) or '-':<19}")
+        if row['locked_by']:
+            print(f"{'':<20}tomada por {row['locked_by']} hasta {scheduler.format_time(scheduler.parse_time(row['locked_until']))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.jobs",
+                                     description="Tareas programadas sin interfaz gráfica")
+    parser.add_argument('--once', action='store_true', help="ejecuta las tareas pendientes y termina")
+    parser.add_argument('--run', metavar='NOMBRE', choices=sorted(JOBS), help="ejecuta una tarea ahora")
+    parser.add_argument('--list', action='store_true', help="muestra las tareas y sus horarios")
+    parser.add_argument('--schedule', nargs=2, metavar=('NOMBRE', 'CRON'), help="cambia el horario de una tarea")
+    parser.add_argument('--enable', metavar='NOMBRE', choices=sorted(JOBS), help="habilita una tarea")
+    parser.add_argument('--disable', metavar='NOMBRE', choices=sorted(JOBS), help="deshabilita una tarea")
+    args = parser.parse_args(argv)
+
+    init_db()
+    scheduler.sync_jobs()
+
+    if args.schedule:
+        name, expression = args.schedule
+        if name not in JOBS:
+            parser.error(f"tarea desconocida: {name}")
+        try:
+            scheduler.set_schedule(name, schedule=expression)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.enable:
+        scheduler.set_schedule(args.enable, enabled=True)
+    if args.disable:
+        scheduler.set_schedule(args.disable, enabled=False)
+
+    if args.run:
+        if scheduler.run_job(args.run, force=True) is None:
+            print(f"{args.run} está en ejecución en otro proceso")
+            return 1
+    elif args.once:
+        results = scheduler.run_pending()
+        if not results:
+            print("No hay tareas pendientes")
+        return 1 if any(r['status'] == 'error' for r in results) else 0
+    elif args.list or args.schedule or args.enable or args.disable:
+        print_jobs()
+    else:
+        scheduler.run_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
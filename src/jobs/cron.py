@@ -0,0 +1,90 @@
+"""
+Horarios tipo cron de 5 campos: minuto hora día-del-mes mes día-de-la-semana.
+
+Cada campo acepta '*', números, rangos (1-5), listas (1,15) y pasos (*/30,
+8-18/2). Día de la semana: 0 o 7 = domingo. Como en cron, si se restringen
+día del mes y día de la semana, basta con que se cumpla uno de los dos.
+También se aceptan los atajos @hourly, @daily, @weekly y @monthly.
+"""
+
+from datetime import datetime, timedelta
+
+SHORTCUTS = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+# (mínimo, máximo) de cada campo
+_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Paso inválido: {step_text}")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(v) for v in part.split('-', 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"Valor fuera de rango ({low}-{high}): {part}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        fields = SHORTCUTS.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Se esperaban 5 campos en el horario: {expression!r}")
+        try:
+            parsed = [_parse_field(f, low, high) for f, (low, high) in zip(fields, _RANGES)]
+        except ValueError as e:
+            raise ValueError(f"Horario inválido {expression!r}: {e}") from None
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # cron: 0 y 7 son domingo; datetime.weekday(): lunes = 0 ... domingo = 6
+        self.weekdays = {(d - 1) % 7 for d in weekdays}
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = moment.weekday() in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        """Primer minuto estrictamente posterior a moment que cumple el horario."""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                # Primer día del mes siguiente
+                year, month = divmod(moment.month, 12)
+                moment = datetime(moment.year + year, month + 1, 1)
+                continue
+            if not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment
+        raise ValueError(f"El horario {self.expression!r} nunca se cumple")
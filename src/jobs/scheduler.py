@@ -0,0 +1,296 @@
+"""
+Planificador de tareas sin interfaz gráfica.
+
+Cada tarea de jobs.tasks.JOBS tiene una fila en scheduled_jobs (migración
+0009) con su horario y su próxima ejecución. Para correrla, un proceso la
+toma con un UPDATE condicional: sólo lo logra si la tarea está habilitada,
+le toca (next_run_at <= ahora) y nadie más la tiene tomada, así dos
+terminales no la ejecutan dos veces. El bloqueo vence a los
+JOBS_LOCK_MINUTES, por si el proceso que la tenía murió a mitad.
+
+Al terminar se guarda la duración y el resultado en job_runs, se calcula la
+próxima ejecución desde el horario y se libera el bloqueo. Si el
+planificador estuvo detenido, cada tarea atrasada corre una sola vez al
+volver. Mientras la tarea corre, un hilo renueva el bloqueo cada tercio de
+JOBS_LOCK_MINUTES.
+
+Mientras corre, el planificador anota un latido en job_runners; la interfaz
+usa runner_active() para no generar recordatorios ni copias automáticas que
+ya hace este proceso.
+"""
+
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from config import JOBS_POLL_SECONDS, JOBS_LOCK_MINUTES
+from database import get_db_connection
+from jobs.cron import CronSchedule
+from jobs.tasks import JOBS
+
+RUNNER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _now():
+    return datetime.now().replace(microsecond=0)
+
+
+def format_time(moment):
+    return moment.strftime(_TIME_FORMAT) if moment else None
+
+
+def parse_time(value):
+    """TIMESTAMP leído de la base: datetime en PostgreSQL, texto en SQLite."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value)[:19], _TIME_FORMAT)
+
+
+def sync_jobs():
+    """Crea las filas que faltan en scheduled_jobs y completa next_run_at vacíos."""
+    now = _now()
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        for name, (schedule, _, _) in JOBS.items():
+            cursor.execute('''
+                INSERT INTO scheduled_jobs (name, schedule, next_run_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (name) DO NOTHING
+            ''', (name, schedule, format_time(CronSchedule(schedule).next_after(now))))
+
+        cursor.execute("SELECT name, schedule FROM scheduled_jobs WHERE next_run_at IS NULL")
+        for row in cursor.fetchall():
+            cursor.execute("UPDATE scheduled_jobs SET next_run_at = ? WHERE name = ?",
+                           (format_time(CronSchedule(row['schedule']).next_after(now)), row['name']))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def list_jobs():
+    """Filas de scheduled_jobs ordenadas por nombre."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM scheduled_jobs ORDER BY name")
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def set_schedule(name, schedule=None, enabled=None):
+    """Cambia el horario y/o la habilitación de una tarea; recalcula next_run_at."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        if schedule is not None:
+            next_run = CronSchedule(schedule).next_after(_now())  # Valida antes de guardar
+            cursor.execute("UPDATE scheduled_jobs SET schedule = ?, next_run_at = ? WHERE name = ?",
+                           (schedule, format_time(next_run), name))
+        if enabled is not None:
+            cursor.execute("UPDATE scheduled_jobs SET enabled = ? WHERE name = ?", (enabled, name))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _acquire(cursor, name, now, force):
+    """Toma la tarea para este proceso. True si se obtuvo el bloqueo."""
+    due = "" if force else " AND enabled = TRUE AND next_run_at <= ?"
+    params = [RUNNER_ID, format_time(now + timedelta(minutes=JOBS_LOCK_MINUTES)), name, format_time(now)]
+    if not force:
+        params.append(format_time(now))
+    cursor.execute(f'''
+        UPDATE scheduled_jobs
+        SET locked_by = ?, locked_until = ?
+        WHERE name = ?
+          AND (locked_until IS NULL OR locked_until < ?){due}
+    ''', params)
+    return cursor.rowcount == 1
+
+
+def run_job(name, force=False):
+    """
+    Ejecuta una tarea si le toca (o siempre, con force) y nadie la tiene tomada.
+
+    Returns:
+        dict: {'name', 'status', 'duration', 'result'}; None si no se ejecutó
+    """
+    if name not in JOBS:
+        raise ValueError(f"Tarea desconocida: {name}")
+
+    started = _now()
+    conn = get_db_connection()
+    try:
+        acquired = _acquire(conn.cursor(), name, started, force)
+        conn.commit()
+    finally:
+        conn.close()
+    if not acquired:
+        return None
+
+    _, func, _ = JOBS[name]
+    clock = time.perf_counter()
+    error = None
+    # Una tarea más larga que JOBS_LOCK_MINUTES no debe quedar libre para otro planificador
+    stop = threading.Event()
+    threading.Thread(target=_keep_lock, args=(name, stop), daemon=True).start()
+    try:
+        result = func() or ""
+        status = 'ok'
+    except Exception as e:
+        traceback.print_exc()
+        result = ""
+        status = 'error'
+        error = str(e)
+    finally:
+        stop.set()
+    duration = time.perf_counter() - clock
+    finished = _now()
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT schedule FROM scheduled_jobs WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        next_run = CronSchedule(row['schedule']).next_after(finished)
+        cursor.execute('''
+            INSERT INTO job_runs (job_name, runner, started_at, finished_at, duration, status, result)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (name, RUNNER_ID, format_time(started), format_time(finished), duration, status, error or result))
+        cursor.execute('''
+            UPDATE scheduled_jobs
+            SET last_run_at = ?, last_status = ?, last_duration = ?, last_error = ?,
+                next_run_at = ?, locked_by = NULL, locked_until = NULL
+            WHERE name = ? AND locked_by = ?
+        ''', (format_time(started), status, duration, error, format_time(next_run), name, RUNNER_ID))
+        if cursor.rowcount == 0:
+            # Otro planificador tomó la tarea: la ejecución queda en job_runs,
+            # pero no se pisa el estado que ese proceso lleva
+            print(f"Aviso: {name} perdió su bloqueo; no se actualizó scheduled_jobs")
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"[{format_time(finished)}] {name}: {status} en {duration:.2f} s"
+          + (f" - {error or result}" if (error or result) else ""))
+    return {'name': name, 'status': status, 'duration': duration, 'result': error or result}
+
+
+def _keep_lock(name, stop):
+    """Extiende locked_until de name cada tercio del plazo hasta que stop se active."""
+    while not stop.wait(JOBS_LOCK_MINUTES * 60 / 3):
+        try:
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE scheduled_jobs SET locked_until = ?
+                    WHERE name = ? AND locked_by = ?
+                ''', (format_time(_now() + timedelta(minutes=JOBS_LOCK_MINUTES)), name, RUNNER_ID))
+                conn.commit()
+                if cursor.rowcount == 0:
+                    print(f"Aviso: {name} perdió su bloqueo mientras se ejecutaba")
+                    return
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error al renovar el bloqueo de {name}: {e}")
+
+
+def due_jobs(now=None):
+    """Nombres de las tareas habilitadas a las que ya les toca, sin bloqueo vigente."""
+    now = format_time(now or _now())
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT name FROM scheduled_jobs
+            WHERE enabled = TRUE AND next_run_at <= ?
+              AND (locked_until IS NULL OR locked_until < ?)
+            ORDER BY next_run_at, name
+        ''', (now, now))
+        return [row['name'] for row in cursor.fetchall() if row['name'] in JOBS]
+    finally:
+        conn.close()
+
+
+def run_pending():
+    """Ejecuta una vez cada tarea pendiente. Devuelve los resultados de las que corrieron."""
+    results = []
+    for name in due_jobs():
+        outcome = run_job(name)
+        if outcome:
+            results.append(outcome)
+    return results
+
+
+def heartbeat(stopping=False):
+    """Anota (o borra, al detenerse) el latido de este proceso en job_runners."""
+    now = format_time(_now())
+    conn = get_db_connection()
+    try:
+        if stopping:
+            conn.execute("DELETE FROM job_runners WHERE runner = ?", (RUNNER_ID,))
+        else:
+            conn.execute('''
+                INSERT INTO job_runners (runner, started_at, heartbeat_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (runner) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+            ''', (RUNNER_ID, now, now))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def runner_active():
+    """True si algún planificador dio señales de vida en los últimos 3 intervalos."""
+    since = format_time(_now() - timedelta(seconds=3 * JOBS_POLL_SECONDS))
+    try:
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM job_runners WHERE heartbeat_at >= ?", (since,))
+            return cursor.fetchone() is not None
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error al consultar el planificador: {e}")
+        return False
+
+
+def _beat(stop, poll):
+    while not stop.wait(poll):
+        try:
+            heartbeat()
+        except Exception as e:
+            print(f"Error al registrar el latido del planificador: {e}")
+
+
+def run_forever(poll=JOBS_POLL_SECONDS):
+    """Bucle del planificador: tareas pendientes y espera. Termina con Ctrl+C."""
+    sync_jobs()
+    heartbeat()
+    # El latido va en su propio hilo: una copia larga no debe hacer creer a
+    # la interfaz que el planificador se detuvo
+    stop = threading.Event()
+    threading.Thread(target=_beat, args=(stop, poll), daemon=True).start()
+    print(f"Planificador {RUNNER_ID} iniciado (revisión cada {poll} s)")
+    try:
+        while True:
+            try:
+                run_pending()
+            except Exception as e:
+                print(f"Error en el planificador: {e}")
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        print("Planificador detenido")
+    finally:
+        stop.set()
+        heartbeat(stopping=True)
@@ -0,0 +1,49 @@
+"""
+Tareas programadas y su horario por defecto.
+
+El horario por defecto sólo se usa al crear la fila en scheduled_jobs; luego
+manda el de la tabla (python -m src.jobs --schedule NOMBRE "0 3 * * *").
+Cada tarea devuelve un texto corto que queda en job_runs.result.
+"""
+
+
+def freeze_loans():
+    from utils.loan_manager import freeze_overdue_loans
+    report = freeze_overdue_loans(user_id=None)
+    return f"{report['frozen']} préstamos congelados (S/ {report['total']:,.2f})"
+
+
+def due_notifications():
+    from utils.notification_manager import generate_due_notifications
+    return f"{generate_due_notifications()} recordatorios nuevos"
+
+
+def auto_backup():
+    from utils.backup_manager import BackupManager
+    created = BackupManager().check_and_run_auto_backup(run_async=False)
+    if created is False:
+        # El error ya se imprimió; así job_runs lo registra como fallido
+        raise RuntimeError("No se pudo crear la copia de seguridad automática")
+    return "Copia creada" if created else "Aún no corresponde"
+
+
+def export_snapshots():
+    from utils.backup_manager import BackupManager
+    BackupManager().export_pending_snapshots()
+    return ""
+
+
+def collection_sheets():
+    from utils.collection_sheets import generate_collection_sheets
+    paths = generate_collection_sheets()
+    return f"{sum(1 for path in paths if path)}/{len(paths)} archivos de hojas de cobranza"
+
+
+# nombre -> (horario por defecto, función, descripción)
+JOBS = {
+    'freeze_loans': ('0 1 * * *', freeze_loans, "Congelar préstamos vencidos"),
+    'due_notifications': ('*/30 * * * *', due_notifications, "Recordatorios de cuotas vencidas"),
+    'auto_backup': ('0 2 * * *', auto_backup, "Copia de seguridad automática (cada 3 días)"),
+    'export_snapshots': ('*/15 * * * *', export_snapshots, "Exportar copias de cierre pendientes"),
+    'collection_sheets': ('0 6 * * 1-6', collection_sheets, "Hojas de cobranza de cada analista"),
+}
@@ -1,46 +1,77 @@
+import sys
+from utils.startup_profiler import StartupProfiler
+
+# Installed before any other import so their load time is measured too
+profiler = StartupProfiler.from_argv(sys.argv)
+
 import tkinter as tk
-from database import init_db
-from ui.login_window import LoginWindow
-from ui.main_window import MainWindow
-from utils.backup_manager import BackupManager
 import atexit
-import os
+import threading
 
-def on_exit(backup_manager):
+def snapshot_progress(status, remaining, total):
+    print(f"Copia de cierre: {total - remaining}/{total} páginas")
+
+def on_exit():
+    from utils.backup_manager import BackupManager
+    backup_manager = BackupManager()
     print("Realizando copia de seguridad automática...")
-    backup_manager.create_backup(trigger='close')
+    # Consistent copy in milliseconds; the JSON/Excel exports run on the next start
+    if backup_manager.create_snapshot(trigger='close', progress=snapshot_progress) is None:
+        # Cloud mode has no local file to snapshot: export now, in this thread
+        backup_manager.create_backup(trigger='close', run_async=False)
+
+def background_startup():
+    """Work the login window does not need: exports of the last exit snapshot and the auto backup."""
+    try:
+        from utils.backup_manager import BackupManager
+        backup_manager = BackupManager()
+        backup_manager.export_pending_snapshots()
+        from jobs.scheduler import runner_active
+        if not runner_active():  # python -m src.jobs already takes care of it
+            backup_manager.check_and_run_auto_backup()
+    except Exception as e:
+        print(f"Error in background startup: {e}")
 
 def main():
 
-    
+
     root = tk.Tk()
     root.title("Sistema de Casa de Empeño y Microcréditos")
     root.geometry("400x300")
     root.withdraw() # Hide root initially
-    
+
     def start_app():
-        # Initialize DB after config is ready
-        init_db()
-        
-        # Initialize Backup Manager
-        backup_manager = BackupManager()
-        backup_manager.check_and_run_auto_backup()
-        
+        # Initialize DB after config is ready (login reads users and settings)
+        with profiler.phase("init_db"):
+            from database import init_db
+            init_db()
+
         # Register backup on exit
-        atexit.register(on_exit, backup_manager)
-        
+        atexit.register(on_exit)
+
         # Show Login
-        show_login()
+        with profiler.phase("login window"):
+            show_login()
+
+        # Backups run once the login window is up
+        threading.Thread(target=background_startup, daemon=True).start()
 
     def show_login():
+        from ui.login_window import LoginWindow
         root.login_window = LoginWindow(root, on_login_success)
-        
+
     def on_login_success(user):
+        from ui.main_window import MainWindow
         root.main_window = MainWindow(root, user, on_logout=show_login)
 
     start_app()
-    
+    # Report once the login window has been drawn
+    root.after_idle(profiler.report)
+
     root.mainloop()
 
 if __name__ == "__main__":
+    # PDF batches use worker processes; the frozen .exe must not relaunch the app in them
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
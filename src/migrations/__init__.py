@@ -0,0 +1,90 @@
+"""
+Migraciones de esquema numeradas.
+
+Cada módulo mNNNN_*.py define VERSION, DESCRIPTION y upgrade(cursor, backend).
+migrate() lee la tabla schema_version una sola vez y ejecuta, en orden, sólo
+las migraciones que faltan; en un arranque normal no hay nada que aplicar.
+
+Para cambiar el esquema: agregar un módulo nuevo con el siguiente número e
+incluirlo en MIGRATIONS. Nunca modificar una migración ya publicada.
+"""
+
+try:
+    from src.db_indexes import INDEX_VERSION, apply_index_migrations
+except ImportError:
+    from db_indexes import INDEX_VERSION, apply_index_migrations
+
+from . import m0001_base_schema
+from . import m0002_loan_columns
+from . import m0003_installment_columns
+from . import m0004_loan_balances
+from . import m0005_client_search
+from . import m0006_notification_key
+from . import m0007_change_log
+from . import m0008_settings_version
+from . import m0009_scheduled_jobs
+
+MIGRATIONS = [
+    m0001_base_schema,
+    m0002_loan_columns,
+    m0003_installment_columns,
+    m0004_loan_balances,
+    m0005_client_search,
+    m0006_notification_key,
+    m0007_change_log,
+    m0008_settings_version,
+    m0009_scheduled_jobs,
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].VERSION
+
+
+def get_versions(cursor):
+    """Devuelve {componente: versión} desde schema_version (la crea si no existe)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            component TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("SELECT component, version FROM schema_version")
+    return {row['component']: row['version'] for row in cursor.fetchall()}
+
+
+def set_version(cursor, component, version):
+    cursor.execute('''
+        INSERT INTO schema_version (component, version, applied_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (component) DO UPDATE SET version = excluded.version, applied_at = excluded.applied_at
+    ''', (component, version))
+
+
+def migrate(conn, backend='sqlite'):
+    """
+    Lleva la base de datos a la última versión del esquema y de los índices.
+    Cada migración se confirma junto con su número de versión.
+
+    Returns:
+        list: Versiones de esquema aplicadas en esta llamada
+    """
+    cursor = conn.cursor()
+    versions = get_versions(cursor)
+    applied = []
+
+    current = versions.get('schema', 0)
+    for migration in MIGRATIONS:
+        if migration.VERSION <= current:
+            continue
+        print(f"Aplicando migración {migration.VERSION:04d}: {migration.DESCRIPTION}")
+        migration.upgrade(cursor, backend)
+        set_version(cursor, 'schema', migration.VERSION)
+        conn.commit()
+        applied.append(migration.VERSION)
+
+    if versions.get('indexes', 0) < INDEX_VERSION:
+        apply_index_migrations(cursor, backend)
+        set_version(cursor, 'indexes', INDEX_VERSION)
+
+    conn.commit()
+    return applied
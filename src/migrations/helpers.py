@@ -0,0 +1,32 @@
+"""
+Utilidades compartidas por las migraciones.
+"""
+
+
+def get_columns(cursor, backend, table):
+    """Nombres de las columnas actuales de una tabla."""
+    if backend == 'postgres':
+        cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = ?", (table,))
+        return {row['column_name'] for row in cursor.fetchall()}
+
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row['name'] for row in cursor.fetchall()}
+
+
+def add_columns(cursor, backend, table, columns):
+    """
+    Agrega a la tabla las columnas que falten.
+
+    Args:
+        columns: dict {nombre: definición SQL}, en el orden en que se agregan
+
+    Returns:
+        list: Nombres de las columnas agregadas
+    """
+    existing = get_columns(cursor, backend, table)
+    added = []
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            added.append(name)
+    return added
@@ -0,0 +1,27 @@
+"""
+0002 - Columnas de préstamos congelados, refinanciados y remates.
+
+Reemplaza a los scripts update_schema_frozen.py, update_schema_parent.py y
+update_schema_sales.py. Incluye end_date, que usan el pago de préstamos y
+FrozenManager para registrar la fecha de cancelación.
+"""
+
+from .helpers import add_columns
+
+VERSION = 2
+DESCRIPTION = "Columnas de congelados, refinanciamiento y remate en loans"
+
+
+def upgrade(cursor, backend):
+    add_columns(cursor, backend, 'loans', {
+        'refinance_count': 'INTEGER DEFAULT 0',
+        'parent_loan_id': 'INTEGER',
+        'frozen_amount': 'REAL DEFAULT 0',
+        'admin_fee': 'REAL DEFAULT 0',
+        'collateral_sale_price': 'REAL DEFAULT 0',
+        'frozen_date': 'DATE',
+        'original_amount': 'REAL',
+        'sale_price': 'REAL DEFAULT 0',
+        'sales_expense': 'REAL DEFAULT 0',
+        'end_date': 'DATE',
+    })
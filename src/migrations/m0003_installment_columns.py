@@ -0,0 +1,16 @@
+"""
+0003 - Columnas usadas por la carga histórica de congelados.
+
+Reemplaza a update_schema_installments.py (installments.amount_paid) y agrega
+pawn_details.description, que create_legacy_frozen_loan usa para la garantía.
+"""
+
+from .helpers import add_columns
+
+VERSION = 3
+DESCRIPTION = "installments.amount_paid y pawn_details.description"
+
+
+def upgrade(cursor, backend):
+    add_columns(cursor, backend, 'installments', {'amount_paid': 'REAL DEFAULT 0'})
+    add_columns(cursor, backend, 'pawn_details', {'description': 'TEXT'})
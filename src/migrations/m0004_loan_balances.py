@@ -0,0 +1,29 @@
+"""
+0004 - Libro de saldos por préstamo (loan_balances).
+
+Lo mantienen los pagos y desembolsos (utils/receivables_ledger.py) y lo lee
+la pestaña Cuentas por Cobrar. Se llena con los préstamos existentes.
+"""
+
+try:
+    from src.utils.receivables_ledger import rebuild_loan_balances
+except ImportError:
+    from utils.receivables_ledger import rebuild_loan_balances
+
+VERSION = 4
+DESCRIPTION = "tabla loan_balances (cuentas por cobrar)"
+
+
+def upgrade(cursor, backend):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS loan_balances (
+            loan_id INTEGER PRIMARY KEY,
+            principal REAL NOT NULL DEFAULT 0,
+            total_due REAL NOT NULL DEFAULT 0,
+            paid REAL NOT NULL DEFAULT 0,
+            capital_outstanding REAL NOT NULL DEFAULT 0,
+            interest_outstanding REAL NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    rebuild_loan_balances(cursor)
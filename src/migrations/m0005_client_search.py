@@ -0,0 +1,93 @@
+"""
+0005 - Índice de búsqueda de clientes (utils/client_search.py).
+
+SQLite: tabla FTS5 clients_fts con contenido externo (clients), sin tildes,
+sincronizada por triggers.
+PostgreSQL: columna clients.search_text (DNI + nombres en minúsculas y sin
+tildes) mantenida por un trigger, con índice GIN trigram.
+"""
+
+from .helpers import add_columns
+
+VERSION = 5
+DESCRIPTION = "índice de búsqueda de clientes (FTS5 / pg_trgm)"
+
+
+def upgrade(cursor, backend):
+    if backend == 'postgres':
+        _upgrade_postgres(cursor)
+    else:
+        _upgrade_sqlite(cursor)
+
+
+def _upgrade_sqlite(cursor):
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+            dni, first_name, last_name,
+            content='clients', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS clients_fts_insert AFTER INSERT ON clients BEGIN
+            INSERT INTO clients_fts (rowid, dni, first_name, last_name)
+            VALUES (new.id, new.dni, new.first_name, new.last_name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS clients_fts_delete AFTER DELETE ON clients BEGIN
+            INSERT INTO clients_fts (clients_fts, rowid, dni, first_name, last_name)
+            VALUES ('delete', old.id, old.dni, old.first_name, old.last_name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS clients_fts_update AFTER UPDATE OF dni, first_name, last_name ON clients BEGIN
+            INSERT INTO clients_fts (clients_fts, rowid, dni, first_name, last_name)
+            VALUES ('delete', old.id, old.dni, old.first_name, old.last_name);
+            INSERT INTO clients_fts (rowid, dni, first_name, last_name)
+            VALUES (new.id, new.dni, new.first_name, new.last_name);
+        END
+    ''')
+
+    # Indexar los clientes existentes
+    cursor.execute("INSERT INTO clients_fts (clients_fts) VALUES ('rebuild')")
+
+
+def _upgrade_postgres(cursor):
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # unaccent() no es IMMUTABLE; el envoltorio permite usarlo en índices
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+    ''')
+
+    add_columns(cursor, 'postgres', 'clients', {'search_text': 'TEXT'})
+
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION clients_search_text() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            NEW.search_text := lower(f_unaccent(
+                coalesce(NEW.dni, '') || ' ' || coalesce(NEW.first_name, '') || ' ' || coalesce(NEW.last_name, '')));
+            RETURN NEW;
+        END
+        $$
+    ''')
+    cursor.execute("DROP TRIGGER IF EXISTS clients_search_text ON clients")
+    cursor.execute('''
+        CREATE TRIGGER clients_search_text
+        BEFORE INSERT OR UPDATE OF dni, first_name, last_name ON clients
+        FOR EACH ROW EXECUTE FUNCTION clients_search_text()
+    ''')
+
+    # Llenar la columna para los clientes existentes
+    cursor.execute("UPDATE clients SET dni = dni")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_clients_search_trgm
+        ON clients USING gin (search_text gin_trgm_ops)
+    ''')
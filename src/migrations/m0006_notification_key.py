@@ -0,0 +1,24 @@
+"""
+0006 - Clave de deduplicación de recordatorios automáticos.
+
+generate_due_notifications crea como máximo un recordatorio por cuota y por
+día. notifications guarda la cuota (installment_id) y el día (notify_day), y
+un índice único sobre ambas columnas evita los duplicados. Los recordatorios
+manuales dejan las dos columnas en NULL y no entran en la restricción.
+"""
+
+from .helpers import add_columns
+
+VERSION = 6
+DESCRIPTION = "notifications.installment_id/notify_day con clave única"
+
+
+def upgrade(cursor, backend):
+    add_columns(cursor, backend, 'notifications', {
+        'installment_id': 'INTEGER',
+        'notify_day': 'DATE',
+    })
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_notifications_installment_day
+        ON notifications (installment_id, notify_day)
+    ''')
@@ -0,0 +1,116 @@
+"""
+0007 - Registro de cambios para las copias diferenciales (utils/backup_archive.py).
+
+Triggers en las tablas respaldadas anotan en change_log la tabla y la clave
+de cada fila insertada, modificada o eliminada. Una copia diferencial lleva
+sólo las filas anotadas después de la copia anterior de su cadena.
+
+backup_state (una sola fila) recuerda la cadena vigente: su identificador, el
+último archivo y hasta qué cambio cubre. No se respalda ni se restaura.
+"""
+
+VERSION = 7
+DESCRIPTION = "change_log y backup_state (copias diferenciales)"
+
+# Tablas respaldadas y su clave primaria (copia fija: no depende de cambios
+# posteriores en backup_archive)
+TRACKED_TABLES = {
+    'users': 'id',
+    'clients': 'id',
+    'cash_sessions': 'id',
+    'loans': 'id',
+    'pawn_details': 'id',
+    'installments': 'id',
+    'transactions': 'id',
+    'settings': 'key',
+    'audit_logs': 'id',
+}
+
+
+def upgrade(cursor, backend):
+    if backend == 'postgres':
+        _upgrade_postgres(cursor)
+    else:
+        _upgrade_sqlite(cursor)
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backup_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            chain TEXT,
+            seq INTEGER NOT NULL DEFAULT 0,
+            last_file TEXT,
+            chain_length INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def _upgrade_sqlite(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    for table, key in TRACKED_TABLES.items():
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_change_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO change_log (table_name, row_key) VALUES ('{table}', new.{key});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_change_update AFTER UPDATE ON {table} BEGIN
+                INSERT INTO change_log (table_name, row_key) VALUES ('{table}', new.{key});
+                INSERT INTO change_log (table_name, row_key)
+                SELECT '{table}', old.{key} WHERE old.{key} IS NOT new.{key};
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_change_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO change_log (table_name, row_key) VALUES ('{table}', old.{key});
+            END
+        ''')
+
+
+def _upgrade_postgres(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Una sola función para todas las tablas; la columna clave va como argumento
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION log_row_change() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO change_log (table_name, row_key)
+                VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0]);
+                RETURN OLD;
+            END IF;
+            INSERT INTO change_log (table_name, row_key)
+            VALUES (TG_TABLE_NAME, to_jsonb(NEW) ->> TG_ARGV[0]);
+            IF TG_OP = 'UPDATE'
+               AND (to_jsonb(OLD) ->> TG_ARGV[0]) IS DISTINCT FROM (to_jsonb(NEW) ->> TG_ARGV[0]) THEN
+                INSERT INTO change_log (table_name, row_key)
+                VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0]);
+            END IF;
+            RETURN NEW;
+        END
+        $$
+    ''')
+
+    for table, key in TRACKED_TABLES.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_change_log ON {table}")
+        cursor.execute(f'''
+            CREATE TRIGGER {table}_change_log
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION log_row_change('{key}')
+        ''')
@@ -0,0 +1,51 @@
+"""
+0008 - Contador de versión de settings (caché de utils/settings_manager.py).
+
+settings_version tiene una sola fila. Un trigger la incrementa con cada
+INSERT, UPDATE o DELETE sobre settings, venga de update_setting, de un script
+o de otra terminal, y cada proceso compara el contador con el de su caché
+para saber si debe recargarla.
+"""
+
+VERSION = 8
+DESCRIPTION = "settings_version (invalidación de la caché de configuración)"
+
+
+def upgrade(cursor, backend):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO settings_version (id, version) VALUES (1, 0)
+        ON CONFLICT (id) DO NOTHING
+    ''')
+
+    if backend == 'postgres':
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION bump_settings_version() RETURNS trigger
+            LANGUAGE plpgsql
+            AS $$
+            BEGIN
+                UPDATE settings_version SET version = version + 1 WHERE id = 1;
+                RETURN NULL;
+            END
+            $$
+        ''')
+        # Una vez por sentencia: un UPDATE de varias claves cuenta como un cambio
+        cursor.execute("DROP TRIGGER IF EXISTS settings_version_bump ON settings")
+        cursor.execute('''
+            CREATE TRIGGER settings_version_bump
+            AFTER INSERT OR UPDATE OR DELETE ON settings
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_settings_version()
+        ''')
+        return
+
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS settings_version_{event.lower()} AFTER {event} ON settings BEGIN
+                UPDATE settings_version SET version = version + 1 WHERE id = 1;
+            END
+        ''')
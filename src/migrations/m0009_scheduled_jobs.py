@@ -0,0 +1,54 @@
+"""
+0009 - Tablas del planificador de tareas (src/jobs).
+
+scheduled_jobs: una fila por tarea con su horario (cron de 5 campos), la
+última y la próxima ejecución y el bloqueo que impide que dos procesos la
+corran a la vez (locked_by / locked_until).
+job_runs: historial de ejecuciones con su duración y resultado.
+job_runners: latido de cada proceso planificador activo; la interfaz lo
+consulta para no repetir tareas que ya corren en segundo plano.
+"""
+
+VERSION = 9
+DESCRIPTION = "scheduled_jobs, job_runs y job_runners (planificador de tareas)"
+
+
+def upgrade(cursor, backend):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            name TEXT PRIMARY KEY,
+            schedule TEXT NOT NULL,
+            enabled BOOLEAN NOT NULL DEFAULT TRUE,
+            last_run_at TIMESTAMP,
+            last_status TEXT,
+            last_duration REAL,
+            last_error TEXT,
+            next_run_at TIMESTAMP,
+            locked_by TEXT,
+            locked_until TIMESTAMP
+        )
+    ''')
+
+    identity = ('INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY' if backend == 'postgres'
+                else 'INTEGER PRIMARY KEY AUTOINCREMENT')
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS job_runs (
+            id {identity},
+            job_name TEXT NOT NULL,
+            runner TEXT,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP,
+            duration REAL,
+            status TEXT NOT NULL,
+            result TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs (job_name, started_at)")
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_runners (
+            runner TEXT PRIMARY KEY,
+            started_at TIMESTAMP NOT NULL,
+            heartbeat_at TIMESTAMP NOT NULL
+        )
+    ''')
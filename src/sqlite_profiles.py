@@ -0,0 +1,64 @@
+"""
+Perfiles de conexión SQLite - PRAGMA que se aplican a cada conexión nueva.
+
+Con el journal clásico (DELETE) una lectura larga, como la copia de seguridad
+en segundo plano, bloquea las escrituras de caja hasta que termina ("database
+is locked"). En modo WAL los lectores no bloquean a los escritores ni al
+revés, y con synchronous = NORMAL un commit no espera un fsync.
+
+El perfil se elige con SQLITE_PROFILE (config.py / variable de entorno) o con
+la clave 'sqlite_profile' de la tabla settings, que init_db aplica al arrancar.
+
+Perfiles:
+    balanced  WAL + synchronous NORMAL. Un corte de luz puede perder los
+              últimos commits, nunca dañar la base. Por defecto.
+    durable   WAL + synchronous FULL: cada commit llega al disco.
+    legacy    Journal DELETE + synchronous FULL (comportamiento anterior).
+
+Cambiar de WAL a DELETE requiere que no haya otras conexiones abiertas; si
+falla, la conexión sigue en el modo actual y se reintenta en la siguiente.
+"""
+
+PROFILES = {
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16384,       # KiB (16 MB)
+        'mmap_size': 67108864,      # 64 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,       # ms
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16384,
+        'mmap_size': 67108864,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,        # Valor por defecto de SQLite
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+# busy_timeout antes que journal_mode: cambiar de modo puede tener que esperar un bloqueo
+_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+
+def apply_profile(conn, profile):
+    """Aplica los PRAGMA de profile (dict) a una conexión sqlite3."""
+    for pragma in _ORDER:
+        if pragma not in profile:
+            continue
+        try:
+            conn.execute(f"PRAGMA {pragma} = {profile[pragma]}").fetchall()
+        except Exception as e:
+            # journal_mode no cambia con otra conexión abierta en WAL
+            print(f"PRAGMA {pragma} no aplicado: {e}")
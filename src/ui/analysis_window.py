@@ -7,6 +7,7 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from ui.modern_window import ModernWindow
 from utils.analytics_manager import AnalyticsManager
+from ui.task_executor import TaskRunner
 
 class AnalysisWindow(ModernWindow):
     def __init__(self, parent):
@@ -17,7 +18,8 @@ class AnalysisWindow(ModernWindow):
 
     def create_widgets(self):
         # Header
-        self.create_header("📊 Tablero de Control Financiero")
+        header = self.create_header("📊 Tablero de Control Financiero")
+        self.tasks = TaskRunner(self, indicator=self.create_loading_indicator(header))
         
         # Main Content
         content = self.create_content_frame()
@@ -189,7 +191,18 @@ class AnalysisWindow(ModernWindow):
         start_date = self.date_start.get_date().strftime("%Y-%m-%d")
         end_date = self.date_end.get_date().strftime("%Y-%m-%d")
         
+        self.tasks.submit('results', self.fetch_results, period, start_date, end_date,
+                          on_done=self.render_results)
+
+    def fetch_results(self, period, start_date, end_date):
+        """Consultas de la pestaña Resultados (corre en segundo plano)."""
         x, y = self.manager.get_profit_loss(period, start_date, end_date)
+        breakdown = self.manager.get_profit_breakdown(start_date, end_date)
+        expenses = self.manager.get_general_expenses(start_date, end_date)
+        return x, y, breakdown, expenses
+
+    def render_results(self, data):
+        x, y, breakdown, expenses = data
         
         self.ax_results.clear()
         self.ax_results.plot(x, y, marker='o', linestyle='-', color='#4CAF50', linewidth=2)
@@ -201,9 +214,7 @@ class AnalysisWindow(ModernWindow):
         self.canvas_results.draw()
         
         # Update Side Panel
-        breakdown = self.manager.get_profit_breakdown(start_date, end_date)
         gross_profit = sum(breakdown.values())
-        expenses = self.manager.get_general_expenses(start_date, end_date)
         net_profit = gross_profit - expenses
         
         self.lbl_total_profit.config(text=f"Utilidad Neta: S/ {net_profit:,.2f}")
@@ -256,7 +267,10 @@ class AnalysisWindow(ModernWindow):
             tk.Label(row, text=f"S/ {val:,.2f}", font=("Segoe UI", 10, "bold"), bg='white', fg='#333').pack(side=tk.RIGHT, padx=10)
 
     def update_quality_chart(self):
-        stats = self.manager.get_client_quality_evolution()
+        self.tasks.submit('quality', self.manager.get_client_quality_evolution,
+                          on_done=self.render_quality)
+
+    def render_quality(self, stats):
         fechas = stats['fechas']
         
         self.ax_quality.clear()
@@ -282,7 +296,10 @@ class AnalysisWindow(ModernWindow):
             self.stats_labels['Malo'].config(text=str(stats['Malo'][-1]))
 
     def update_dist_chart(self):
-        data = self.manager.get_investment_distribution()
+        self.tasks.submit('dist', self.manager.get_investment_distribution,
+                          on_done=self.render_dist)
+
+    def render_dist(self, data):
         labels = list(data.keys())
         values = list(data.values())
         total = sum(values)
@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 from database import get_db_connection
+from utils.receivables_ledger import sync_missing_balances
+from utils.client_search import search_clients
 from ui.ui_utils import apply_styles, ModernButton
 from ui.date_picker import DateEntry
 from datetime import date
@@ -317,68 +319,52 @@ class AssetsWindow(tk.Toplevel):
         total_capital = 0.0
         total_interest = 0.0
         
-        # 1. Load System Loans
+        # 1. Load System Loans (one scan over the balances ledger)
         try:
+            # Loans created before the ledger existed (or without lastrowid) get their row now
+            sync_missing_balances(cursor)
+            conn.commit()
+            
             cursor.execute("""
                 SELECT l.id, c.first_name || ' ' || c.last_name as client_name, 
-                    l.loan_type, l.amount as principal, l.total_payment, l.status
+                    l.loan_type, l.status, b.principal, b.total_due, b.paid,
+                    b.capital_outstanding, b.interest_outstanding
                 FROM loans l
                 JOIN clients c ON l.client_id = c.id
+                JOIN loan_balances b ON b.loan_id = l.id
                 WHERE l.status IN ('active', 'overdue')
+                  AND b.capital_outstanding + b.interest_outstanding >= 0.01
             """)
             
-            system_loans = cursor.fetchall()
-            
-            for loan in system_loans:
-                try:
-                    cursor.execute("SELECT SUM(amount) FROM transactions WHERE loan_id = ? AND type='income'", (loan['id'],))
-                    res = cursor.fetchone()
-                    paid = res[0] if res and res[0] else 0.0
-                    
-                    principal = loan['principal']
-                    total_due = loan['total_payment']
-                    expected_interest = total_due - principal
-                    
-                    # Estimate capital vs interest paid: Proportional? Or Capital first?
-                    # Simplified logic: Balance = Outstanding Capital + Outstanding Interest
-                    # If paid < principal: Outstanding Capital = Principal - Paid, Outstanding Interest = Full Interest
-                    # If paid >= principal: Outstanding Capital = 0, Outstanding Interest = Total Due - Paid
-                    
-                    if paid < principal:
-                        balance_capital = principal - paid
-                        balance_interest = expected_interest
-                    else:
-                        balance_capital = 0
-                        balance_interest = total_due - paid
-                        
-                    balance = balance_capital + balance_interest
-                    if balance < 0.01: continue
-                    
-                    # Calculate total balance for the row
-                    balance = balance_capital + balance_interest
+            for loan in cursor.fetchall():
+                principal = loan['principal']
+                total_due = loan['total_due']
+                paid = loan['paid']
+                balance_capital = loan['capital_outstanding']
+                balance_interest = loan['interest_outstanding']
+                balance = balance_capital + balance_interest
 
-                    status_es = 'Activo' if loan['status'] == 'active' else 'Vencido'
-                    
-                    self.tree_receivables.insert('', tk.END, values=(
-                        "SISTEMA",
-                        f"L{loan['id']}",
-                        loan['client_name'], 
-                        loan['loan_type'], 
-                        f"S/ {principal:,.2f}",
-                        f"S/ {total_due:,.2f}",
-                        f"S/ {paid:,.2f}",
-                        f"S/ {balance:,.2f}", # New: Saldo
-                        f"S/ {balance_capital:,.2f}", 
-                        f"S/ {balance_interest:,.2f}",
-                        status_es
-                    ))
-                    total_receivable += (balance_capital + balance_interest)
-                    total_capital += balance_capital
-                    total_interest += balance_interest
-                except Exception as e:
-                    print(f"Error processing loan {loan['id']}: {e}")
-        except Exception:
-            pass
+                status_es = 'Activo' if loan['status'] == 'active' else 'Vencido'
+                
+                self.tree_receivables.insert('', tk.END, values=(
+                    "SISTEMA",
+                    f"L{loan['id']}",
+                    loan['client_name'], 
+                    loan['loan_type'], 
+                    f"S/ {principal:,.2f}",
+                    f"S/ {total_due:,.2f}",
+                    f"S/ {paid:,.2f}",
+                    f"S/ {balance:,.2f}", # New: Saldo
+                    f"S/ {balance_capital:,.2f}", 
+                    f"S/ {balance_interest:,.2f}",
+                    status_es
+                ))
+                total_receivable += balance
+                total_capital += balance_capital
+                total_interest += balance_interest
+        except Exception as e:
+            conn.rollback()
+            print(f"Error loading system receivables: {e}")
 
         # 2. Load Manual Receivables
         try:
@@ -575,10 +561,7 @@ class AssetsWindow(tk.Toplevel):
             lb = tk.Listbox(popup, font=("Segoe UI", 11))
             lb.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
             
-            conn = get_db_connection()
-            rows = conn.execute("SELECT id, first_name, last_name, dni FROM clients WHERE first_name LIKE ? OR last_name LIKE ? OR dni LIKE ?", 
-                               (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%')).fetchall()
-            conn.close()
+            rows = search_clients(search_term, limit=50)
             
             if not rows:
                 lb.insert(tk.END, "No se encontraron clientes.")
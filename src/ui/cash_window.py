@@ -5,6 +5,9 @@ from datetime import datetime
 from utils.pdf_generator import PDFGenerator
 from utils.settings_manager import get_setting
 from utils.loan_payment_manager import calculate_outstanding_balance, get_rapidiario_schedule
+from ui.task_executor import TaskRunner
+from utils.client_search import search_clients as find_clients
+from ui.ui_utils import PagedTreeview
 import os
 import subprocess
 import platform
@@ -302,7 +305,12 @@ class CashWindow(tk.Toplevel):
         right_panel = tk.Frame(container, bg='white')
         right_panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        tk.Label(right_panel, text="Movimientos del Día", font=("Segoe UI", 14, "bold"), bg='white').pack(pady=10)
+        title_row = tk.Frame(right_panel, bg='white')
+        title_row.pack(fill=tk.X)
+        tk.Label(title_row, text="Movimientos del Día", font=("Segoe UI", 14, "bold"), bg='white').pack(side=tk.LEFT, expand=True, pady=10)
+        self.lbl_loading = tk.Label(title_row, text="", font=("Segoe UI", 9, "italic"), bg='white', fg='#777')
+        self.lbl_loading.pack(side=tk.RIGHT, padx=10)
+        self.tasks = TaskRunner(self, indicator=self.lbl_loading)
         
         # Treeview
         columns = ("hora", "tipo", "cliente", "categoria", "metodo", "monto", "descripcion")
@@ -325,7 +333,12 @@ class CashWindow(tk.Toplevel):
         self.tree.column("descripcion", width=250)
         
         scrollbar = ttk.Scrollbar(right_panel, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        # Oldest first, as before; later pages load while scrolling down
+        self.pager = PagedTreeview(self.tree, scrollbar, self.render_transaction,
+                                   tasks=self.tasks, task_key='transactions', descending=False)
+        
+        self.tree.tag_configure("income", foreground="#4CAF50")
+        self.tree.tag_configure("expense", foreground="#F44336")
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -366,25 +379,16 @@ class CashWindow(tk.Toplevel):
     
     def load_transactions(self):
         """Load today's transactions for current session"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         today = datetime.now().strftime("%Y-%m-%d")
-        cursor.execute("""
+        self.pager.load("""
             SELECT t.*, c.first_name, c.last_name 
             FROM transactions t
             LEFT JOIN loans l ON t.loan_id = l.id
             LEFT JOIN clients c ON l.client_id = c.id
             WHERE t.cash_session_id = ? AND date(t.date) = ?
-            ORDER BY t.date DESC
-        """, (self.current_session['id'], today))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
+        """, (self.current_session['id'], today), key_column='t.id')
+    
+    def render_transaction(self, row):
         # Translation map
         cat_map = {
             'payment': 'Pago Cuota',
@@ -393,30 +397,26 @@ class CashWindow(tk.Toplevel):
             'petty_cash_withdrawal': 'Retiro Caja Chica'
         }
         
-        for row in rows:
-            hora = row['date'][11:16] if len(row['date']) > 16 else ""
-            tipo = "Ingreso" if row['type'] == 'income' else "Egreso"
-            tag = "income" if row['type'] == 'income' else "expense"
-            
-            # Translate category
-            raw_cat = row['category']
-            categoria = cat_map.get(raw_cat, raw_cat.capitalize())
-            
-            # Client Name
-            cliente = f"{row['first_name']} {row['last_name']}" if row['first_name'] else "-"
-            
-            self.tree.insert("", 0, values=(
-                hora,
-                tipo,
-                cliente,
-                categoria,
-                row['payment_method'] or 'N/A',
-                f"S/ {row['amount']:.2f}",
-                row['description']
-            ), tags=(tag,))
-        
-        self.tree.tag_configure("income", foreground="#4CAF50")
-        self.tree.tag_configure("expense", foreground="#F44336")
+        hora = row['date'][11:16] if len(row['date']) > 16 else ""
+        tipo = "Ingreso" if row['type'] == 'income' else "Egreso"
+        tag = "income" if row['type'] == 'income' else "expense"
+        
+        # Translate category
+        raw_cat = row['category']
+        categoria = cat_map.get(raw_cat, raw_cat.capitalize())
+        
+        # Client Name
+        cliente = f"{row['first_name']} {row['last_name']}" if row['first_name'] else "-"
+        
+        self.tree.insert("", tk.END, values=(
+            hora,
+            tipo,
+            cliente,
+            categoria,
+            row['payment_method'] or 'N/A',
+            f"S/ {row['amount']:.2f}",
+            row['description']
+        ), tags=(tag,))
     
     def update_balance(self):
         """Calculate and update current balance"""
@@ -1148,17 +1148,7 @@ class LoanPaymentForm(tk.Toplevel):
         if len(query) < 2:
             return
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, dni, first_name, last_name 
-            FROM clients 
-            WHERE dni LIKE ? OR first_name LIKE ? OR last_name LIKE ?
-            LIMIT 10
-        """, (f"%{query}%", f"%{query}%", f"%{query}%"))
-        
-        self.clients = cursor.fetchall()
-        conn.close()
+        self.clients = find_clients(query, limit=10)
         
         self.listbox_clients.delete(0, tk.END)
         for client in self.clients:
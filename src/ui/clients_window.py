@@ -5,7 +5,8 @@ import os
 import shutil
 from PIL import Image, ImageTk
 from database import get_db_connection
-from ui.ui_utils import ScrollableFrame, ask_admin_password
+from ui.ui_utils import ScrollableFrame, ask_admin_password, PagedTreeview
+from utils.client_search import search_clients
 
 class ClientsWindow(tk.Toplevel):
     def __init__(self, parent, filter_loan_type=None, on_select_callback=None):
@@ -161,7 +162,7 @@ class ClientsWindow(tk.Toplevel):
         self.tree.column("occupation", width=150)
         
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        self.pager = PagedTreeview(self.tree, scrollbar, self.render_client, descending=False)
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -388,27 +389,18 @@ class ClientsWindow(tk.Toplevel):
         self.btn_delete.config(state="disabled")
 
     def load_clients(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         search_term = self.search_var.get()
-        params = []
         
-        # Removed strict filtering by loan type to show all clients
-        query = "SELECT * FROM clients WHERE 1=1"
-            
         if search_term:
-            query += " AND (dni LIKE ? OR first_name LIKE ? OR last_name LIKE ?)"
-            params.extend([f'%{search_term}%'] * 3)
-            
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+            # Best matches first (search index), no paging needed
+            self.pager.show(search_clients(search_term, limit=200))
+            return
         
-        for row in rows:
-            fullname = f"{row['first_name']} {row['last_name']}"
-            # Convert row to dict to safely use .get()
-            row_dict = dict(row)
-            self.tree.insert("", tk.END, values=(row["id"], row["dni"], fullname, row["phone"], row_dict.get("occupation", "")))
+        # Removed strict filtering by loan type to show all clients
+        self.pager.load("SELECT * FROM clients WHERE 1=1")
+
+    def render_client(self, row):
+        fullname = f"{row['first_name']} {row['last_name']}"
+        # Convert row to dict to safely use .get()
+        row_dict = dict(row)
+        self.tree.insert("", tk.END, values=(row["id"], row["dni"], fullname, row["phone"], row_dict.get("occupation", "")))
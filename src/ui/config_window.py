@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from database import get_db_connection
 from utils.settings_manager import get_all_settings, update_setting, get_setting
+from utils.receivables_ledger import rebuild_loan_balances
 
 class ConfigWindow(tk.Toplevel):
     def __init__(self, parent, user_data):
@@ -949,6 +950,9 @@ class ConfigWindow(tk.Toplevel):
                 if vars['cash'].get():
                     cursor.execute("DELETE FROM transactions")
                     
+                if vars['loans'].get() or vars['cash'].get():
+                    rebuild_loan_balances(cursor)
+                    
                 if vars['history'].get():
                     cursor.execute("DELETE FROM audit_logs")
                     
@@ -974,12 +978,9 @@ class ConfigWindow(tk.Toplevel):
         tk.Button(dialog, text="Ejecutar Limpieza", command=execute_reset, bg="red", fg="white").pack(pady=20)
 
     def backup_db(self):
-        import shutil
-        import os
         from datetime import datetime
         from tkinter import filedialog
-        
-        src = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'database', 'system.db')
+        from utils.backup_manager import BackupManager
         
         # Default filename
         default_name = f'backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
@@ -994,7 +995,8 @@ class ConfigWindow(tk.Toplevel):
         if not dst: return # User cancelled
         
         try:
-            shutil.copy2(src, dst)
+            # Online backup: a plain file copy would miss what is still in system.db-wal
+            BackupManager().copy_database(dst)
             messagebox.showinfo("Éxito", f"Respaldo creado exitosamente en:\n{dst}")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -1027,7 +1029,7 @@ class ConfigWindow(tk.Toplevel):
             cursor = conn.cursor()
             
             # List of tables to clear
-            tables = ['clients', 'loans', 'transactions', 'audit_logs', 'pawn_details']
+            tables = ['clients', 'loans', 'loan_balances', 'transactions', 'audit_logs', 'pawn_details']
             for table in tables:
                 cursor.execute(f"DELETE FROM {table}")
                 
@@ -4,6 +4,7 @@ from database import get_db_connection
 from ui.modern_window import ModernWindow
 
 from utils.analytics_manager import AnalyticsManager
+from ui.task_executor import TaskRunner
 
 class DatabaseWindow(ModernWindow):
     def __init__(self, parent):
@@ -26,14 +27,22 @@ class DatabaseWindow(ModernWindow):
         from utils.backup_manager import BackupManager
         bm = BackupManager()
         backups = bm.get_available_backups()
+        chains = bm.get_backup_chains()
+        nested = {name for base, diffs in chains.items() if base in backups for name in diffs}
         
+        # Each full backup shows its chain of differential backups underneath
         for backup in backups:
-            self.backup_tree.insert("", tk.END, values=(backup,))
+            if backup in nested:
+                continue
+            node = self.backup_tree.insert("", tk.END, values=(backup,))
+            for diff in chains.get(backup, []):
+                self.backup_tree.insert(node, tk.END, values=(diff,))
 
 
     def create_widgets(self):
         # Header
-        self.create_header("🗄️ Base de Datos - Información Total")
+        header = self.create_header("🗄️ Base de Datos - Información Total")
+        self.tasks = TaskRunner(self, indicator=self.create_loading_indicator(header))
         
         # Content
         content = self.create_content_frame()
@@ -48,7 +57,8 @@ class DatabaseWindow(ModernWindow):
         tk.Label(toolbar, text="Buscar Cliente (DNI/Nombre):", bg=self.card_bg, fg=self.text_color,
                 font=("Segoe UI", 10, "bold")).pack(side=tk.LEFT, padx=5)
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", lambda name, index, mode: self.load_data())
+        self._search_job = None
+        self.search_var.trace("w", lambda name, index, mode: self.schedule_search())
         search_entry = ttk.Entry(toolbar, textvariable=self.search_var, width=30, font=("Segoe UI", 10))
         search_entry.pack(side=tk.LEFT, padx=5)
         
@@ -145,8 +155,9 @@ class DatabaseWindow(ModernWindow):
 
         tk.Label(left_frame, text="Copias Disponibles:", bg=self.card_bg, fg=self.text_color).pack(anchor="w", padx=10)
         
-        self.backup_tree = ttk.Treeview(left_frame, columns=("filename",), show="headings", height=8)
+        self.backup_tree = ttk.Treeview(left_frame, columns=("filename",), show="tree headings", height=8)
         self.backup_tree.heading("filename", text="Archivo de Respaldo")
+        self.backup_tree.column("#0", width=30, stretch=False)
         self.backup_tree.column("filename", width=300)
         self.backup_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
@@ -259,26 +270,31 @@ class DatabaseWindow(ModernWindow):
             
         filename = self.backup_tree.item(selection[0], "values")[0]
         
+        from utils.backup_manager import BackupManager
+        bm = BackupManager()
+        chain_note = ""
+        if filename.endswith('.diff.ndjson.gz'):
+            try:
+                chain = bm.get_backup_chain(filename)
+            except ValueError as e:
+                messagebox.showerror("Cadena incompleta", str(e))
+                return
+            chain_note = f"Se aplicarán {len(chain)} archivos: la copia completa '{chain[0]}' y sus diferenciales.\n\n"
+        
         if messagebox.askyesno("Confirmar Restauración", 
                               f"¿Está seguro que desea restaurar la base de datos desde '{filename}'?\n\n"
+                              f"{chain_note}"
                               "⚠️ ESTO SOBREESCRIBIRÁ LOS DATOS ACTUALES.\n"
                               "La aplicación se reiniciará después de la restauración."):
             
             if not self.verify_admin_password():
                 return
 
-            from utils.backup_manager import BackupManager
-            bm = BackupManager()
-            success, message = bm.restore_database(filename)
-            if success:
-                messagebox.showinfo("Restauración Exitosa", "La base de datos ha sido restaurada.\nLa aplicación se reiniciará ahora.")
-                self.restart_application()
-            else:
-                messagebox.showerror("Error", f"Ocurrió un error al restaurar la base de datos:\n{message}")
+            self.run_restore(bm, filename)
 
     def import_backup(self):
         from tkinter import filedialog
-        filename = filedialog.askopenfilename(filetypes=[("Backup Files", "*.db *.json *.xlsx"), ("Database", "*.db"), ("JSON", "*.json"), ("Excel", "*.xlsx")])
+        filename = filedialog.askopenfilename(filetypes=[("Backup Files", "*.db *.ndjson.gz *.json *.xlsx"), ("Database", "*.db"), ("Copia comprimida", "*.ndjson.gz"), ("JSON", "*.json"), ("Excel", "*.xlsx")])
         if filename:
             if messagebox.askyesno("Confirmar Importación", 
                                   f"¿Está seguro que desea restaurar desde el archivo seleccionado?\n\n"
@@ -290,12 +306,51 @@ class DatabaseWindow(ModernWindow):
 
                 from utils.backup_manager import BackupManager
                 bm = BackupManager()
-                success, message = bm.restore_database(filename)
-                if success:
-                    messagebox.showinfo("Restauración Exitosa", "La base de datos ha sido restaurada.\nLa aplicación se reiniciará ahora.")
-                    self.restart_application()
-                else:
-                    messagebox.showerror("Error", f"Ocurrió un error al restaurar la base de datos:\n{message}")
+                self.run_restore(bm, filename)
+
+    def run_restore(self, bm, filename):
+        """Runs the restore in the background with a progress dialog; restarts the app on success."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Restaurando")
+        dialog.geometry("420x120")
+        dialog.resizable(False, False)
+        dialog.transient(self)
+        dialog.grab_set()
+        dialog.protocol("WM_DELETE_WINDOW", lambda: None)  # Cannot be cancelled halfway
+
+        status_var = tk.StringVar(value="Preparando...")
+        tk.Label(dialog, textvariable=status_var, font=("Segoe UI", 10)).pack(padx=20, pady=(20, 10), anchor="w")
+        bar = ttk.Progressbar(dialog, length=380, maximum=100)
+        bar.pack(padx=20)
+
+        # Written by the restore thread, read here with after()
+        state = {'fraction': 0.0, 'message': "Preparando..."}
+
+        def progress(fraction, message):
+            state['fraction'], state['message'] = fraction, message
+
+        def refresh():
+            if not dialog.winfo_exists():
+                return
+            bar['value'] = state['fraction'] * 100
+            status_var.set(state['message'])
+            dialog.after(100, refresh)
+
+        def finish(result):
+            success, message = result
+            dialog.destroy()
+            if success:
+                messagebox.showinfo("Restauración Exitosa", f"{message}\n\nLa aplicación se reiniciará ahora.")
+                self.restart_application()
+            else:
+                messagebox.showerror("Error", f"Ocurrió un error al restaurar la base de datos:\n{message}")
+
+        def fail(error):
+            finish((False, str(error)))
+
+        refresh()
+        self.tasks.submit('restore', bm.restore_database, filename, progress=progress,
+                          on_done=finish, on_error=fail)
 
     def reset_system(self):
         if messagebox.askyesno("⚠️ PELIGRO: RESETEAR SISTEMA", 
@@ -323,7 +378,22 @@ class DatabaseWindow(ModernWindow):
                 else:
                     messagebox.showerror("Error", "Ocurrió un error al resetear el sistema.")
 
+    def schedule_search(self, delay=300):
+        """Recarga la tabla cuando el usuario deja de escribir (debounce)."""
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(delay, self.load_data)
+
     def load_data(self, *args):
+        self.tasks.submit('clients', self.fetch_data, self.search_var.get(), on_done=self.render_data)
+
+    def fetch_data(self, search):
+        """Cartera de clientes e inventario de prendas (corre en segundo plano)."""
+        return self.analytics.get_client_portfolio(search), self.analytics.get_pawn_inventory()
+
+    def render_data(self, data):
+        portfolio, inventory = data
+        
         # Clear Clients Tree
         for item in self.tree.get_children():
             self.tree.delete(item)
@@ -331,65 +401,22 @@ class DatabaseWindow(ModernWindow):
         # Clear Pawn Tree
         for item in self.pawn_tree.get_children():
             self.pawn_tree.delete(item)
-            
-        search = self.search_var.get()
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM clients WHERE 1=1"
-        params = []
-        if search:
-            query += " AND (first_name LIKE ? OR last_name LIKE ? OR dni LIKE ?)"
-            params.extend([f'%{search}%', f'%{search}%', f'%{search}%'])
-            
-        cursor.execute(query, params)
-        clients = cursor.fetchall()
+        rating_tags = {"Nuevo": "nuevo", "Moroso": "moroso", "Buen Pagador": "buen_pagador", "Regular": "regular"}
         
-        for client in clients:
-            client_id = client['id']
-            
-            cursor.execute("SELECT * FROM loans WHERE client_id = ?", (client_id,))
-            loans = cursor.fetchall()
-            
-            loans_count = len(loans)
-            active_loans = sum(1 for l in loans if l['status'] == 'active')
-            total_debt = sum(l['amount'] for l in loans if l['status'] == 'active')
-            
-            # Calculate Lifetime Value
-            total_generated = self.analytics.get_client_lifetime_value(client_id)
-            
-            rating = "Nuevo"
-            tag = "nuevo"
-            
-            if loans_count > 0:
-                overdue_count = sum(1 for l in loans if l['status'] == 'overdue')
-                
-                if overdue_count > 0:
-                    rating = "Moroso"
-                    tag = "moroso"
-                elif loans_count > 2 and overdue_count == 0:
-                    rating = "Buen Pagador"
-                    tag = "buen_pagador"
-                else:
-                    rating = "Regular"
-                    tag = "regular"
-            
+        for client in portfolio:
             self.tree.insert("", tk.END, values=(
                 client['id'],
                 client['dni'],
                 f"{client['first_name']} {client['last_name']}",
-                loans_count,
-                active_loans,
-                f"{total_debt:.2f}",
-                f"{total_generated:.2f}",
-                rating
-            ), tags=(tag,))
-            
-        conn.close()
+                client['loans_count'],
+                client['active_loans'],
+                f"{client['total_debt']:.2f}",
+                f"{client['lifetime_value']:.2f}",
+                client['rating']
+            ), tags=(rating_tags[client['rating']],))
         
         # Load Pawn Data
-        inventory = self.analytics.get_pawn_inventory()
         for item in inventory:
             self.pawn_tree.insert("", tk.END, values=(
                 item['id'],
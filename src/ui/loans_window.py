@@ -6,8 +6,22 @@ from datetime import datetime, date
 from utils.loan_calculator import obtener_info_prestamo
 from utils.settings_manager import get_setting
 from utils.loan_manager import can_refinance_rapidiario, refinance_rapidiario
+from utils.receivables_ledger import refresh_loan_balance
+from ui.task_executor import TaskRunner
+from ui.ui_utils import PagedTreeview
+from utils.client_search import search_clients, client_filter
 import os
 
+def _search_client_names(search_term, clients_data):
+    """Nombres para el combo de clientes según la búsqueda (más relevantes primero)."""
+    names = []
+    for client in search_clients(search_term, limit=50):
+        display_name = f"{client['first_name']} {client['last_name']} - DNI: {client['dni']}"
+        clients_data[display_name] = client['id']
+        names.append(display_name)
+    return names
+
+
 class LoansWindow(tk.Toplevel):
     def __init__(self, parent, user_data=None, loan_type=None):
         super().__init__(parent)
@@ -52,6 +66,14 @@ class LoansWindow(tk.Toplevel):
                  bg='#FF9800', fg='white', font=("Segoe UI", 10, "bold"),
                  relief='flat', cursor='hand2', padx=15, pady=8).pack(side=tk.LEFT, padx=5, pady=8)
         
+        if self.loan_type != 'congelado':
+            tk.Button(toolbar, text="🖨️ Cronogramas", command=self.print_schedules,
+                     bg='#795548', fg='white', font=("Segoe UI", 10, "bold"),
+                     relief='flat', cursor='hand2', padx=15, pady=8).pack(side=tk.LEFT, padx=5, pady=8)
+            tk.Button(toolbar, text="📋 Hojas de Cobranza", command=self.print_collection_sheets,
+                     bg='#607D8B', fg='white', font=("Segoe UI", 10, "bold"),
+                     relief='flat', cursor='hand2', padx=15, pady=8).pack(side=tk.LEFT, padx=5, pady=8)
+        
         tk.Button(toolbar, text="🔄 Actualizar", command=self.load_loans,
                  bg='#2196F3', fg='white', font=("Segoe UI", 10, "bold"),
                  relief='flat', cursor='hand2', padx=15, pady=8).pack(side=tk.LEFT, padx=5, pady=8)
@@ -100,6 +122,10 @@ class LoansWindow(tk.Toplevel):
         self.search_var.trace("w", lambda *args: self.load_loans())
         search_entry = tk.Entry(toolbar, textvariable=self.search_var, font=("Segoe UI", 10), width=20)
         search_entry.pack(side=tk.LEFT, padx=5, pady=8)
+        
+        self.lbl_loading = tk.Label(toolbar, text="", bg="#2196F3", fg='white', font=("Segoe UI", 9, "italic"))
+        self.lbl_loading.pack(side=tk.LEFT, padx=5, pady=8)
+        self.tasks = TaskRunner(self, indicator=self.lbl_loading)
 
         # View Clients Button (Only for Pawn Shop)
         # View Clients Button (For all loan types)
@@ -133,7 +159,7 @@ class LoansWindow(tk.Toplevel):
         self.tree.column("status", width=100, anchor='center')
         
         scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.pager = PagedTreeview(self.tree, scrollbar, self.render_loan, tasks=self.tasks, task_key='loans')
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -241,21 +267,31 @@ class LoansWindow(tk.Toplevel):
                 messagebox.showerror("Error", msg)
 
     def check_overdue(self):
-        from utils.loan_manager import check_and_freeze_loans
+        from utils.loan_manager import freeze_overdue_loans, format_freeze_report
+        
+        # Dry run first: the user sees exactly what will be frozen
+        try:
+            preview = freeze_overdue_loans(self.user_data['id'], dry_run=True)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al verificar mora: {e}")
+            return
+        
+        if not preview['loans']:
+            messagebox.showinfo("Proceso Completado", "No se encontraron préstamos para congelar.")
+            return
         
         if messagebox.askyesno("Verificar Mora", 
-                             "Se buscarán préstamos vencidos según las reglas:\n\n"
-                             "- Rapidiario: 3 refinanciamientos + vencido\n"
-                             "- Empeño: > 75 días desde inicio\n"
-                             "- Bancario: > 105 días desde inicio\n\n"
+                             "Se congelarán los siguientes préstamos:\n\n"
+                             f"{format_freeze_report(preview)}\n\n"
                              "¿Desea continuar?"):
             
-            count = check_and_freeze_loans(self.user_data['id'])
-            if count > 0:
-                messagebox.showinfo("Proceso Completado", f"Se han congelado {count} préstamos automáticamente.")
-                self.load_loans()
-            else:
-                messagebox.showinfo("Proceso Completado", "No se encontraron préstamos para congelar.")
+            try:
+                count = freeze_overdue_loans(self.user_data['id'])['frozen']
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al congelar: {e}")
+                return
+            messagebox.showinfo("Proceso Completado", f"Se han congelado {count} préstamos automáticamente.")
+            self.load_loans()
 
     def open_legacy_dialog(self):
         LegacyFrozenLoanDialog(self, self.load_loans)
@@ -282,9 +318,6 @@ class LoansWindow(tk.Toplevel):
                 messagebox.showerror("Error", msg)
 
     def load_loans(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         search_term = self.search_var.get()
         query = """
             SELECT l.id, c.first_name || ' ' || c.last_name as client_name, 
@@ -303,27 +336,23 @@ class LoansWindow(tk.Toplevel):
             params.append(self.loan_type)
             
         if search_term:
-            query += " AND (c.first_name LIKE ? OR c.last_name LIKE ? OR c.dni LIKE ?)"
-            params.extend([f'%{search_term}%'] * 3)
+            where, where_params = client_filter(search_term, 'c')
+            query += f" AND {where}"
+            params.extend(where_params)
         
-        query += " ORDER BY l.id DESC"
+        # Newest first, one page at a time (l.id < last ORDER BY l.id DESC)
+        self.pager.load(query, params, key_column='l.id')
+
+    def render_loan(self, row):
+        amount_display = row['amount']
+        if row['status'] == 'frozen' and row['frozen_amount']:
+            amount_display = row['frozen_amount']
             
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-        
-        for row in rows:
-            amount_display = row['amount']
-            if row['status'] == 'frozen' and row['frozen_amount']:
-                amount_display = row['frozen_amount']
-                
-            self.tree.insert("", tk.END, values=(
-                row["id"], row["client_name"], row["loan_type"], 
-                f"S/ {amount_display:.2f}", f"{row['interest_rate']}%",
-                row["start_date"], row["due_date"] or "N/A", row["status"]
-            ))
+        self.tree.insert("", tk.END, values=(
+            row["id"], row["client_name"], row["loan_type"], 
+            f"S/ {amount_display:.2f}", f"{row['interest_rate']}%",
+            row["start_date"], row["due_date"] or "N/A", row["status"]
+        ))
 
     def view_schedule(self):
         selection = self.tree.selection()
@@ -335,6 +364,98 @@ class LoansWindow(tk.Toplevel):
         from ui.schedule_window import ScheduleWindow
         ScheduleWindow(self, loan_id)
 
+    def print_schedules(self):
+        """Schedules of every active/overdue loan of this type, rendered in worker processes."""
+        from tkinter import filedialog
+        
+        folder = filedialog.askdirectory(title="Carpeta para los cronogramas")
+        if not folder:
+            return
+        
+        state = {'done': 0, 'total': 0, 'running': True}
+        
+        def progress(done, total, path):
+            state['done'], state['total'] = done, total  # Read by show_progress on the Tk thread
+        
+        def render():
+            from utils.pdf_batch import render_batch, schedule_documents
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM loans WHERE loan_type = ? AND status IN ('active', 'overdue') ORDER BY id",
+                               (self.loan_type,))
+                loan_ids = [row['id'] for row in cursor.fetchall()]
+            finally:
+                conn.close()
+            return render_batch(schedule_documents(loan_ids), folder, progress=progress)
+        
+        def show_progress():
+            if not state['running'] or not self.winfo_exists():
+                return
+            if state['total']:
+                self.lbl_loading.config(text=f"Cronogramas {state['done']}/{state['total']}...")
+            self.after(200, show_progress)
+        
+        def finish(paths):
+            state['running'] = False
+            self.lbl_loading.config(text="")
+            ok = sum(1 for path in paths if path)
+            if ok < len(paths):
+                messagebox.showwarning("Cronogramas", f"Se generaron {ok} de {len(paths)} cronogramas en:\n{folder}")
+            else:
+                messagebox.showinfo("Cronogramas", f"Se generaron {ok} cronogramas en:\n{folder}")
+        
+        def fail(error):
+            state['running'] = False
+            self.lbl_loading.config(text="")
+            messagebox.showerror("Error", f"No se pudieron generar los cronogramas: {error}")
+        
+        self.tasks.submit('print_schedules', render, on_done=finish, on_error=fail)
+        show_progress()
+
+    def print_collection_sheets(self):
+        """Today's collection sheet (PDF + image) for every analyst, all loan types."""
+        from tkinter import filedialog
+        
+        folder = filedialog.askdirectory(title="Carpeta para las hojas de cobranza")
+        if not folder:
+            return
+        
+        state = {'done': 0, 'total': 0, 'running': True}
+        
+        def progress(done, total, path):
+            state['done'], state['total'] = done, total  # Read by show_progress on the Tk thread
+        
+        def render():
+            from utils.collection_sheets import generate_collection_sheets
+            return generate_collection_sheets(output_dir=folder, progress=progress)
+        
+        def show_progress():
+            if not state['running'] or not self.winfo_exists():
+                return
+            if state['total']:
+                self.lbl_loading.config(text=f"Hojas de cobranza {state['done']}/{state['total']} archivos...")
+            self.after(200, show_progress)
+        
+        def finish(paths):
+            state['running'] = False
+            self.lbl_loading.config(text="")
+            ok = sum(1 for path in paths if path)
+            if not paths:
+                messagebox.showinfo("Hojas de Cobranza", "No hay cuotas por cobrar hoy.")
+            elif ok < len(paths):
+                messagebox.showwarning("Hojas de Cobranza", f"Se generaron {ok} de {len(paths)} archivos en:\n{folder}")
+            else:
+                messagebox.showinfo("Hojas de Cobranza", f"Se generaron {ok // 2} hojas (PDF e imagen) en:\n{folder}")
+        
+        def fail(error):
+            state['running'] = False
+            self.lbl_loading.config(text="")
+            messagebox.showerror("Error", f"No se pudieron generar las hojas de cobranza: {error}")
+        
+        self.tasks.submit('collection_sheets', render, on_done=finish, on_error=fail)
+        show_progress()
+
     def open_add_loan_dialog(self):
         LoanForm(self, self.loan_type, self.load_loans)
 
@@ -458,7 +579,7 @@ class LegacyFrozenLoanDialog(tk.Toplevel):
             self.client_combo['values'] = self.all_client_names
             return
 
-        filtered = [n for n in self.all_client_names if search_term in n.lower()]
+        filtered = _search_client_names(search_term, self.clients_data)
         self.client_combo['values'] = filtered
         if filtered:
             self.client_combo.current(0)
@@ -741,10 +862,7 @@ class LoanForm(tk.Toplevel):
             messagebox.showinfo("Info", "Mostrando todos los clientes")
             return
 
-        filtered_list = [
-            name for name in self.all_client_names 
-            if search_term in name.lower()
-        ]
+        filtered_list = _search_client_names(search_term, self.clients_data)
         
         if not filtered_list:
             messagebox.showwarning("Sin resultados", "No se encontraron clientes con ese criterio")
@@ -1022,6 +1140,7 @@ class LoanForm(tk.Toplevel):
                     INSERT INTO installments (loan_id, number, due_date, amount, status)
                     VALUES (?, ?, ?, ?, 'pending')
                 """, (loan_id, num, due, amt))
+            refresh_loan_balance(cursor, loan_id)
             
             # Log action
             user_id = self.parent.user_data.get('id') if hasattr(self.parent, 'user_data') else None
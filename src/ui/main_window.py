@@ -4,20 +4,15 @@ import tkinter.ttk as ttk
 from PIL import Image, ImageTk
 from ui.ui_utils import apply_styles, create_gradient_image, get_theme_colors, get_module_colors, get_module_icon, ModernButton
 from utils.settings_manager import get_setting
-from ui.notifications_window import NotificationsWindow
 from database import get_db_connection
 import threading
 import time
 from datetime import datetime
 from utils.notification_manager import generate_due_notifications
+from jobs.scheduler import runner_active
 
-from ui.clients_window import ClientsWindow
-from ui.loans_window import LoansWindow
-from ui.cash_window import CashWindow
-from ui.config_window import ConfigWindow
-from ui.calculator_window import CalculatorWindow
-from ui.analysis_window import AnalysisWindow
-from ui.database_window import DatabaseWindow
+# Module windows (and matplotlib, pandas, reportlab, tkcalendar behind them)
+# are imported by show_module the first time each one is opened
 
 
 class MainWindow(tk.Toplevel):
@@ -165,21 +160,28 @@ class MainWindow(tk.Toplevel):
 
     def show_module(self, module_name):
         if module_name == "Clientes":
+            from ui.clients_window import ClientsWindow
             ClientsWindow(self)
         elif module_name == "Préstamos":
             from ui.loans_menu_window import LoansMenuWindow
             LoansMenuWindow(self, self.user_data)
         elif module_name == "Caja":
+            from ui.cash_window import CashWindow
             CashWindow(self, self.user_data)
         elif module_name == "Configuración":
+            from ui.config_window import ConfigWindow
             ConfigWindow(self, self.user_data)
         elif module_name == "Base de Datos":
+            from ui.database_window import DatabaseWindow
             DatabaseWindow(self)
         elif module_name == "Calculadora":
+            from ui.calculator_window import CalculatorWindow
             CalculatorWindow(self)
         elif module_name == "Análisis":
+            from ui.analysis_window import AnalysisWindow
             AnalysisWindow(self)
         elif module_name == "Notificaciones":
+            from ui.notifications_window import NotificationsWindow
             NotificationsWindow(self, self.user_data)
         elif module_name == "Documentos":
             from ui.documents_menu_window import DocumentsMenuWindow
@@ -215,9 +217,10 @@ class MainWindow(tk.Toplevel):
 
 
     def check_notifications(self):
-        # Generate due notifications first
+        # Generate due notifications first (unless python -m src.jobs is doing it)
         try:
-            generate_due_notifications(self.user_data.get('id'))
+            if not runner_active():
+                generate_due_notifications(self.user_data.get('id'))
         except Exception as e:
             print(f"Error generating automatic notifications: {e}")
 
@@ -105,3 +105,10 @@ class ModernWindow(tk.Toplevel):
             card.config(width=width, height=height)
             card.pack_propagate(False)
         return card
+    
+    def create_loading_indicator(self, parent):
+        """Crea el label donde TaskRunner muestra el indicador de carga."""
+        label = tk.Label(parent, text="", font=("Segoe UI", 10, "italic"),
+                         fg=self.text_color, bg=parent.cget('bg'))
+        label.pack(side=tk.RIGHT, padx=15)
+        return label
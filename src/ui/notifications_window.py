@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from ui.modern_window import ModernWindow
 from database import get_db_connection
+from utils.client_search import search_clients
 from utils.pdf_generator import PDFGenerator
 from datetime import datetime
 import os
@@ -140,19 +141,8 @@ class NotificationsWindow(ModernWindow):
         self.tree_loans.delete(*self.tree_loans.get_children())
         self.clear_preview()
             
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Search clients
-        sql = """
-            SELECT id, dni, first_name, last_name 
-            FROM clients 
-            WHERE first_name LIKE ? OR last_name LIKE ? OR dni LIKE ?
-        """
-        param = f"%{query}%"
-        cursor.execute(sql, (param, param, param))
-        rows = cursor.fetchall()
-        conn.close()
+        # Search clients (best matches first)
+        rows = search_clients(query, limit=50)
         
         for row in rows:
             self.tree_clients.insert('', 'end', values=(row['id'], row['dni'], f"{row['first_name']} {row['last_name']}"))
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from ui.modern_window import ModernWindow
 from database import get_db_connection
+from utils.client_search import client_filter
 from utils.pdf_generator import PDFGenerator
 from utils.number_to_text import numero_a_letras
 from tkcalendar import DateEntry
@@ -141,15 +142,15 @@ class RapidiarioContractWindow(ModernWindow):
         cursor = conn.cursor()
         
         # Filter clients who have at least one 'rapidiario' loan
+        where, params = client_filter(query, 'c')
         sql = """
             SELECT DISTINCT c.id, c.dni, c.first_name, c.last_name 
             FROM clients c
             JOIN loans l ON c.id = l.client_id
-            WHERE (c.first_name LIKE ? OR c.last_name LIKE ? OR c.dni LIKE ?)
+            WHERE {where}
             AND l.loan_type = 'rapidiario'
         """
-        param = f"%{query}%"
-        cursor.execute(sql, (param, param, param))
+        cursor.execute(sql.format(where=where), params)
         rows = cursor.fetchall()
         conn.close()
         
@@ -0,0 +1,171 @@
+"""
+Task Executor - Ejecuta consultas y cálculos fuera del hilo de Tkinter.
+
+Tkinter sólo puede tocarse desde el hilo principal, así que las ventanas no
+pueden consultar la base de datos en un hilo y dibujar el resultado desde ese
+mismo hilo. Aquí las tareas corren en un pool de hilos compartido y dejan su
+resultado en una cola; la ventana revisa la cola con after() y llama al
+callback de dibujo en el hilo principal.
+
+Cada tarea tiene una clave ('loans', 'transactions', ...). Al enviar una tarea
+nueva con la misma clave, la anterior se cancela si aún no empezó y, si ya
+estaba corriendo, su resultado se descarta al llegar: sólo se dibuja la
+respuesta a la última búsqueda.
+
+Uso:
+    self.tasks = TaskRunner(self, indicator=lbl_loading)
+    self.tasks.submit('loans', fetch_all, query, params, on_done=self.render_rows)
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import UI_WORKERS
+from database import get_db_connection
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_executor():
+    """Pool de hilos compartido por todas las ventanas (se crea al primer uso)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=UI_WORKERS, thread_name_prefix='ui-task')
+        return _pool
+
+
+def fetch_all(query, params=()):
+    """Ejecuta una consulta con una conexión del hilo actual y devuelve las filas."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+class TaskRunner:
+    """
+    Envía tareas al pool y entrega sus resultados en el hilo de Tkinter.
+
+    Mientras haya tareas pendientes se muestra el indicador de carga (si se
+    pasó uno) y el cursor de espera en la ventana.
+    """
+
+    LOADING_TEXT = "⏳ Cargando..."
+
+    def __init__(self, widget, indicator=None, poll_ms=50):
+        """
+        Args:
+            widget: Ventana dueña de las tareas (sus after() hacen el sondeo)
+            indicator: Label donde mostrar el texto de carga (opcional)
+            poll_ms: Intervalo de revisión de la cola de resultados
+        """
+        self.widget = widget
+        self.indicator = indicator
+        self.poll_ms = poll_ms
+        self._results = queue.Queue()
+        self._pending = {}   # clave -> (ticket, future, on_done, on_error)
+        self._tickets = {}   # clave -> último ticket emitido
+        self._poll_job = None
+        self._closed = False
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+
+    def submit(self, key, func, *args, on_done=None, on_error=None, **kwargs):
+        """
+        Ejecuta func(*args, **kwargs) en segundo plano.
+
+        on_done(resultado) u on_error(excepción) se llaman en el hilo de
+        Tkinter, sólo si la tarea sigue siendo la última enviada con esa clave.
+        """
+        if self._closed:
+            return
+
+        self.cancel(key)
+        ticket = self._tickets.get(key, 0) + 1
+        self._tickets[key] = ticket
+
+        def run():
+            try:
+                self._results.put((key, ticket, True, func(*args, **kwargs)))
+            except Exception as e:
+                self._results.put((key, ticket, False, e))
+
+        future = get_executor().submit(run)
+        self._pending[key] = (ticket, future, on_done, on_error)
+        self._set_busy(True)
+        if self._poll_job is None:
+            self._poll_job = self.widget.after(self.poll_ms, self._poll)
+
+    def cancel(self, key=None):
+        """Cancela la tarea de una clave (o todas). Su resultado se descarta."""
+        keys = [key] if key is not None else list(self._pending)
+        for k in keys:
+            pending = self._pending.pop(k, None)
+            if pending:
+                pending[1].cancel()  # Sólo tiene efecto si aún no empezó
+        if not self._pending:
+            self._set_busy(False)
+
+    def is_busy(self, key=None):
+        return key in self._pending if key is not None else bool(self._pending)
+
+    def _poll(self):
+        self._poll_job = None
+        if self._closed:
+            return
+
+        while True:
+            try:
+                key, ticket, ok, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            pending = self._pending.get(key)
+            if not pending or pending[0] != ticket:
+                continue  # Resultado de una petición ya reemplazada
+
+            del self._pending[key]
+            _, _, on_done, on_error = pending
+            try:
+                if ok:
+                    if on_done:
+                        on_done(value)
+                elif on_error:
+                    on_error(value)
+                else:
+                    print(f"Error en tarea '{key}': {value}")
+            except Exception as e:
+                print(f"Error mostrando resultado de '{key}': {e}")
+
+            if self._closed:
+                return
+
+        if self._pending:
+            self._poll_job = self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._set_busy(False)
+
+    def _set_busy(self, busy):
+        try:
+            self.widget.config(cursor='watch' if busy else '')
+            if self.indicator is not None:
+                self.indicator.config(text=self.LOADING_TEXT if busy else "")
+        except Exception:
+            pass  # Ventana ya destruida
+
+    def _on_destroy(self, event):
+        if event.widget is not self.widget:
+            return
+        self._closed = True
+        self.cancel()
+        if self._poll_job is not None:
+            try:
+                self.widget.after_cancel(self._poll_job)
+            except Exception:
+                pass
+            self._poll_job = None
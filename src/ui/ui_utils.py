@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
+from ui.task_executor import fetch_all
 
 class ScrollableFrame(tk.Frame):
     def __init__(self, container, *args, **kwargs):
@@ -375,3 +376,152 @@ class ModernButton(tk.Frame):
         new_rgb = tuple(min(255, int(c + (255 - c) * factor)) for c in rgb)
         return f'#{new_rgb[0]:02x}{new_rgb[1]:02x}{new_rgb[2]:02x}'
 
+
+class PagedTreeview:
+    """
+    Carga un Treeview por páginas a medida que el usuario hace scroll.
+
+    Usa paginación por clave (keyset): cada página pide las filas con clave
+    menor (o mayor) que la última mostrada, p. ej.
+        ... AND l.id < ? ORDER BY l.id DESC LIMIT 200
+    así el costo de cada página no crece con la cantidad ya cargada.
+
+    La consulta que recibe load() debe tener WHERE y no llevar ORDER BY ni
+    LIMIT; el paginador los agrega. Si se pasa un TaskRunner, las páginas se
+    consultan en segundo plano.
+    """
+
+    def __init__(self, tree, scrollbar, render_row, page_size=200, tasks=None,
+                 task_key='page', descending=True, prefetch=0.9):
+        """
+        Args:
+            tree: Treeview a llenar
+            scrollbar: Scrollbar vertical del Treeview
+            render_row: Función que inserta una fila en el Treeview
+            page_size: Filas por página
+            tasks: TaskRunner para consultar fuera del hilo de Tkinter (opcional)
+            task_key: Clave de las tareas en el TaskRunner
+            descending: Orden de la clave (True = más recientes primero)
+            prefetch: Fracción del scroll a partir de la cual se pide otra página
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.render_row = render_row
+        self.page_size = page_size
+        self.tasks = tasks
+        self.task_key = task_key
+        self.descending = descending
+        self.prefetch = prefetch
+
+        self._query = None
+        self._params = []
+        self._key_column = 'id'
+        self._key_field = 'id'
+        self._last_key = None
+        self._has_more = False
+        self._loading = False
+        self._fill_pending = False
+        self.loaded = 0
+
+        tree.configure(yscrollcommand=self._on_scroll)
+        # Una página que cabe entera en la vista no muestra scrollbar: al
+        # dibujarse o agrandarse el Treeview se revisa si hace falta otra
+        tree.bind('<Map>', self._schedule_fill, add='+')
+        tree.bind('<Configure>', self._schedule_fill, add='+')
+
+    def load(self, query, params=(), key_column='id', key_field=None):
+        """
+        Limpia el Treeview y carga la primera página de la consulta.
+
+        Args:
+            key_column: Columna de la clave en el SQL (p. ej. 'l.id')
+            key_field: Nombre de la clave en las filas (por defecto, key_column sin prefijo)
+        """
+        self._query = query
+        self._params = list(params)
+        self._key_column = key_column
+        self._key_field = key_field or key_column.split('.')[-1]
+        self._last_key = None
+        self._has_more = True
+        self._loading = False
+        self.loaded = 0
+
+        if self.tasks:
+            self.tasks.cancel(self.task_key)
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+
+        self.load_next_page()
+
+    def show(self, rows):
+        """Muestra una lista ya calculada (p. ej. resultados rankeados), sin paginar."""
+        self._query = None
+        self._has_more = False
+        self._loading = False
+        self.loaded = 0
+        if self.tasks:
+            self.tasks.cancel(self.task_key)
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        self._append(rows)
+
+    def load_next_page(self):
+        if self._loading or not self._has_more or self._query is None:
+            return
+
+        self._loading = True
+        query, params = self._page_query()
+        if self.tasks:
+            self.tasks.submit(self.task_key, fetch_all, query, params,
+                              on_done=self._append, on_error=self._on_error)
+        else:
+            try:
+                self._append(fetch_all(query, params))
+            except Exception as e:
+                self._on_error(e)
+
+    def _page_query(self):
+        query = self._query
+        params = list(self._params)
+        if self._last_key is not None:
+            query += f" AND {self._key_column} {'<' if self.descending else '>'} ?"
+            params.append(self._last_key)
+        query += f" ORDER BY {self._key_column} {'DESC' if self.descending else 'ASC'} LIMIT ?"
+        params.append(self.page_size)
+        return query, params
+
+    def _append(self, rows):
+        self._loading = False
+        for row in rows:
+            self.render_row(row)
+
+        if rows:
+            self._last_key = rows[-1][self._key_field]
+        self._has_more = len(rows) == self.page_size
+        self.loaded += len(rows)
+        if self._has_more:
+            self._schedule_fill()
+
+    def _on_error(self, error):
+        self._loading = False
+        self._has_more = False
+        print(f"Error cargando página: {error}")
+
+    def _schedule_fill(self, event=None):
+        if not self._fill_pending:
+            self._fill_pending = True
+            self.tree.after_idle(self._fill_view)
+
+    def _fill_view(self):
+        """Ya hecho el layout: si se ve hasta la última fila, pide la página siguiente."""
+        self._fill_pending = False
+        if not self.tree.winfo_exists() or not self.tree.winfo_ismapped():
+            return  # Sin dibujar, yview() siempre dice que se ve todo
+        if float(self.tree.yview()[1]) >= self.prefetch:
+            self.load_next_page()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Sólo tras un scroll real (first > 0): evita cargar todo con la ventana aún sin dibujar
+        if float(first) > 0 and float(last) >= self.prefetch:
+            self.load_next_page()
@@ -1,6 +1,7 @@
 import sqlite3
 from datetime import datetime, timedelta
 from database import get_db_connection
+from utils.client_search import client_filter
 import calendar
 
 class AnalyticsManager:
@@ -84,33 +85,26 @@ class AnalyticsManager:
         - Riesgoso (Naranja): Atraso > 15 días pero con pagos recientes (<30 días) o parciales.
         - Malo (Rojo): Atraso > 30 días sin pagos recientes.
         """
+        import numpy as np
+        import pandas as pd
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         
         # 1. Obtener todos los datos necesarios en memoria para no hacer queries en loop
-        # Clientes
         cursor.execute("SELECT id FROM clients")
         client_ids = [row['id'] for row in cursor.fetchall()]
         
-        # Préstamos
-        cursor.execute("SELECT id, client_id, status, frozen_date FROM loans")
-        loans = cursor.fetchall() # List of Row objects
-        
-        # Cuotas (Installments)
-        cursor.execute("SELECT id, loan_id, due_date, amount FROM installments")
-        installments = cursor.fetchall()
+        cursor.execute("SELECT id, client_id FROM loans")
+        loans = pd.DataFrame([[row['id'], row['client_id']] for row in cursor.fetchall()],
+                             columns=['loan_id', 'client_id'])
         
-        # Pagos (Transactions o Installments updates... el sistema guarda pagos en installments.payment_date y amount_paid)
-        # Pero para historia necesitamos saber CUANDO se pagó.
-        # La tabla installments tiene 'payment_date'.
-        # Si hay pagos parciales, installments solo guarda el ultimo payment_date?
-        # Revisemos schema: installments tiene `payment_date` y `paid_amount`.
-        # Asumiremos que `payment_date` es la fecha del pago (o del último pago parcial).
+        # La tabla installments tiene 'payment_date' (fecha del último pago, aun si fue parcial).
         # Esto es una limitación si hubo múltiples pagos parciales en fechas distintas para una misma cuota.
         # Pero servirá para la aproximación.
-        
-        cursor.execute("SELECT loan_id, due_date, payment_date, amount, paid_amount FROM installments")
-        all_installments = cursor.fetchall()
+        cols = ['loan_id', 'due_date', 'payment_date', 'amount', 'paid_amount']
+        cursor.execute(f"SELECT {', '.join(cols)} FROM installments")
+        installments = pd.DataFrame([[row[c] for c in cols] for row in cursor.fetchall()], columns=cols)
         
         conn.close()
         
@@ -135,94 +129,81 @@ class AnalyticsManager:
             'Malo': []
         }
         
+        # 2. Representación columnar: una fila por cuota, agrupada por préstamo
+        # Sólo cuentan préstamos de clientes existentes (igual que recorrer client_ids)
+        client_index = pd.Index(client_ids)
+        inst = installments.merge(loans, on='loan_id', how='inner')
+        inst = inst[client_index.get_indexer(inst['client_id']) >= 0]
+        
+        def _to_days(col):
+            # Fechas como días desde epoch (datetime64[D]); NaT si vacía
+            parsed = pd.to_datetime(col.astype('string').str[:10], format='%Y-%m-%d', errors='coerce')
+            return parsed.to_numpy(dtype='datetime64[D]')
+        
+        due = _to_days(inst['due_date'])
+        valid = ~np.isnat(due)
+        inst = inst[valid]
+        due = due[valid]
+        pay = _to_days(inst['payment_date'])
+        has_pay = ~np.isnat(pay)
+        fully_covered = (pd.to_numeric(inst['paid_amount'], errors='coerce') >=
+                         pd.to_numeric(inst['amount'], errors='coerce')).to_numpy()
+        
+        loan_code, loan_keys = pd.factorize(inst['loan_id'])
+        client_of_loan = pd.Series(inst['client_id'].to_numpy()).groupby(loan_code).first()
+        client_code = client_index.get_indexer(client_of_loan.to_numpy())
+        n_loans = len(loan_keys)
+        n_clients = len(client_ids)
+        
+        # Usaremos la fecha de la primera cuota como proxy de inicio del préstamo
+        first_due = np.full(n_loans, np.datetime64('NaT'), dtype='datetime64[D]')
+        if n_loans:
+            first_due = pd.Series(due).groupby(loan_code).min().to_numpy(dtype='datetime64[D]')
+        
         for cut_date in dates:
-            cut_date_str = cut_date.strftime("%Y-%m-%d")
+            cut = np.datetime64(cut_date, 'D')
             
-            counts = {'Bueno': 0, 'Regular': 0, 'Riesgoso': 0, 'Malo': 0}
+            # Cuota pagada por completo a la fecha de corte
+            paid_by_cut = has_pay & (pay <= cut) & fully_covered
             
-            for client_id in client_ids:
-                # Determinar estado del cliente en cut_date
-                client_loans = [l for l in loans if l['client_id'] == client_id]
-                
-                max_overdue_days = 0
-                last_payment_date = None
-                has_active_loans = False
-                
-                for loan in client_loans:
-                    # Ignorar préstamos creados después de cut_date (no tenemos created_at en loans, usamos start_date si existe o aprox con primera cuota)
-                    # Usaremos la fecha de la primera cuota como proxy de inicio
-                    loan_installments = [i for i in all_installments if i['loan_id'] == loan['id']]
-                    if not loan_installments: continue
-                    
-                    first_due = min(i['due_date'] for i in loan_installments)
-                    if first_due > cut_date_str: continue # Préstamo futuro
-                    
-                    # Verificar si el préstamo estaba activo/congelado en esa fecha
-                    # Si ya estaba pagado antes de cut_date, no cuenta como deuda activa
-                    # Chequear si todas las cuotas estaban pagadas antes de cut_date
-                    is_fully_paid = True
-                    for inst in loan_installments:
-                        if inst['payment_date'] and inst['payment_date'] <= cut_date_str:
-                            if inst['paid_amount'] >= inst['amount']:
-                                continue # Pagada
-                        is_fully_paid = False
-                        break
-                    
-                    if is_fully_paid: continue
-                    
-                    has_active_loans = True
-                    
-                    # Calcular atraso máximo en este préstamo a la fecha cut_date
-                    for inst in loan_installments:
-                        due = inst['due_date']
-                        if due <= cut_date_str:
-                            # Estaba vencida?
-                            is_paid_on_time = False
-                            if inst['payment_date'] and inst['payment_date'] <= cut_date_str:
-                                if inst['paid_amount'] >= inst['amount']:
-                                    is_paid_on_time = True
-                            
-                            if not is_paid_on_time:
-                                # Calcular días de atraso
-                                due_dt = datetime.strptime(due, "%Y-%m-%d").date()
-                                days = (cut_date - due_dt).days
-                                if days > max_overdue_days:
-                                    max_overdue_days = days
-                                    
-                        # Track last payment
-                        if inst['payment_date'] and inst['payment_date'] <= cut_date_str:
-                            pay_dt = datetime.strptime(inst['payment_date'], "%Y-%m-%d").date()
-                            if last_payment_date is None or pay_dt > last_payment_date:
-                                last_payment_date = pay_dt
-
-                if not has_active_loans:
-                    continue # Cliente inactivo en esa fecha (o sin deuda), no lo contamos o lo contamos como Bueno?
-                             # Generalmente calidad de cartera es sobre clientes con saldo.
-                
-                # Clasificar Cliente
-                category = 'Bueno'
-                days_since_payment = 9999
-                if last_payment_date:
-                    days_since_payment = (cut_date - last_payment_date).days
-                
-                if max_overdue_days > 30:
-                    if days_since_payment <= 30:
-                        category = 'Riesgoso' # Debe mucho pero pagó hace poco
-                    else:
-                        category = 'Malo' # Debe mucho y no paga
-                elif max_overdue_days > 15:
-                    category = 'Riesgoso'
-                elif max_overdue_days > 3:
-                    category = 'Regular'
-                else:
-                    category = 'Bueno'
-                
-                counts[category] += 1
+            # Préstamo activo: ya iniciado y con alguna cuota sin pagar a la fecha
+            unpaid_per_loan = np.bincount(loan_code, weights=(~paid_by_cut).astype(float), minlength=n_loans)
+            loan_active = (first_due <= cut) & (unpaid_per_loan > 0)
+            inst_active = loan_active[loan_code]
+            
+            # Atraso máximo por cliente
+            overdue = inst_active & (due <= cut) & ~paid_by_cut
+            overdue_days = np.where(overdue, (cut - due).astype(np.int64), 0)
+            inst_client = client_code[loan_code]
+            max_overdue_days = np.zeros(n_clients, dtype=np.int64)
+            np.maximum.at(max_overdue_days, inst_client, overdue_days)
             
-            history['Bueno'].append(counts['Bueno'])
-            history['Regular'].append(counts['Regular'])
-            history['Riesgoso'].append(counts['Riesgoso'])
-            history['Malo'].append(counts['Malo'])
+            # Último pago por cliente (sólo préstamos activos)
+            paid_mask = inst_active & has_pay & (pay <= cut)
+            pay_days = np.where(paid_mask, pay.astype(np.int64), np.iinfo(np.int64).min)
+            last_payment = np.full(n_clients, np.iinfo(np.int64).min, dtype=np.int64)
+            np.maximum.at(last_payment, inst_client, pay_days)
+            has_last_payment = last_payment > np.iinfo(np.int64).min
+            days_since_payment = np.where(has_last_payment, cut.astype(np.int64) - last_payment, 9999)
+            
+            # Clientes sin deuda a la fecha no cuentan (calidad de cartera es sobre clientes con saldo)
+            has_active_loans = np.zeros(n_clients, dtype=bool)
+            has_active_loans[client_code[loan_active]] = True
+            
+            # Clasificar Clientes
+            category = np.select(
+                [
+                    (max_overdue_days > 30) & (days_since_payment <= 30), # Debe mucho pero pagó hace poco
+                    max_overdue_days > 30,                                 # Debe mucho y no paga
+                    max_overdue_days > 15,
+                    max_overdue_days > 3,
+                ],
+                ['Riesgoso', 'Malo', 'Riesgoso', 'Regular'],
+                default='Bueno'
+            )[has_active_loans]
+            
+            for name in ('Bueno', 'Regular', 'Riesgoso', 'Malo'):
+                history[name].append(int(np.count_nonzero(category == name)))
             
         return history
 
@@ -393,43 +374,87 @@ class AnalyticsManager:
         """
         Calcula la utilidad total generada por un cliente específico.
         """
+        portfolio = self.get_client_portfolio(client_id=client_id)
+        return portfolio[0]['lifetime_value'] if portfolio else 0
+
+    def get_client_portfolio(self, search=None, client_id=None):
+        """
+        Resumen de cartera de todos los clientes (o de los que coinciden con la
+        búsqueda) en una sola consulta agrupada.
+        
+        La utilidad de cada préstamo es lo cobrado en cuotas por su margen:
+            - Congelado: (monto congelado - capital) / monto congelado
+            - Rapidiario: tasa / (100 + tasa)
+            - Otros: 15%
+        
+        Args:
+            search: Texto a buscar en nombre, apellido o DNI (opcional)
+            client_id: Limitar a un cliente (opcional)
+        
+        Returns:
+            list: dicts con id, dni, first_name, last_name, loans_count,
+                  active_loans, overdue_loans, total_debt, lifetime_value, rating
+        """
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Obtener todos los pagos del cliente
-        cursor.execute("""
-            SELECT i.paid_amount, l.loan_type, l.amount as capital, 
-                   l.interest_rate, l.status, l.frozen_amount
-            FROM installments i
-            JOIN loans l ON i.loan_id = l.id
-            WHERE l.client_id = ? AND i.paid_amount > 0
-        """, (client_id,))
+        query = """
+            SELECT c.id, c.dni, c.first_name, c.last_name,
+                   COUNT(lv.id) as loans_count,
+                   COALESCE(SUM(CASE WHEN lv.status = 'active' THEN 1 ELSE 0 END), 0) as active_loans,
+                   COALESCE(SUM(CASE WHEN lv.status = 'overdue' THEN 1 ELSE 0 END), 0) as overdue_loans,
+                   COALESCE(SUM(CASE WHEN lv.status = 'active' THEN lv.amount ELSE 0 END), 0) as total_debt,
+                   COALESCE(SUM(lv.profit), 0) as lifetime_value
+            FROM clients c
+            LEFT JOIN (
+                SELECT l.id, l.client_id, l.status, l.amount,
+                       (SELECT COALESCE(SUM(i.paid_amount), 0) FROM installments i
+                        WHERE i.loan_id = l.id AND i.paid_amount > 0) *
+                       CASE
+                           WHEN l.status = 'frozen' AND l.frozen_amount > 0
+                               THEN (l.frozen_amount - l.amount) / l.frozen_amount
+                           WHEN l.loan_type = 'rapidiario'
+                               THEN COALESCE(l.interest_rate / (100 + l.interest_rate), 0)
+                           ELSE 0.15
+                       END as profit
+                FROM loans l
+            ) lv ON lv.client_id = c.id
+            WHERE 1=1
+        """
+        params = []
+        if search:
+            where, where_params = client_filter(search, 'c')
+            query += f" AND {where}"
+            params.extend(where_params)
+        if client_id is not None:
+            query += " AND c.id = ?"
+            params.append(client_id)
+        query += " GROUP BY c.id, c.dni, c.first_name, c.last_name ORDER BY c.id"
         
-        payments = cursor.fetchall()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
         conn.close()
         
-        total_profit = 0
-        
-        for p in payments:
-            amount_paid = p['amount_paid']
-            loan_type = p['loan_type']
-            capital = p['capital']
+        portfolio = []
+        for row in rows:
+            client = dict(row)
+            client['total_debt'] = float(client['total_debt'])
+            client['lifetime_value'] = float(client['lifetime_value'])
+            client['rating'] = self._client_rating(client['loans_count'], client['overdue_loans'])
+            portfolio.append(client)
             
-            profit = 0
-            
-            if p['status'] == 'frozen' and p['frozen_amount'] and p['frozen_amount'] > 0:
-                margin = (p['frozen_amount'] - capital) / p['frozen_amount']
-                profit = amount_paid * margin
-            else:
-                if loan_type == 'rapidiario':
-                    rate = p['interest_rate']
-                    profit = amount_paid * (rate / (100 + rate))
-                else:
-                    profit = amount_paid * 0.15
-            
-            total_profit += profit
-            
-        return total_profit
+        return portfolio
+
+    @staticmethod
+    def _client_rating(loans_count, overdue_count):
+        """Calificación del cliente según su historial de préstamos."""
+        if loans_count == 0:
+            return "Nuevo"
+        if overdue_count > 0:
+            return "Moroso"
+        if loans_count > 2:
+            return "Buen Pagador"
+        return "Regular"
 
     def get_pawn_inventory(self):
         """
@@ -0,0 +1,355 @@
+"""
+Backup Archive - Copia de seguridad en NDJSON comprimido, escrita y leída por partes.
+
+El archivo (.ndjson.gz) es un JSON por línea:
+    {"format": "canguro-backup", "version": 2, "kind": "full", "chain": "...", "seq": 812, ...}
+    {"table": "clients", "columns": ["id", "dni", ...]}
+    [1, "12345678", ...]                           <- una línea por fila
+    {"end": "clients", "rows": 120, "sha256": "..."}
+    ...
+    {"manifest": {"kind": "full", "seq": 812, "tables": {"clients": {"rows": 120, "sha256": "..."}}}}
+
+Las filas se leen con fetchmany y se insertan con executemany en lotes de
+BATCH_SIZE, así ni la copia ni la restauración cargan la base completa en
+memoria. El sha256 de cada tabla cubre sus líneas de filas tal como están en
+el archivo; la restauración lo verifica y, si algo no cuadra o el archivo está
+cortado (sin manifiesto), deshace todo.
+
+Copias diferenciales (.diff.ndjson.gz): llevan sólo las filas anotadas en
+change_log (migración 0007) después de la copia anterior ("parent") y líneas
+{"deleted": tabla, "keys": [...]} con las filas eliminadas. Una cadena es una
+copia completa ("base") seguida de sus diferenciales; todas comparten "chain".
+Para restaurar se aplica la base y luego cada diferencial en orden.
+
+Los diferenciales son sólo del modo LOCAL: SQLite admite un escritor a la
+vez, así que cuando se lee MAX(seq) ya están confirmados todos los cambios
+anteriores. En PostgreSQL una transacción en curso puede confirmar un seq
+menor después de leído el máximo y el siguiente diferencial lo saltaría; en
+modo CLOUD todas las copias son completas (BackupManager._chain_parent).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from database import MODE
+from migrations import SCHEMA_VERSION
+
+FORMAT = 'canguro-backup'
+FORMAT_VERSION = 2
+EXTENSION = '.ndjson.gz'
+DIFF_EXTENSION = '.diff' + EXTENSION
+BATCH_SIZE = 1000
+KEY_CHUNK = 500  # Claves por consulta IN (...) (SQLite antiguo admite 999 parámetros)
+
+# Padres antes que hijos: se insertan en este orden y se vacían en el inverso
+TABLES = ['users', 'clients', 'cash_sessions', 'loans', 'pawn_details',
+          'installments', 'transactions', 'settings', 'audit_logs']
+
+# Clave primaria de las tablas que no usan id
+TABLE_KEYS = {'settings': 'key'}
+
+
+def table_key(table):
+    return TABLE_KEYS.get(table, 'id')
+
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):  # date / datetime
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _dump(record):
+    return json.dumps(record, default=_json_default, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def _schema_version(cursor):
+    try:
+        cursor.execute("SELECT version FROM schema_version WHERE component = 'schema'")
+        row = cursor.fetchone()
+        return row['version'] if row else 0
+    except Exception:
+        return 0
+
+
+def current_seq(cursor):
+    """Último cambio anotado en change_log (0 si no hay ninguno)."""
+    cursor.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log")
+    return cursor.fetchone()['seq']
+
+
+def _write_rows(f, table, columns, batches):
+    """Escribe una sección de tabla; batches genera listas de filas."""
+    f.write(_dump({'table': table, 'columns': columns}))
+    digest = hashlib.sha256()
+    count = 0
+    for rows in batches:
+        for row in rows:
+            line = _dump([row[c] for c in columns])
+            digest.update(line.encode('utf-8'))
+            f.write(line)
+        count += len(rows)
+
+    summary = {'rows': count, 'sha256': digest.hexdigest()}
+    f.write(_dump({'end': table, **summary}))
+    return summary
+
+
+def _fetch_batches(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _full_sections(f, conn, cursor, tables, batch_size, summaries):
+    for table in tables:
+        try:
+            cursor.execute(f"SELECT * FROM {table}")
+        except Exception as e:
+            print(f"Error backing up table {table}: {e}")
+            if MODE == 'CLOUD':
+                conn.rollback()  # La transacción quedó abortada
+            continue
+
+        columns = [d[0] for d in cursor.description]
+        summaries[table] = _write_rows(f, table, columns, _fetch_batches(cursor, batch_size))
+
+
+def _diff_sections(f, cursor, tables, since, seq, batch_size, summaries):
+    for table in tables:
+        key = table_key(table)
+        cursor.execute("""
+            SELECT DISTINCT row_key FROM change_log
+            WHERE table_name = ? AND seq > ? AND seq <= ?
+        """, (table, since, seq))
+        keys = [row['row_key'] for row in cursor.fetchall()]
+        if not keys:
+            continue
+        if key == 'id':
+            keys = [int(k) for k in keys]
+
+        # Filas cambiadas que todavía existen, por lotes de claves
+        found, columns, batches = set(), None, []
+        for start in range(0, len(keys), KEY_CHUNK):
+            chunk = keys[start:start + KEY_CHUNK]
+            cursor.execute(f"SELECT * FROM {table} WHERE {key} IN ({', '.join(['?'] * len(chunk))})", chunk)
+            rows = cursor.fetchall()
+            if rows:
+                columns = [d[0] for d in cursor.description]
+                found.update(row[key] for row in rows)
+                batches.append(rows)
+
+        summary = {'rows': 0}
+        if columns:
+            summary = _write_rows(f, table, columns, batches)
+
+        deleted = [k for k in keys if k not in found]
+        for start in range(0, len(deleted), batch_size):
+            f.write(_dump({'deleted': table, 'keys': deleted[start:start + batch_size]}))
+        summary['deleted'] = len(deleted)
+        summaries[table] = summary
+
+
+def write_archive(conn, path, tables=TABLES, batch_size=BATCH_SIZE, parent=None):
+    """
+    Escribe una copia completa o, si se indica parent, diferencial.
+
+    Args:
+        parent: Manifiesto de la copia anterior de la cadena más su nombre de
+            archivo en 'file'; sólo se escriben los cambios posteriores. No
+            se admite en modo CLOUD (ver el docstring del módulo)
+
+    Returns:
+        dict: Manifiesto (cabecera + {'tables': {tabla: {'rows', 'sha256'[, 'deleted']}}})
+    """
+    if parent and MODE == 'CLOUD':
+        raise ValueError("Las copias diferenciales sólo están disponibles en modo LOCAL.")
+    cursor = conn.cursor()
+    # Se fija antes de leer las filas: un cambio concurrente queda también en la siguiente copia
+    seq = current_seq(cursor)
+    header = {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'kind': 'diff' if parent else 'full',
+        'chain': parent['chain'] if parent else uuid.uuid4().hex,
+        'seq': seq,
+        'schema_version': _schema_version(cursor),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'tables': list(tables),
+    }
+    if parent:
+        header.update({
+            'base': parent.get('base') or parent['file'],
+            'parent': parent['file'],
+            'since_seq': parent['seq'],
+        })
+
+    summaries = {}
+    with gzip.open(path, 'wt', encoding='utf-8', newline='\n') as f:
+        f.write(_dump(header))
+        if parent:
+            _diff_sections(f, cursor, tables, parent['seq'], seq, batch_size, summaries)
+        else:
+            _full_sections(f, conn, cursor, tables, batch_size, summaries)
+
+        manifest = {**header, 'tables': summaries}
+        f.write(_dump({'manifest': manifest}))
+
+    return manifest
+
+
+def read_header(path):
+    """Cabecera de una copia (sólo lee la primera línea)."""
+    with gzip.open(path, 'rt', encoding='utf-8', newline='\n') as f:
+        header = json.loads(f.readline() or 'null')
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise ValueError("El archivo no es una copia de seguridad válida.")
+    if header.get('version', 0) > FORMAT_VERSION:
+        raise ValueError("La copia usa un formato más nuevo que esta versión del sistema.")
+    header.setdefault('kind', 'full')  # Copias de la versión 1
+    return header
+
+
+def read_archive(path, batch_size=BATCH_SIZE):
+    """
+    Lee la copia por partes, verificando conteos y checksums de cada tabla.
+
+    Genera tuplas (evento, datos):
+        ('header', {...})                  cabecera del archivo
+        ('rows', (tabla, columnas, filas))  lote de hasta batch_size filas
+        ('deleted', (tabla, claves))        filas eliminadas (sólo diferenciales)
+        ('manifest', {...})                al final, sólo si todo cuadró
+
+    Raises:
+        ValueError: Archivo de otro formato, dañado o incompleto
+    """
+    header = read_header(path)
+    with gzip.open(path, 'rt', encoding='utf-8', newline='\n') as f:
+        f.readline()
+        yield 'header', header
+
+        table = columns = digest = None
+        batch, count = [], 0
+        deleted = {}
+        for line in f:
+            if line.startswith('['):
+                if table is None:
+                    raise ValueError("Fila fuera de una tabla: archivo dañado.")
+                digest.update(line.encode('utf-8'))
+                batch.append(json.loads(line))
+                count += 1
+                if len(batch) >= batch_size:
+                    yield 'rows', (table, columns, batch)
+                    batch = []
+                continue
+
+            record = json.loads(line)
+            if 'table' in record:
+                table, columns = record['table'], record['columns']
+                digest, count = hashlib.sha256(), 0
+            elif 'end' in record:
+                if record['end'] != table or record['rows'] != count or record['sha256'] != digest.hexdigest():
+                    raise ValueError(f"La tabla {record['end']} no coincide con su checksum: archivo dañado.")
+                if batch:
+                    yield 'rows', (table, columns, batch)
+                    batch = []
+                table = None
+            elif 'deleted' in record:
+                deleted[record['deleted']] = deleted.get(record['deleted'], 0) + len(record['keys'])
+                yield 'deleted', (record['deleted'], record['keys'])
+            elif 'manifest' in record:
+                manifest = record['manifest']
+                for name, summary in manifest['tables'].items():
+                    if summary.get('deleted', 0) != deleted.get(name, 0):
+                        raise ValueError(f"Faltan eliminaciones de la tabla {name}: archivo dañado.")
+                yield 'manifest', manifest
+                return
+
+    raise ValueError("La copia está incompleta (falta el manifiesto).")
+
+
+def _upsert_clause(table, columns):
+    """
+    ON CONFLICT de las filas de un diferencial: actualiza la fila en su lugar.
+    Borrarla antes fallaría por claves foráneas en PostgreSQL y, con ON DELETE
+    CASCADE, se llevaría sus hijas (p. ej. las cuotas de un préstamo).
+    """
+    key = table_key(table)
+    updates = [f"{c} = excluded.{c}" for c in columns if c != key]
+    if not updates:
+        return f" ON CONFLICT ({key}) DO NOTHING"
+    return f" ON CONFLICT ({key}) DO UPDATE SET {', '.join(updates)}"
+
+
+def restore_archive(conn, path, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Aplica una copia: la completa reemplaza el contenido de sus tablas; la
+    diferencial inserta o actualiza las filas que trae y elimina las que
+    vienen como eliminadas. No hace commit:
+    si read_archive detecta un problema la excepción sube y el llamador deshace.
+
+    on_batch: callback(tabla, filas) opcional tras cada lote insertado
+
+    Returns:
+        dict: Manifiesto de la copia aplicada
+    """
+    cursor = conn.cursor()
+    manifest = None
+    diff = False
+
+    for event, data in read_archive(path, batch_size):
+        if event == 'header':
+            if data.get('schema_version', 0) > SCHEMA_VERSION:
+                raise ValueError("La copia fue creada con una versión más nueva del sistema.")
+            diff = data['kind'] == 'diff'
+            if not diff:
+                for table in reversed(data['tables']):
+                    cursor.execute(f"DELETE FROM {table}")
+        elif event == 'rows':
+            table, columns, rows = data
+            query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join(['?'] * len(columns))})")
+            if diff:
+                query += _upsert_clause(table, columns)
+            cursor.executemany(query, rows)
+            if on_batch:
+                on_batch(table, len(rows))
+        elif event == 'deleted':
+            table, keys = data
+            cursor.executemany(f"DELETE FROM {table} WHERE {table_key(table)} = ?", [(k,) for k in keys])
+        else:
+            manifest = data
+
+    return manifest
+
+
+def resolve_chain(path):
+    """
+    Archivos a aplicar para restaurar path: su copia completa y, en orden,
+    los diferenciales hasta path inclusive (se buscan en la misma carpeta).
+
+    Raises:
+        ValueError: Falta un eslabón o pertenece a otra cadena
+    """
+    directory = os.path.dirname(path)
+    chain = [path]
+    header = read_header(path)
+    while header['kind'] == 'diff':
+        parent_path = os.path.join(directory, header['parent'])
+        if not os.path.exists(parent_path):
+            raise ValueError(f"Falta la copia {header['parent']} de la cadena.")
+        parent = read_header(parent_path)
+        if parent.get('chain') != header['chain']:
+            raise ValueError(f"La copia {header['parent']} pertenece a otra cadena.")
+        chain.insert(0, parent_path)
+        header = parent
+    return chain
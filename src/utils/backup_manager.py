@@ -1,8 +1,18 @@
 import shutil
 import os
 from datetime import datetime
+import sqlite3
 import threading
-from database import DB_PATH
+import time
+from config import BACKUP_SNAPSHOT_PAGES, BACKUP_MAX_CHAIN, BACKUP_KEEP_CHAINS, BACKUP_KEEP_PRE_RESTORE
+from database import DB_PATH, MODE, close_all_connections, connections_in_use
+from utils.excel_export import export_workbook
+from utils.settings_manager import invalidate_cache
+from utils.backup_archive import (EXTENSION, DIFF_EXTENSION, write_archive, restore_archive,
+                                  read_header, resolve_chain)
+
+# Startup and the headless worker must not export the same snapshot twice
+_export_lock = threading.Lock()
 
 class BackupManager:
     def __init__(self):
@@ -12,100 +22,241 @@ class BackupManager:
         # User path: c:\Users\pecha\OneDrive\Escritorio\google antigravity\plantilla casa de empeño y microcreditos
         # We can try to find a "Backups" folder in the project root if it's already in OneDrive
         self.cloud_backup_dir = os.path.join(self.project_root, 'backups', 'cloud') 
+        # Snapshots taken at exit, waiting for their archive/Excel export
+        self.pending_backup_dir = os.path.join(self.project_root, 'backups', 'pending')
         
         self._ensure_dirs()
 
     def _ensure_dirs(self):
         os.makedirs(self.local_backup_dir, exist_ok=True)
         os.makedirs(self.cloud_backup_dir, exist_ok=True)
+        os.makedirs(self.pending_backup_dir, exist_ok=True)
 
-    def create_backup(self, trigger='manual', run_async=True):
+    def create_backup(self, trigger='manual', run_async=True, full=False):
         """
-        Creates a backup of the database (JSON dump for Postgres and Excel for users).
+        Creates a backup of the database (gzip NDJSON archive, see
+        utils/backup_archive.py, and Excel for users).
         trigger: 'manual', 'auto', 'close'
+        full: start a new chain even if a differential backup is possible
+        Returns: with run_async=False, True if the backup was written and
+        False if it failed (the error is printed); None when run_async
         """
         def _backup_thread():
             try:
-                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                filename_json = f"backup_{trigger}_{timestamp}.json"
-                
-                # Fetch all data
                 from database import get_db_connection
                 conn = get_db_connection()
-                # conn.row_factory is already set in get_db_connection
-                cursor = conn.cursor()
-                
-                tables = ['users', 'clients', 'loans', 'pawn_details', 'transactions', 'cash_sessions', 'installments', 'settings', 'audit_logs']
-                backup_data = {}
-                
-                for table in tables:
-                    try:
-                        cursor.execute(f"SELECT * FROM {table}")
-                        rows = cursor.fetchall()
-                        # Convert rows to list of dicts (already dicts due to row_factory)
-                        # Handle datetime serialization
-                        serialized_rows = []
-                        for row in rows:
-                            new_row = {}
-                            # Convert sqlite3.Row to dict to use .items()
-                            row_dict = dict(row)
-                            for k, v in row_dict.items():
-                                if isinstance(v, datetime):
-                                    new_row[k] = v.isoformat()
-                                elif hasattr(v, 'isoformat'): # date
-                                    new_row[k] = v.isoformat()
-                                else:
-                                    new_row[k] = v
-                            serialized_rows.append(new_row)
-                        backup_data[table] = serialized_rows
-                    except Exception as e:
-                        print(f"Error backing up table {table}: {e}")
-                
-                conn.close()
-                
-                # Save to JSON
-                import json
-                local_path_json = os.path.join(self.local_backup_dir, filename_json)
-                with open(local_path_json, 'w', encoding='utf-8') as f:
-                    json.dump(backup_data, f, indent=2, ensure_ascii=False)
-                
-                print(f"Local JSON backup created: {local_path_json}")
-                
-                # Cloud Backup JSON
-                cloud_path_json = os.path.join(self.cloud_backup_dir, filename_json)
-                shutil.copy2(local_path_json, cloud_path_json)
-                print(f"Cloud JSON backup created: {cloud_path_json}")
-
-                # --- EXCEL BACKUP ---
-                # Generate Excel Backup (Synchronously within this thread)
-                # create_excel_backup usually returns the path
-                local_path_excel = self.create_excel_backup(trigger=trigger)
-                
-                if local_path_excel and os.path.exists(local_path_excel):
-                    filename_excel = os.path.basename(local_path_excel)
-                    cloud_path_excel = os.path.join(self.cloud_backup_dir, filename_excel)
-                    shutil.copy2(local_path_excel, cloud_path_excel)
-                    print(f"Cloud Excel backup created: {cloud_path_excel}")
-                
-                # Update last backup time
-                self._update_last_backup_time()
-                
-                # Cleanup old backups (keep last 30)
-                self._cleanup_old_backups(self.local_backup_dir, extension='.json')
-                self._cleanup_old_backups(self.cloud_backup_dir, extension='.json')
-                self._cleanup_old_backups(self.local_backup_dir, extension='.xlsx')
-                self._cleanup_old_backups(self.cloud_backup_dir, extension='.xlsx')
-                
+                try:
+                    self._export(conn, trigger, datetime.now(), full=full)
+                finally:
+                    conn.close()
+                return True
             except Exception as e:
                 print(f"Error creating backup: {e}")
                 import traceback
                 traceback.print_exc()
+                return False
 
         if run_async:
             # Run in separate thread to not block UI
             threading.Thread(target=_backup_thread, daemon=True).start()
         else:
-            _backup_thread()
+            return _backup_thread()
+
+    def _export(self, conn, trigger, when, full=False, state_conn=None, source_path=None):
+        """
+        Writes the archive from conn and copies it to the cloud folder. The
+        archive is a differential of the current chain when backup_state allows
+        it; full backups start a new chain and also get the Excel copy.
+        state_conn: live connection whose backup_state is updated (default conn)
+        source_path: SQLite file conn reads from, when it is not the live database
+        """
+        state = self._read_backup_state(conn)
+        parent = None if full else self._chain_parent(state)
+
+        timestamp = when.strftime("%Y-%m-%d_%H-%M-%S")
+        filename_archive = f"backup_{trigger}_{timestamp}{DIFF_EXTENSION if parent else EXTENSION}"
+        if os.path.exists(os.path.join(self.local_backup_dir, filename_archive)):
+            # Snapshots taken in the same second: keep both archives
+            filename_archive = filename_archive.replace(timestamp, when.strftime("%Y-%m-%d_%H-%M-%S-%f"), 1)
+        
+        # Stream every table (or only the changed rows) to a gzip NDJSON archive
+        local_path_archive = os.path.join(self.local_backup_dir, filename_archive)
+        manifest = write_archive(conn, local_path_archive, parent=parent)
+        
+        total_rows = sum(t['rows'] for t in manifest['tables'].values())
+        kind = "Differential" if parent else "Full"
+        print(f"{kind} local backup created: {local_path_archive} ({total_rows} rows)")
+        
+        # Cloud Backup
+        cloud_path_archive = os.path.join(self.cloud_backup_dir, filename_archive)
+        shutil.copy2(local_path_archive, cloud_path_archive)
+        print(f"Cloud backup created: {cloud_path_archive}")
+
+        # --- EXCEL BACKUP ---
+        # A full export for users; differentials only carry the changed rows
+        if not parent:
+            local_path_excel = self.create_excel_backup(trigger=trigger, source_path=source_path, when=when)
+            
+            if local_path_excel and os.path.exists(local_path_excel):
+                filename_excel = os.path.basename(local_path_excel)
+                cloud_path_excel = os.path.join(self.cloud_backup_dir, filename_excel)
+                shutil.copy2(local_path_excel, cloud_path_excel)
+                print(f"Cloud Excel backup created: {cloud_path_excel}")
+        
+        self._record_backup(state_conn or conn, state, manifest, filename_archive)
+
+        # Update last backup time
+        self._update_last_backup_time()
+        
+        # Cleanup old backups (whole chains for archives, last 30 Excel files)
+        self._cleanup_old_chains(self.local_backup_dir)
+        self._cleanup_old_chains(self.cloud_backup_dir)
+        self._cleanup_old_backups(self.local_backup_dir, extension='.xlsx')
+        self._cleanup_old_backups(self.cloud_backup_dir, extension='.xlsx')
+
+    def _read_backup_state(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT chain, seq, last_file, chain_length FROM backup_state WHERE id = 1")
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def _chain_parent(self, state):
+        """
+        Header of the last archive of the current chain (plus its 'file'), or
+        None when the next backup must be full: cloud mode (change_log seqs
+        can commit out of order on PostgreSQL, see utils/backup_archive.py),
+        no chain yet, chain too long, or the last archive is missing or does
+        not match backup_state.
+        """
+        if MODE == 'CLOUD':
+            return None
+        if not state or not state['chain'] or state['chain_length'] >= BACKUP_MAX_CHAIN:
+            return None
+
+        path = os.path.join(self.local_backup_dir, state['last_file'])
+        try:
+            header = read_header(path)
+        except (OSError, ValueError):
+            return None
+        if header.get('chain') != state['chain'] or header.get('seq') != state['seq']:
+            return None
+        return {**header, 'file': state['last_file']}
+
+    def _record_backup(self, conn, previous, manifest, filename):
+        """
+        Points backup_state at the new archive. If another backup moved the
+        chain meanwhile (e.g. a snapshot exported after the auto backup), the
+        state is left as is. Change log entries covered by a full backup are
+        no longer needed and are deleted.
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT last_file FROM backup_state WHERE id = 1")
+        row = cursor.fetchone()
+        if (row['last_file'] if row else None) != (previous['last_file'] if previous else None):
+            return
+
+        is_full = manifest['kind'] == 'full'
+        cursor.execute('''
+            INSERT INTO backup_state (id, chain, seq, last_file, chain_length)
+            VALUES (1, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET chain = excluded.chain, seq = excluded.seq,
+                last_file = excluded.last_file, chain_length = excluded.chain_length
+        ''', (manifest['chain'], manifest['seq'], filename,
+              0 if is_full else previous['chain_length'] + 1))
+        if is_full:
+            cursor.execute("DELETE FROM change_log WHERE seq <= ?", (manifest['seq'],))
+        conn.commit()
+
+    def _reset_backup_chain(self, cursor):
+        """After a restore the data no longer follows the chain: the next backup is full."""
+        cursor.execute("DELETE FROM change_log")
+        cursor.execute("DELETE FROM backup_state")
+
+    def _bump_settings_version(self, cursor):
+        """Settings were replaced without their triggers firing per row: other terminals must reload them."""
+        cursor.execute("UPDATE settings_version SET version = version + 1 WHERE id = 1")
+
+    def create_snapshot(self, trigger='close', progress=None, directory=None):
+        """
+        Copies the SQLite database into backups/pending with the online backup
+        API. It copies BACKUP_SNAPSHOT_PAGES pages per step and takes
+        milliseconds, so it is safe to run at exit; the archive and Excel
+        exports are produced later by export_pending_snapshots().
+
+        progress: optional callback(status, remaining, total) called after each step
+        directory: where to write the copy instead (it is then not exported)
+        Returns: snapshot path, or None in cloud mode (no local file to copy)
+        """
+        if MODE == 'CLOUD':
+            return None
+
+        # Microseconds: two snapshots in the same second (back-to-back
+        # pre_restore, for example) must not replace each other
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        path = os.path.join(directory or self.pending_backup_dir, f"snapshot_{trigger}_{timestamp}.db")
+        self.copy_database(path, progress)
+        print(f"Snapshot created: {path}")
+        return path
+
+    def copy_database(self, path, progress=None):
+        """
+        Consistent copy of the SQLite database to path with the online backup
+        API. Unlike copying the file, it includes transactions still in the
+        -wal file. The copy is written to path + '.part' and renamed once
+        complete.
+        """
+        part_path = path + '.part'
+        source = sqlite3.connect(DB_PATH)
+        target = sqlite3.connect(part_path)
+        try:
+            source.backup(target, pages=BACKUP_SNAPSHOT_PAGES, progress=progress)
+        finally:
+            target.close()
+            source.close()
+
+        # Only complete copies get the .db name export_pending_snapshots looks for
+        os.replace(part_path, path)
+        return path
+
+    def export_pending_snapshots(self, run_async=False):
+        """
+        Produces the archive and Excel backups of every snapshot left by
+        create_snapshot() and deletes each snapshot once exported.
+        Called on startup and by export_snapshots.py.
+        """
+        def _export_thread():
+            with _export_lock:
+                for name in sorted(os.listdir(self.pending_backup_dir)):
+                    path = os.path.join(self.pending_backup_dir, name)
+                    if name.endswith('.part'):
+                        os.remove(path)  # Interrupted snapshot
+                        continue
+                    if not (name.startswith('snapshot_') and name.endswith('.db')):
+                        continue
+
+                    try:
+                        # snapshot_<trigger>_<YYYY-MM-DD>_<HH-MM-SS>[-ffffff].db
+                        trigger, day, time_of_day = name[len('snapshot_'):-len('.db')].rsplit('_', 2)
+                        when = datetime.strptime(f"{day}_{time_of_day}",
+                                                 "%Y-%m-%d_%H-%M-%S-%f" if len(time_of_day) > 8 else "%Y-%m-%d_%H-%M-%S")
+
+                        from database import get_db_connection
+                        conn = sqlite3.connect(path)
+                        conn.row_factory = sqlite3.Row
+                        live_conn = get_db_connection()
+                        try:
+                            self._export(conn, trigger, when, state_conn=live_conn, source_path=path)
+                        finally:
+                            live_conn.close()
+                            conn.close()
+                        os.remove(path)
+                    except Exception as e:
+                        print(f"Error exporting snapshot {name}: {e}")
+
+        if run_async:
+            threading.Thread(target=_export_thread, daemon=True).start()
+        else:
+            _export_thread()
 
     def _update_last_backup_time(self):
         try:
@@ -115,14 +266,18 @@ class BackupManager:
         except Exception as e:
             print(f"Error updating last backup time: {e}")
 
-    def check_and_run_auto_backup(self):
-        """Checks if backup is needed (every 3 days) and runs it."""
+    def check_and_run_auto_backup(self, run_async=True):
+        """
+        Checks if backup is needed (every 3 days) and runs it.
+        run_async=False waits for the backup (scheduled jobs).
+        Returns: the create_backup result (True/False when waiting), or None
+        when no backup was due
+        """
         try:
             log_path = os.path.join(self.local_backup_dir, 'last_backup.txt')
             if not os.path.exists(log_path):
                 # First run or no backup yet
-                self.create_backup(trigger='auto')
-                return
+                return self.create_backup(trigger='auto', run_async=run_async)
 
             with open(log_path, 'r') as f:
                 last_backup_str = f.read().strip()
@@ -132,20 +287,20 @@ class BackupManager:
             
             if days_diff >= 3:
                 print(f"Last backup was {days_diff} days ago. Running auto backup...")
-                self.create_backup(trigger='auto')
+                return self.create_backup(trigger='auto', run_async=run_async)
             else:
                 print(f"Last backup was {days_diff} days ago. Skipping.")
                 
         except Exception as e:
             print(f"Error checking auto backup: {e}")
             # Fallback: try to backup if check fails
-            self.create_backup(trigger='auto')
+            return self.create_backup(trigger='auto', run_async=run_async)
 
     def get_available_backups(self):
         """Returns a list of available backup files in the local backup directory."""
         try:
             files = sorted(
-                [f for f in os.listdir(self.local_backup_dir) if f.endswith('.db') or f.endswith('.json') or f.endswith('.xlsx')],
+                [f for f in os.listdir(self.local_backup_dir) if f.endswith(('.db', '.json', EXTENSION, '.xlsx'))],
                 key=lambda x: os.path.getmtime(os.path.join(self.local_backup_dir, x)),
                 reverse=True
             )
@@ -154,11 +309,43 @@ class BackupManager:
             print(f"Error listing backups: {e}")
             return []
 
-    def restore_database(self, backup_filename):
+    def get_backup_chains(self):
+        """Returns {full archive: [its differential archives, oldest first]} for the local backups."""
+        chains = {}
+        try:
+            for name in os.listdir(self.local_backup_dir):
+                if not name.endswith(DIFF_EXTENSION):
+                    continue
+                try:
+                    header = read_header(os.path.join(self.local_backup_dir, name))
+                except (OSError, ValueError):
+                    continue
+                chains.setdefault(header['base'], []).append((header['seq'], name))
+        except Exception as e:
+            print(f"Error listing backup chains: {e}")
+        return {base: [name for _, name in sorted(diffs)] for base, diffs in chains.items()}
+
+    def get_backup_chain(self, backup_filename):
+        """Files a restore of backup_filename applies: its full archive, then each differential."""
+        path = os.path.join(self.local_backup_dir, backup_filename)
+        return [os.path.basename(p) for p in resolve_chain(path)]
+
+    def restore_database(self, backup_filename, progress=None):
         """
-        Restores the database from a backup file (.db, .json, or .xlsx).
+        Restores the database from a backup file (.db, .ndjson.gz, .json, or .xlsx).
+        In local mode the backup is loaded into a staging file and swapped in
+        (see utils/restore_engine.py); in cloud mode it is applied in place,
+        in one transaction.
+        progress: optional callback(fraction, message), local mode only
         Returns: (success, message)
         """
+        try:
+            return self._restore_database(backup_filename, progress)
+        finally:
+            # This process reloads its settings whatever the outcome
+            invalidate_cache()
+
+    def _restore_database(self, backup_filename, progress=None):
         try:
             if os.path.isabs(backup_filename):
                 source_path = backup_filename
@@ -168,32 +355,101 @@ class BackupManager:
             if not os.path.exists(source_path):
                 return False, f"Archivo no encontrado: {source_path}"
 
-            if source_path.endswith('.json'):
+            if MODE != 'CLOUD':
+                return self._restore_staged(source_path, progress)
+
+            if source_path.endswith(EXTENSION) or source_path.endswith('.json'):
                 return self.restore_from_json(source_path)
             elif source_path.endswith('.xlsx'):
                 return self.restore_from_excel(source_path)
             else:
                 # Default .db restore
+                close_all_connections()
                 shutil.copy2(source_path, DB_PATH)
                 print(f"Database restored from: {source_path}")
+                
+                # Older copies may predate recent schema migrations
+                from database import init_db, get_db_connection
+                init_db()
+                conn = get_db_connection()
+                try:
+                    cursor = conn.cursor()
+                    self._reset_backup_chain(cursor)
+                    self._bump_settings_version(cursor)
+                    conn.commit()
+                finally:
+                    conn.close()
                 return True, "Restauración exitosa desde DB."
         except Exception as e:
             print(f"Error restoring database: {e}")
             return False, str(e)
 
+    def _check_exclusive_access(self, wait=5.0):
+        """
+        Closes the idle pooled connections and raises RestoreError if
+        something could still write to the file being replaced: a running job
+        scheduler (another process) or a pooled connection still checked out
+        by another thread. Checked-out connections get `wait` seconds to be
+        returned.
+        """
+        from jobs.scheduler import runner_active
+        from utils.restore_engine import RestoreError
+
+        if runner_active():
+            raise RestoreError("El planificador de tareas (python -m src.jobs) está en ejecución. "
+                               "Deténgalo antes de restaurar.")
+        # After runner_active(): its own connection must not survive the swap
+        close_all_connections()
+        deadline = time.monotonic() + wait
+        while connections_in_use():
+            if time.monotonic() >= deadline:
+                raise RestoreError(f"Hay {connections_in_use()} conexiones a la base en uso. "
+                                   "Espere a que terminen las tareas en curso y vuelva a intentarlo.")
+            time.sleep(0.1)
+
+    def _restore_staged(self, source_path, progress=None):
+        from utils.restore_engine import restore, RestoreError
+
+        def before_swap():
+            # The current data stays available as a .db backup in the list
+            self.create_snapshot('pre_restore', directory=self.local_backup_dir)
+            self._cleanup_old_backups(self.local_backup_dir, keep=BACKUP_KEEP_PRE_RESTORE,
+                                      extension='.db', prefix='snapshot_pre_restore_')
+            self._check_exclusive_access()
+
+        try:
+            self._check_exclusive_access(wait=0)  # Fail before building the staging copy
+            result = restore(source_path, DB_PATH, before_swap=before_swap, progress=progress)
+        except (RestoreError, ValueError) as e:
+            print(f"Restore Error: {e}")
+            return False, str(e)
+
+        print(f"Database restored from: {source_path} ({result['seconds']:.1f} s)")
+        for table, rows in result['tables'].items():
+            print(f"  {table:<24}{rows:>9} filas")
+        message = "Restauración exitosa."
+        if result['warnings']:
+            message += "\n\nAdvertencias:\n" + "\n".join(result['warnings'])
+        return True, message
+
     def restore_from_json(self, json_path):
+        if json_path.endswith(EXTENSION):
+            return self._restore_from_archive(json_path)
+
+        # Legacy .json backups (single document, loaded whole)
         import json
         from database import get_db_connection
+        from utils.receivables_ledger import rebuild_loan_balances
         
+        conn = get_db_connection()
+        cursor = conn.cursor()
         try:
             with open(json_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                
-            conn = get_db_connection()
-            cursor = conn.cursor()
             
             # Disable FKs
-            cursor.execute("PRAGMA foreign_keys = OFF")
+            if MODE != 'CLOUD':
+                cursor.execute("PRAGMA foreign_keys = OFF")
             
             # Wipe and Load
             tables = data.keys()
@@ -214,109 +470,84 @@ class BackupManager:
                     values.append([row[c] for c in cols])
                     
                 cursor.executemany(query, values)
-                
+            
+            # Balances are derived data; recompute them from the restored rows
+            rebuild_loan_balances(cursor)
+            self._reset_backup_chain(cursor)
+            self._bump_settings_version(cursor)
             conn.commit()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            conn.close()
+            if MODE != 'CLOUD':
+                cursor.execute("PRAGMA foreign_keys = ON")
             print(f"Restored from JSON: {json_path}")
             return True, "Restauración exitosa desde JSON."
         except Exception as e:
+            conn.rollback()
             print(f"JSON Restore Error: {e}")
             return False, f"Error JSON: {str(e)}"
+        finally:
+            conn.close()
 
-    def create_excel_backup(self, trigger='manual'):
-        import pandas as pd
+    def _restore_from_archive(self, archive_path):
+        from database import get_db_connection
+        from utils.receivables_ledger import rebuild_loan_balances
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            # A differential needs its full archive and every differential before it
+            chain = resolve_chain(archive_path)
+
+            if MODE != 'CLOUD':
+                cursor.execute("PRAGMA foreign_keys = OFF")
+
+            for path in chain:
+                restore_archive(conn, path)
+
+            # Balances are derived data; recompute them from the restored rows
+            rebuild_loan_balances(cursor)
+            self._reset_backup_chain(cursor)
+            self._bump_settings_version(cursor)
+            conn.commit()
+            if MODE != 'CLOUD':
+                cursor.execute("PRAGMA foreign_keys = ON")
+
+            print(f"Restored from archive: {archive_path} ({len(chain)} file(s) applied)")
+            return True, "Restauración exitosa desde la copia de seguridad."
+        except Exception as e:
+            conn.rollback()
+            print(f"Archive Restore Error: {e}")
+            return False, f"Error en la copia: {str(e)}"
+        finally:
+            conn.close()
+
+    def create_excel_backup(self, trigger='manual', source_path=None, when=None):
+        """
+        Exports every table to Excel (see utils/excel_export.py).
+        source_path: SQLite file to read from (e.g. a snapshot); by default the live database
+        when: timestamp for the file name; by default now
+        """
         from database import get_db_connection
         
         try:
             # Format: Copia de Seguridad El Canguro v2.1 [YYYY-MM-DD] [HH-MM-SS].xlsx
             version = "v2.1"
-            date_str = datetime.now().strftime("[%Y-%m-%d] [%H-%M-%S]")
+            date_str = (when or datetime.now()).strftime("[%Y-%m-%d] [%H-%M-%S]")
             filename = f"Copia de Seguridad El Canguro {version} {date_str}.xlsx"
             local_path = os.path.join(self.local_backup_dir, filename)
             
-            conn = get_db_connection()
-            
-            # Spanish Translations
-            table_map = {
-                'clients': 'Clientes',
-                'loans': 'Préstamos',
-                'installments': 'Cuotas',
-                'transactions': 'Transacciones',
-                'calc_history': 'Historial Calculadora', # if exists
-                'cash_sessions': 'Sesiones de Caja',
-                'pawn_details': 'Detalles de Empeño',
-                'users': 'Usuarios',
-                'settings': 'Configuración',
-                'audit_logs': 'Registros Auditoría',
-                'manual_receivables': 'Deudas Manuales',
-                'notifications': 'Notificaciones'
-            }
-            
-            col_map = {
-                'id': 'ID',
-                'dni': 'DNI',
-                'first_name': 'Nombres',
-                'last_name': 'Apellidos',
-                'phone': 'Teléfono',
-                'address': 'Dirección',
-                'email': 'Email',
-                'client_id': 'ID Cliente',
-                'loan_type': 'Tipo Préstamo',
-                'amount': 'Monto',
-                'interest_rate': 'Tasa Interés',
-                'start_date': 'Fecha Inicio',
-                'due_date': 'Fecha Vencimiento',
-                'status': 'Estado',
-                'loan_id': 'ID Préstamo',
-                'number': 'Número Cuota',
-                'paid_amount': 'Monto Pagado',
-                'payment_date': 'Fecha Pago',
-                'type': 'Tipo',
-                'category': 'Categoría',
-                'description': 'Descripción',
-                'user_id': 'ID Usuario',
-                'username': 'Usuario',
-                'full_name': 'Nombre Completo',
-                'role': 'Rol',
-                'key': 'Clave',
-                'value': 'Valor',
-                'action': 'Acción',
-                'details': 'Detalles',
-                'timestamp': 'Fecha/Hora',
-                'item_type': 'Tipo Bien',
-                'brand': 'Marca',
-                'market_value': 'Valor Mercado',
-                'condition': 'Condición',
-                'characteristics': 'Características',
-                'opening_balance': 'Saldo Inicial',
-                'closing_balance': 'Saldo Final',
-                'opening_date': 'Fecha Apertura',
-                'closing_date': 'Fecha Cierre'
-            }
-            
-            # Get all tables
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [r[0] for r in cursor.fetchall() if r[0] not in ('sqlite_sequence',)]
+            if source_path:
+                def connect():
+                    conn = sqlite3.connect(source_path)
+                    conn.row_factory = sqlite3.Row
+                    return conn
+            else:
+                connect = get_db_connection
             
-            with pd.ExcelWriter(local_path, engine='openpyxl') as writer:
-                for table in tables:
-                    df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-                    
-                    # Rename Columns
-                    df.rename(columns=col_map, inplace=True)
-                    
-                    # Rename Sheet
-                    sheet_name = table_map.get(table, table)
-                    
-                    # Truncate sheet name to 31 chars (Excel limit)
-                    sheet_name = sheet_name[:31]
-                    
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+            timings = export_workbook(local_path, connect)
             
-            conn.close()
             print(f"Excel backup created: {local_path}")
+            for t in timings:
+                print(f"  {t['table']:<24}{t['rows']:>9} filas {t['seconds']:>8.2f} s")
             
             self._update_last_backup_time()
             self._cleanup_old_backups(self.local_backup_dir, extension='.xlsx')
@@ -340,6 +571,7 @@ class BackupManager:
     def restore_from_excel(self, excel_path):
         import pandas as pd
         from database import get_db_connection
+        from utils.receivables_ledger import rebuild_loan_balances
         
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -370,6 +602,9 @@ class BackupManager:
                 # Insert data using custom method
                 df.to_sql(table_name, conn, if_exists='append', index=False, method=insert_on_conflict_replace)
             
+            rebuild_loan_balances(cursor)
+            self._reset_backup_chain(cursor)
+            self._bump_settings_version(cursor)
             conn.commit()
             cursor.execute("PRAGMA foreign_keys = ON")
             conn.close()
@@ -391,22 +626,55 @@ class BackupManager:
         """
         try:
             if os.path.exists(DB_PATH):
+                close_all_connections()
                 os.remove(DB_PATH)
+                # A leftover WAL must not be replayed into the new database
+                for suffix in ('-wal', '-shm'):
+                    if os.path.exists(DB_PATH + suffix):
+                        os.remove(DB_PATH + suffix)
                 print(f"Database file deleted: {DB_PATH}")
             
             # Re-initialize
             from database import init_db
             init_db()
+            invalidate_cache()
             print("Database re-initialized.")
             return True
         except Exception as e:
             print(f"Error resetting database: {e}")
             return False
 
-    def _cleanup_old_backups(self, directory, keep=30, extension='.db'):
+    def _cleanup_old_chains(self, directory, keep=BACKUP_KEEP_CHAINS):
+        """Removes the oldest archive chains (a full archive with its differentials) as a whole."""
+        try:
+            chains = {}
+            for name in os.listdir(directory):
+                if not name.endswith(EXTENSION):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    chain = read_header(path).get('chain') or name
+                except (OSError, ValueError):
+                    chain = name
+                chains.setdefault(chain, []).append(path)
+
+            ordered = sorted(chains.values(), key=lambda paths: max(os.path.getmtime(p) for p in paths))
+            for paths in ordered[:max(len(ordered) - keep, 0)]:
+                for path in paths:
+                    os.remove(path)
+                    print(f"Removed old backup: {path}")
+        except Exception as e:
+            print(f"Error cleaning up backups: {e}")
+
+    def _cleanup_old_backups(self, directory, keep=30, extension='.db', prefix=None):
+        """Keeps the newest `keep` files; prefix limits it to one kind (e.g. pre_restore snapshots)."""
         try:
+            if prefix:
+                names = [f for f in os.listdir(directory) if f.startswith(prefix) and f.endswith(extension)]
+            else:
+                names = [f for f in os.listdir(directory) if f.endswith(extension) or f.endswith('.json')]
             files = sorted(
-                [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(extension) or f.endswith('.json')],
+                [os.path.join(directory, f) for f in names],
                 key=os.path.getmtime
             )
             if len(files) > keep:
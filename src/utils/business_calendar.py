@@ -0,0 +1,220 @@
+"""
+Calendario de días hábiles - Lunes a sábado, sin feriados.
+
+Los cálculos de préstamos recorrían los días uno por uno con timedelta y
+weekday(). Aquí el calendario es un numpy.busdaycalendar (semana de lunes a
+sábado más los feriados) y, para el rango de fechas habitual, un arreglo
+precalculado con el número acumulado de días hábiles: contar los días hábiles
+entre dos fechas es una resta, también para miles de préstamos a la vez.
+
+Feriados:
+    - Nacionales del Perú (fijos, más Jueves y Viernes Santo). Se activan
+      con la configuración holidays_national = '1'; desactivados por defecto
+      para no cambiar los cronogramas sin que el usuario lo decida.
+    - Cierres propios: configuración holidays_custom, fechas AAAA-MM-DD
+      separadas por comas o espacios.
+
+Los vencimientos mensuales y semanales (roll_forward) solo se corren al
+siguiente día hábil cuando hay algún feriado configurado; sin feriados
+conservan el mismo día del mes o de la semana, aunque caiga en domingo.
+
+get_calendar() arma el calendario desde la configuración y lo reutiliza
+mientras no cambie (settings_manager ya cachea las lecturas).
+
+Fechas: se aceptan datetime.date o numpy.datetime64[D]; las funciones de una
+sola fecha devuelven datetime.date y las vectorizadas, arreglos datetime64[D].
+"""
+
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+WEEKMASK = '1111110'  # Lunes a sábado; el domingo nunca es hábil
+
+# (mes, día, nombre, vigente desde el año)
+NATIONAL_HOLIDAYS = [
+    (1, 1, 'Año Nuevo', None),
+    (5, 1, 'Día del Trabajo', None),
+    (6, 7, 'Batalla de Arica y Día de la Bandera', 2024),
+    (6, 29, 'San Pedro y San Pablo', None),
+    (7, 23, 'Día de la Fuerza Aérea del Perú', 2023),
+    (7, 28, 'Fiestas Patrias', None),
+    (7, 29, 'Fiestas Patrias', None),
+    (8, 6, 'Batalla de Junín', 2022),
+    (8, 30, 'Santa Rosa de Lima', None),
+    (10, 8, 'Combate de Angamos', None),
+    (11, 1, 'Día de Todos los Santos', None),
+    (12, 8, 'Inmaculada Concepción', None),
+    (12, 9, 'Batalla de Ayacucho', 2022),
+    (12, 25, 'Navidad', None),
+]
+
+# Rango de los feriados generados y del arreglo precalculado
+FIRST_YEAR = 2015
+LAST_YEAR = 2045
+
+
+def easter_sunday(year):
+    """Domingo de Pascua (algoritmo gregoriano anónimo)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def national_holidays(first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    """Feriados nacionales del Perú entre ambos años (inclusive), como [(fecha, nombre)]."""
+    holidays = []
+    for year in range(first_year, last_year + 1):
+        for month, day, name, since in NATIONAL_HOLIDAYS:
+            if since is None or year >= since:
+                holidays.append((date(year, month, day), name))
+        easter = easter_sunday(year)
+        holidays.append((easter - timedelta(days=3), 'Jueves Santo'))
+        holidays.append((easter - timedelta(days=2), 'Viernes Santo'))
+    return sorted(holidays)
+
+
+def parse_dates(text):
+    """Fechas AAAA-MM-DD separadas por comas o espacios; ignora las inválidas."""
+    dates = []
+    for token in (text or '').replace(',', ' ').split():
+        try:
+            dates.append(date.fromisoformat(token))
+        except ValueError:
+            print(f"Fecha de cierre inválida en la configuración: {token}")
+    return dates
+
+
+def _to_day(value):
+    return np.asarray(value, dtype='datetime64[D]')
+
+
+def _to_date(value):
+    return value.astype(date) if isinstance(value, np.datetime64) else value
+
+
+class BusinessCalendar:
+    """
+    Días hábiles (lunes a sábado menos los feriados dados).
+
+    roll_due_dates: si es False, roll_forward deja las fechas como están.
+    """
+
+    def __init__(self, holidays=(), roll_due_dates=True):
+        self.roll_due_dates = roll_due_dates
+        self.holidays = np.unique(np.array(list(holidays), dtype='datetime64[D]'))
+        self.calendar = np.busdaycalendar(weekmask=WEEKMASK, holidays=self.holidays)
+
+        # cumulative[i] = días hábiles en [_base, _base + i)
+        self._base = np.datetime64(f'{FIRST_YEAR}-01-01', 'D')
+        end = np.datetime64(f'{LAST_YEAR + 1}-01-01', 'D')
+        days = np.arange(self._base, end)
+        self._cumulative = np.concatenate(([0], np.cumsum(np.is_busday(days, busdaycal=self.calendar))))
+        self._base_ordinal = date(FIRST_YEAR, 1, 1).toordinal()
+        self._cumulative_list = self._cumulative.tolist()  # Acceso rápido para fechas sueltas
+
+    # --- Conteos -----------------------------------------------------------
+
+    def count(self, start, end):
+        """Días hábiles en [start, end). Acepta fechas sueltas o arreglos."""
+        if isinstance(start, date) and isinstance(end, date):
+            i = start.toordinal() - self._base_ordinal
+            j = end.toordinal() - self._base_ordinal
+            if 0 <= i <= j < len(self._cumulative_list):
+                return self._cumulative_list[j] - self._cumulative_list[i]
+        start, end = _to_day(start), _to_day(end)
+        i = (start - self._base).astype(np.int64)
+        j = (end - self._base).astype(np.int64)
+        limit = len(self._cumulative) - 1
+        if np.all((i >= 0) & (i <= limit) & (j >= 0) & (j <= limit)) and np.all(j >= i):
+            result = self._cumulative[j] - self._cumulative[i]
+        else:
+            result = np.busday_count(start, end, busdaycal=self.calendar)
+        return int(result) if np.ndim(result) == 0 else result
+
+    def is_business_day(self, day):
+        result = np.is_busday(_to_day(day), busdaycal=self.calendar)
+        return bool(result) if np.ndim(result) == 0 else result
+
+    # --- Fechas ------------------------------------------------------------
+
+    def business_days(self, start, end):
+        """Días hábiles en [start, end), como arreglo datetime64[D]."""
+        days = np.arange(_to_day(start), _to_day(end))
+        return days[np.is_busday(days, busdaycal=self.calendar)]
+
+    def roll_forward(self, day):
+        """La misma fecha si es hábil; si no, el siguiente día hábil."""
+        if not self.roll_due_dates:
+            result = _to_day(day)
+            return result.item() if np.ndim(result) == 0 else result
+        result = np.busday_offset(_to_day(day), 0, roll='forward', busdaycal=self.calendar)
+        return _to_date(result) if np.ndim(result) == 0 else result
+
+    def offset(self, day, n):
+        """n días hábiles después de day (day se lleva antes al día hábil siguiente)."""
+        result = np.busday_offset(_to_day(day), n, roll='forward', busdaycal=self.calendar)
+        return _to_date(result) if np.ndim(result) == 0 else result
+
+    def daily_due_dates(self, starts, days=30):
+        """
+        Cuotas diarias de muchos préstamos a la vez: los días hábiles de
+        (inicio, inicio + days] de cada uno.
+
+        Returns:
+            tuple: (fechas, hábil) arreglos (n, days); fila i = préstamo i,
+            hábil[i] marca las columnas que son cuota
+        """
+        starts = _to_day(starts).reshape(-1)
+        grid = starts[:, None] + np.arange(1, days + 1)
+        return grid, np.is_busday(grid, busdaycal=self.calendar)
+
+
+def add_months(start, months):
+    """
+    start más months meses, con el día recortado al último del mes (31 de
+    enero + 1 mes = 28/29 de febrero). Ambos se combinan como arreglos de
+    NumPy (p. ej. inicios[:, None] y arange(1, n + 1)). Devuelve datetime64[D].
+    """
+    start = _to_day(start)
+    months = np.asarray(months)
+    month_start = start.astype('datetime64[M]')
+    day_offset = start - month_start.astype('datetime64[D]')
+    target = month_start + months
+    last_days = (target + 1).astype('datetime64[D]') - np.timedelta64(1, 'D')
+    return np.minimum(target.astype('datetime64[D]') + day_offset, last_days)
+
+
+_lock = threading.Lock()
+_cached = None  # ((holidays_national, holidays_custom), BusinessCalendar)
+
+
+def get_calendar():
+    """Calendario según la configuración (nacionales y cierres propios)."""
+    global _cached
+    key = ('0', '')  # Sin base de datos (scripts, pruebas): sin feriados
+    try:
+        import database
+        if database.MODE == 'CLOUD' or os.path.exists(database.DB_PATH):
+            from utils.settings_manager import get_setting
+            key = (get_setting('holidays_national') or '0', get_setting('holidays_custom') or '')
+    except Exception as e:
+        print(f"No se pudo leer la configuración de feriados: {e}")
+
+    with _lock:
+        if _cached is None or _cached[0] != key:
+            holidays = [d for d, _ in national_holidays()] if key[0] == '1' else []
+            holidays += parse_dates(key[1])
+            # Sin feriados configurados los vencimientos no se mueven
+            _cached = (key, BusinessCalendar(holidays, roll_due_dates=bool(holidays)))
+        return _cached[1]
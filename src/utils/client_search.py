@@ -0,0 +1,94 @@
+"""
+Client Search - Búsqueda de clientes por DNI o nombre para todas las ventanas.
+
+Usa un índice mantenido por triggers (migración 0005):
+    - SQLite: tabla FTS5 clients_fts (tokenizer unicode61 sin tildes)
+    - PostgreSQL: columna clients.search_text con índice trigram (pg_trgm)
+
+Cada palabra buscada debe aparecer (como prefijo en SQLite, como fragmento en
+PostgreSQL), sin distinguir mayúsculas ni tildes: "jose per" encuentra a
+"José Pérez". search_clients() devuelve los resultados ordenados por
+relevancia; client_filter() da la condición SQL para combinarla con otras
+tablas (préstamos, contratos, etc.).
+"""
+
+import re
+
+from database import get_db_connection, MODE
+
+
+def _terms(text):
+    """Palabras de la búsqueda, sin signos de puntuación."""
+    return re.findall(r'\w+', text or '')
+
+
+def _fts_query(terms):
+    # Cada palabra entre comillas (escapa la sintaxis FTS5) y como prefijo;
+    # la coincidencia exacta suma dos veces y queda mejor rankeada
+    return ' AND '.join(f'("{term}" OR "{term}"*)' for term in terms)
+
+
+def client_filter(text, alias='clients'):
+    """
+    Condición SQL que limita a los clientes que coinciden con la búsqueda.
+
+    Args:
+        text: Texto buscado (DNI, nombres o apellidos)
+        alias: Nombre o alias de la tabla clients en la consulta
+
+    Returns:
+        tuple: (sql, params); sin palabras buscables devuelve ("1=1", [])
+    """
+    terms = _terms(text)
+    if not terms:
+        return "1=1", []
+
+    if MODE == 'CLOUD':
+        sql = ' AND '.join(f"{alias}.search_text LIKE lower(f_unaccent(?))" for _ in terms)
+        return f"({sql})", [f"%{term}%" for term in terms]
+
+    return (f"{alias}.id IN (SELECT rowid FROM clients_fts WHERE clients_fts MATCH ?)",
+            [_fts_query(terms)])
+
+
+def search_clients(text, limit=20, conn=None):
+    """
+    Busca clientes y los devuelve ordenados por relevancia.
+
+    Args:
+        text: Texto buscado (DNI, nombres o apellidos)
+        limit: Máximo de resultados
+        conn: Conexión a reutilizar (opcional)
+
+    Returns:
+        list: Filas completas de clients
+    """
+    terms = _terms(text)
+    if not terms:
+        return []
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        if MODE == 'CLOUD':
+            where, params = client_filter(text, 'c')
+            cursor.execute(f"""
+                SELECT c.* FROM clients c
+                WHERE {where}
+                ORDER BY similarity(c.search_text, lower(f_unaccent(?))) DESC, c.id
+                LIMIT ?
+            """, params + [' '.join(terms), limit])
+        else:
+            cursor.execute("""
+                SELECT c.* FROM clients_fts
+                JOIN clients c ON c.id = clients_fts.rowid
+                WHERE clients_fts MATCH ?
+                ORDER BY clients_fts.rank, c.id
+                LIMIT ?
+            """, (_fts_query(terms), limit))
+        return cursor.fetchall()
+    finally:
+        if own_conn:
+            conn.close()
@@ -0,0 +1,132 @@
+"""
+Hojas de Cobranza - Ruta diaria de cobro de cada analista.
+
+Una sola consulta agrupada recorre las cuotas pendientes que vencen hasta
+hoy (idx_installments_due_status) con su préstamo, cliente y analista, y
+devuelve una fila por préstamo ya ordenada por analista. Con eso se arma una
+hoja por analista que pdf_batch dibuja en varios procesos: un PDF
+(PDFGenerator.generate_collection_sheet) y una imagen para WhatsApp
+(ImageGenerator.generate_collection_sheet_image). El PDF y la imagen son
+documentos separados del lote para que se repartan entre los procesos: la
+imagen es la parte lenta (cada texto se dibuja con FreeType).
+
+El analista de la hoja es el del préstamo o, si no tiene, el del cliente;
+las cuotas sin ninguno van a la hoja "Sin analista".
+"""
+
+import os
+from datetime import date
+
+from database import get_db_connection
+
+UNASSIGNED = 'Sin analista'
+
+_DUE_QUERY = """
+    SELECT COALESCE(l.analyst_id, c.analyst_id) as analyst_id,
+           u.analyst_name, u.full_name, u.username, u.analyst_phone,
+           l.id as loan_id, l.loan_type,
+           c.first_name, c.last_name, c.dni, c.phone, c.address,
+           COUNT(*) as installments,
+           MIN(i.due_date) as oldest_due,
+           SUM(i.amount - COALESCE(i.paid_amount, 0)) as amount_due,
+           SUM(CASE WHEN i.due_date = ? THEN i.amount - COALESCE(i.paid_amount, 0) ELSE 0 END) as due_today
+    FROM installments i
+    JOIN loans l ON i.loan_id = l.id
+    JOIN clients c ON l.client_id = c.id
+    LEFT JOIN users u ON u.id = COALESCE(l.analyst_id, c.analyst_id)
+    WHERE i.status != 'paid' AND i.due_date <= ?
+      AND l.status IN ('active', 'overdue')
+    GROUP BY COALESCE(l.analyst_id, c.analyst_id), u.analyst_name, u.full_name, u.username, u.analyst_phone,
+             l.id, l.loan_type, c.first_name, c.last_name, c.dni, c.phone, c.address
+    ORDER BY COALESCE(l.analyst_id, c.analyst_id), MIN(i.due_date), c.last_name, c.first_name
+"""
+
+
+def build_sheets(day=None):
+    """
+    Hojas de cobranza del día, una por analista con cuotas por cobrar.
+
+    Returns:
+        list: dicts {'analyst_id', 'analyst_name', 'analyst_phone', 'date',
+              'rows', 'installments', 'total_today', 'total_due'}; cada fila
+              es un préstamo con sus cuotas vencidas o que vencen ese día
+    """
+    day = (day or date.today()).strftime('%Y-%m-%d')
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(_DUE_QUERY, (day, day))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    sheets = []
+    sheet = None
+    for row in rows:
+        if sheet is None or sheet['analyst_id'] != row['analyst_id']:
+            sheet = {
+                'analyst_id': row['analyst_id'],
+                'analyst_name': row['analyst_name'] or row['full_name'] or row['username'] or UNASSIGNED,
+                'analyst_phone': row['analyst_phone'] or '---',
+                'date': day,
+                'rows': [],
+                'installments': 0,
+                'total_today': 0.0,
+                'total_due': 0.0,
+            }
+            sheets.append(sheet)
+
+        amount_due = max(float(row['amount_due'] or 0), 0.0)
+        due_today = max(float(row['due_today'] or 0), 0.0)
+        sheet['rows'].append({
+            'loan_id': row['loan_id'],
+            'loan_type': row['loan_type'] or '',
+            'client_name': f"{row['first_name'] or ''} {row['last_name'] or ''}".strip(),
+            'dni': row['dni'] or '',
+            'phone': row['phone'] or '',
+            'address': row['address'] or '',
+            'installments': row['installments'],
+            'oldest_due': str(row['oldest_due'])[:10],  # DATE en PostgreSQL, texto en SQLite
+            'amount_due': amount_due,
+            'due_today': due_today,
+        })
+        sheet['installments'] += row['installments']
+        sheet['total_today'] += due_today
+        sheet['total_due'] += amount_due
+    return sheets
+
+
+def sheet_documents(sheets):
+    """Documentos de pdf_batch: el PDF y la imagen de cada hoja, en ese orden."""
+    documents = []
+    for sheet in sheets:
+        name = f"cobranza_{sheet['date']}_{sheet['analyst_id'] or 0}"
+        documents.append({'kind': 'collection_sheet', 'filename': f"{name}.pdf", 'data': {'sheet': sheet}})
+        documents.append({'kind': 'collection_image', 'filename': f"{name}.png", 'data': {'sheet': sheet}})
+    return documents
+
+
+def generate_collection_sheets(day=None, output_dir=None, workers=None, progress=None):
+    """
+    Genera las hojas de cobranza de todos los analistas.
+
+    Args:
+        day: fecha de cobro (hoy por defecto)
+        output_dir: carpeta destino (reports/cobranza/<fecha> por defecto)
+        workers, progress: como en pdf_batch.render_batch
+
+    Returns:
+        list: ruta del PDF y de la imagen de cada hoja (None si falló), en
+              orden de analista; vacía si no hay cuotas por cobrar
+    """
+    from utils.pdf_batch import render_batch
+
+    day = day or date.today()
+    sheets = build_sheets(day)
+    if not sheets:
+        return []
+    if output_dir is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        output_dir = os.path.join(project_root, 'reports', 'cobranza', day.strftime('%Y-%m-%d'))
+    return render_batch(sheet_documents(sheets), output_dir, workers=workers, progress=progress)
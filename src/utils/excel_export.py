@@ -0,0 +1,170 @@
+"""
+Excel Export - Exporta todas las tablas a un libro Excel sin cargarlas en memoria.
+
+Cada tabla va a una hoja write-only de openpyxl: las filas se leen con
+fetchmany y se escriben a medida que llegan, en lugar de armar un DataFrame
+por tabla. Las hojas se llenan en paralelo (EXCEL_WORKERS hilos, cada uno con
+su propia conexión) y el libro se guarda al final.
+
+Las tablas salen del catálogo del motor (sqlite_master o information_schema),
+así la exportación funciona tanto en modo LOCAL como CLOUD.
+"""
+
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from openpyxl import Workbook
+
+from config import EXCEL_WORKERS
+
+BATCH_SIZE = 1000
+
+# Tablas internas o derivadas que no se exportan (sqlite_* y clients_fts* se
+# filtran en la consulta); la restauración también las omite en libros antiguos
+EXCLUDED_TABLES = ('change_log', 'backup_state', 'settings_version',
+                   'scheduled_jobs', 'job_runs', 'job_runners',
+                   'loan_balances', 'schema_version')
+
+# Traducciones al español
+SHEET_NAMES = {
+    'clients': 'Clientes',
+    'loans': 'Préstamos',
+    'installments': 'Cuotas',
+    'transactions': 'Transacciones',
+    'calc_history': 'Historial Calculadora', # if exists
+    'cash_sessions': 'Sesiones de Caja',
+    'pawn_details': 'Detalles de Empeño',
+    'users': 'Usuarios',
+    'settings': 'Configuración',
+    'audit_logs': 'Registros Auditoría',
+    'manual_receivables': 'Deudas Manuales',
+    'notifications': 'Notificaciones'
+}
+
+COLUMN_NAMES = {
+    'id': 'ID',
+    'dni': 'DNI',
+    'first_name': 'Nombres',
+    'last_name': 'Apellidos',
+    'phone': 'Teléfono',
+    'address': 'Dirección',
+    'email': 'Email',
+    'client_id': 'ID Cliente',
+    'loan_type': 'Tipo Préstamo',
+    'amount': 'Monto',
+    'interest_rate': 'Tasa Interés',
+    'start_date': 'Fecha Inicio',
+    'due_date': 'Fecha Vencimiento',
+    'status': 'Estado',
+    'loan_id': 'ID Préstamo',
+    'number': 'Número Cuota',
+    'paid_amount': 'Monto Pagado',
+    'payment_date': 'Fecha Pago',
+    'type': 'Tipo',
+    'category': 'Categoría',
+    'description': 'Descripción',
+    'user_id': 'ID Usuario',
+    'username': 'Usuario',
+    'full_name': 'Nombre Completo',
+    'role': 'Rol',
+    'key': 'Clave',
+    'value': 'Valor',
+    'action': 'Acción',
+    'details': 'Detalles',
+    'timestamp': 'Fecha/Hora',
+    'item_type': 'Tipo Bien',
+    'brand': 'Marca',
+    'market_value': 'Valor Mercado',
+    'condition': 'Condición',
+    'characteristics': 'Características',
+    'opening_balance': 'Saldo Inicial',
+    'closing_balance': 'Saldo Final',
+    'opening_date': 'Fecha Apertura',
+    'closing_date': 'Fecha Cierre'
+}
+
+
+def list_tables(conn):
+    """Tablas a exportar, según el catálogo del motor de la conexión."""
+    cursor = conn.cursor()
+    if isinstance(conn, sqlite3.Connection):
+        # clients_fts* es el índice de búsqueda (tabla virtual + tablas internas)
+        cursor.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE 'clients_fts%'
+            ORDER BY rowid
+        """)
+    else:
+        cursor.execute("""
+            SELECT table_name AS name FROM information_schema.tables
+            WHERE table_schema = current_schema() AND table_type = 'BASE TABLE'
+            ORDER BY table_name
+        """)
+    return [row['name'] for row in cursor.fetchall() if row['name'] not in EXCLUDED_TABLES]
+
+
+def _cell(value):
+    # Fechas como texto ISO: las celdas sin estilo no tocan los estilos
+    # compartidos del libro, así varias hojas se llenan a la vez sin riesgo
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, memoryview)):
+        return None  # Binarios (fotos) no se exportan
+    return value
+
+
+def _write_sheet(ws, table, connect, batch_size):
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM {table}")
+        columns = [d[0] for d in cursor.description]
+        ws.append([COLUMN_NAMES.get(c, c) for c in columns])
+
+        count = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return count
+            for row in rows:
+                ws.append([_cell(row[c]) for c in columns])
+            count += len(rows)
+    finally:
+        conn.close()
+
+
+def export_workbook(path, connect, workers=EXCEL_WORKERS, batch_size=BATCH_SIZE):
+    """
+    Exporta todas las tablas a path.
+
+    Args:
+        connect: Función que abre una conexión (se llama una vez por hoja, en su hilo)
+
+    Returns:
+        list: [{'table', 'sheet', 'rows', 'seconds'}] en el orden de las hojas
+    """
+    conn = connect()
+    try:
+        tables = list_tables(conn)
+    finally:
+        conn.close()
+
+    wb = Workbook(write_only=True)
+    # Las hojas se crean en orden antes de repartirlas (límite de Excel: 31 caracteres)
+    sheets = [(table, wb.create_sheet(title=SHEET_NAMES.get(table, table)[:31])) for table in tables]
+
+    def export_sheet(item):
+        table, ws = item
+        start = time.perf_counter()
+        rows = _write_sheet(ws, table, connect, batch_size)
+        return {'table': table, 'sheet': ws.title, 'rows': rows, 'seconds': time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='excel') as pool:
+        timings = list(pool.map(export_sheet, sheets))
+
+    wb.save(path)
+    return timings
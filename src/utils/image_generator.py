@@ -2,7 +2,6 @@ from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
 import os
 import io
-import win32clipboard
 from utils.settings_manager import get_setting
 
 class ImageGenerator:
@@ -25,6 +24,8 @@ class ImageGenerator:
             self.font_bold_small = ImageFont.load_default()
             self.font_regular = ImageFont.load_default()
             self.font_small = ImageFont.load_default()
+        
+        self._text_masks = {}  # (text, font) -> rendered mask, see _paste_text
 
     def generate_simulation_image(self, simulation_data, schedule):
         """
@@ -137,6 +138,8 @@ class ImageGenerator:
         """
         Copies a PIL Image to the Windows clipboard.
         """
+        import win32clipboard
+
         output = io.BytesIO()
         image.convert("RGB").save(output, "BMP")
         data = output.getvalue()[14:]
@@ -247,3 +250,101 @@ class ImageGenerator:
         draw_centered_text("Gracias por su preferencia", self.font_small, y, color_grey)
         
         return img
+
+    def _paste_text(self, img, xy, text, font, color):
+        """
+        Same result as draw.text, but each (text, font) is rendered only once
+        and its mask pasted afterwards.
+        """
+        key = (text, id(font))
+        mask = self._text_masks.get(key)
+        if mask is None:
+            if len(self._text_masks) > 5000:
+                self._text_masks.clear()
+            _, _, right, bottom = font.getbbox(text)
+            mask = Image.new('L', (max(right, 1), max(bottom, 1)), 0)
+            ImageDraw.Draw(mask).text((0, 0), text, font=font, fill=255)
+            self._text_masks[key] = mask
+        x, y = xy
+        img.paste(color, (x, y, x + mask.width, y + mask.height), mask)
+
+    def generate_collection_sheet_image(self, sheet, company=None):
+        """
+        Generates the image version of an analyst's collection sheet
+        (to send by WhatsApp). sheet: dict from utils.collection_sheets.
+        company: load_company() data (read from settings when omitted)
+        Returns the PIL Image object.
+        """
+        width = 900
+        row_height = 32
+        rows = sheet['rows']
+        height = 170 + 40 + row_height * (len(rows) + 1) + 100
+        
+        img = Image.new('RGB', (width, height), color='white')
+        draw = ImageDraw.Draw(img)
+        
+        # Colors
+        color_primary = "#2196F3" # Blue, same as the PDF branding
+        color_text = "black"
+        color_white = "white"
+        color_grey = "#666666"
+        color_overdue = "#D32F2F"
+        
+        company_name = (company or {}).get('company_name') or get_setting('company_name') or "Mi Empresa"
+        day = datetime.strptime(sheet['date'], '%Y-%m-%d').strftime('%d/%m/%Y')
+        
+        def draw_centered_text(text, font, y, color):
+            bbox = draw.textbbox((0, 0), text, font=font)
+            text_width = bbox[2] - bbox[0]
+            x = (width - text_width) / 2
+            draw.text((x, y), text, font=font, fill=color)
+        
+        # --- Header ---
+        draw.rectangle([0, 0, width, 110], fill=color_primary)
+        draw_centered_text(company_name, self.font_bold_medium, 20, color_white)
+        draw_centered_text(f"HOJA DE COBRANZA - {day}", self.font_bold_small, 65, color_white)
+        
+        y = 130
+        draw.text((30, y), f"Analista: {sheet['analyst_name']}  |  Tel: {sheet['analyst_phone']}",
+                  font=self.font_bold_small, fill=color_text)
+        y += 30
+        draw.text((30, y), f"Clientes: {len(rows)}  |  Vence hoy: S/ {sheet['total_today']:,.2f}  |  "
+                  f"Total: S/ {sheet['total_due']:,.2f}", font=self.font_regular, fill=color_text)
+        y += 40
+        
+        # Table Header
+        columns = [(40, "N°"), (90, "Cliente"), (400, "Teléfono"), (560, "Desde"), (680, "Hoy"), (780, "Total")]
+        draw.rectangle([30, y, width-30, y+row_height], fill=color_primary)
+        for x, title in columns:
+            draw.text((x, y+6), title, font=self.font_bold_small, fill=color_white)
+        y += row_height
+        
+        # Rows
+        for i, row in enumerate(rows):
+            bg_color = "#f9f9f9" if i % 2 == 0 else "white"
+            draw.rectangle([30, y, width-30, y+row_height], fill=bg_color)
+            overdue = row['oldest_due'] < sheet['date']
+            
+            draw.text((90, y+6), (row['client_name'] or '')[:30], font=self.font_small, fill=color_text)
+            draw.text((400, y+6), (row['phone'] or '')[:14], font=self.font_small, fill=color_text)
+            # Numbers, dates and amounts repeat a lot: reuse their rendered text
+            self._paste_text(img, (40, y+6), str(i + 1), self.font_small, color_text)
+            self._paste_text(img, (560, y+6), datetime.strptime(row['oldest_due'], '%Y-%m-%d').strftime('%d/%m/%y'),
+                             self.font_small, color_overdue if overdue else color_text)
+            self._paste_text(img, (680, y+6), f"{row['due_today']:.2f}", self.font_small, color_text)
+            self._paste_text(img, (780, y+6), f"{row['amount_due']:.2f}", self.font_small, color_text)
+            
+            y += row_height
+        
+        y += 30
+        
+        # --- Footer ---
+        if company:
+            footer = f"{company.get('company_address', '')} | Tel: {company.get('company_phone', '')}"
+        else:
+            footer = f"{get_setting('company_address') or 'Dirección'} | Tel: {get_setting('company_phone') or '999 999 999'}"
+        draw_centered_text(footer, self.font_small, y, color_grey)
+        y += 20
+        draw_centered_text("Generado por Sistema El Canguro", self.font_small, y, color_grey)
+        
+        return img
@@ -4,79 +4,68 @@ Contiene la lógica de cálculo para los tres tipos de préstamos:
 - Rapidiario: 30 días excluyendo domingos
 - Casa de Empeño: 1 mes calendario
 - Préstamo Bancario: Cuotas mensuales con interés progresivo
+
+Los días hábiles (lunes a sábado sin feriados) vienen de
+utils/business_calendar.py; cada función acepta un calendario propio y, si no
+se indica, usa el de la configuración.
 """
 
 from datetime import datetime, timedelta, date
-import calendar
+
+import numpy as np
+
+from utils.business_calendar import get_calendar, add_months
 
 
-def calcular_dias_laborables(fecha_inicio, dias_totales=30):
+def calcular_dias_laborables(fecha_inicio, dias_totales=30, calendario=None):
     """
-    Calcula cuántos días laborables hay excluyendo domingos.
+    Calcula cuántos días laborables hay excluyendo domingos y feriados.
     
     Args:
         fecha_inicio: Fecha de inicio del préstamo (datetime.date)
         dias_totales: Número total de días del período (default: 30)
+        calendario: BusinessCalendar (default: get_calendar())
     
     Returns:
-        int: Número de días laborables (excluyendo domingos)
+        int: Número de días laborables en [fecha_inicio, fecha_inicio + dias_totales)
     """
-    dias_laborables = 0
-    fecha_actual = fecha_inicio
-    
-    for i in range(dias_totales):
-        # 6 = Domingo en Python (0=Lunes, 6=Domingo)
-        if fecha_actual.weekday() != 6:
-            dias_laborables += 1
-        fecha_actual += timedelta(days=1)
-    
-    return dias_laborables
+    calendario = calendario or get_calendar()
+    return calendario.count(fecha_inicio, fecha_inicio + timedelta(days=dias_totales))
 
 
-def calcular_vencimiento_rapidiario(fecha_inicio):
+def calcular_vencimiento_rapidiario(fecha_inicio, calendario=None):
     """
     Calcula la fecha de vencimiento para Rapidiario (30 días después).
     
     Args:
         fecha_inicio: Fecha de inicio del préstamo
+        calendario: BusinessCalendar (default: get_calendar())
     
     Returns:
         tuple: (fecha_vencimiento, dias_laborables)
     """
     fecha_vencimiento = fecha_inicio + timedelta(days=30)
-    dias_laborables = calcular_dias_laborables(fecha_inicio, 30)
+    dias_laborables = calcular_dias_laborables(fecha_inicio, 30, calendario)
     
     return fecha_vencimiento, dias_laborables
 
 
-def calcular_vencimiento_empeno(fecha_inicio):
+def calcular_vencimiento_empeno(fecha_inicio, calendario=None):
     """
     Calcula la fecha de vencimiento para Casa de Empeño.
     Retorna la misma fecha del mes siguiente.
     Maneja casos especiales (ej: 31 de enero → 28/29 de febrero)
+    Si esa fecha cae en domingo o feriado, vence el siguiente día hábil.
     
     Args:
         fecha_inicio: Fecha de inicio del préstamo
+        calendario: BusinessCalendar (default: get_calendar())
     
     Returns:
         date: Fecha de vencimiento (mismo día del mes siguiente)
     """
-    mes_siguiente = fecha_inicio.month + 1
-    año = fecha_inicio.year
-    
-    if mes_siguiente > 12:
-        mes_siguiente = 1
-        año += 1
-    
-    # Manejar días que no existen en el mes siguiente
-    try:
-        fecha_vencimiento = fecha_inicio.replace(month=mes_siguiente, year=año)
-    except ValueError:
-        # Si el día no existe, usar el último día del mes
-        ultimo_dia = calendar.monthrange(año, mes_siguiente)[1]
-        fecha_vencimiento = fecha_inicio.replace(day=ultimo_dia, month=mes_siguiente, year=año)
-    
-    return fecha_vencimiento
+    calendario = calendario or get_calendar()
+    return calendario.roll_forward(add_months(fecha_inicio, 1))
 
 
 def calcular_tasa_bancario(meses, tasa_base=10.0, incremento=1.0):
@@ -96,7 +85,7 @@ def calcular_tasa_bancario(meses, tasa_base=10.0, incremento=1.0):
     return tasa_mensual
 
 
-def calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia='Diario'):
+def calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia='Diario', calendario=None):
     """
     Calcula las cuotas para Rapidiario.
     
@@ -105,6 +94,7 @@ def calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia='Dia
         tasa_interes: Tasa de interés total (%)
         fecha_inicio: Fecha de inicio
         frecuencia: 'Diario' o 'Semanal'
+        calendario: BusinessCalendar (default: get_calendar())
     
     Returns:
         dict: {
@@ -116,7 +106,8 @@ def calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia='Dia
     """
     import math
     
-    fecha_vencimiento, dias_laborables = calcular_vencimiento_rapidiario(fecha_inicio)
+    calendario = calendario or get_calendar()
+    fecha_vencimiento, dias_laborables = calcular_vencimiento_rapidiario(fecha_inicio, calendario)
     
     # Calcular interés total
     total_interes = monto * (tasa_interes / 100)
@@ -125,21 +116,19 @@ def calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia='Dia
     cuotas = []
     
     if frecuencia == 'Diario':
-        # Dividir entre días laborables solamente
+        # Una cuota por día hábil de los 30 siguientes al inicio
+        fechas = calendario.business_days(fecha_inicio + timedelta(days=1),
+                                          fecha_inicio + timedelta(days=31))
+        # Dividir entre las cuotas que realmente se generan: [inicio, inicio+30)
+        # y (inicio, inicio+30] no siempre tienen los mismos días hábiles
+        dias_laborables = len(fechas)
         monto_por_cuota_exacto = total_pagar / dias_laborables
         
         # Redondear hacia arriba a múltiplos de 0.10
         monto_por_cuota = math.ceil(monto_por_cuota_exacto * 10) / 10
         
-        fecha_actual = fecha_inicio
-        numero_cuota = 1
-        
-        for i in range(30):
-            fecha_actual = fecha_inicio + timedelta(days=i+1)
-            # Solo agregar cuota si no es domingo
-            if fecha_actual.weekday() != 6:
-                cuotas.append((numero_cuota, fecha_actual, monto_por_cuota))
-                numero_cuota += 1
+        cuotas = [(numero, fecha, monto_por_cuota)
+                  for numero, fecha in enumerate(fechas.astype(date).tolist(), start=1)]
         
         # Ajustar última cuota para que el total sea exacto
         if cuotas:
@@ -157,9 +146,10 @@ def calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia='Dia
         # Redondear hacia arriba a múltiplos de 0.10
         monto_por_cuota = math.ceil(monto_por_cuota_exacto * 10) / 10
         
-        for i in range(1, num_cuotas + 1):
-            fecha_cuota = fecha_inicio + timedelta(weeks=i)
-            cuotas.append((i, fecha_cuota, monto_por_cuota))
+        # Cada 7 días; la que cae en domingo o feriado pasa al siguiente día hábil
+        fechas = calendario.roll_forward([fecha_inicio + timedelta(weeks=i) for i in range(1, num_cuotas + 1)])
+        cuotas = [(i, fecha, monto_por_cuota)
+                  for i, fecha in enumerate(fechas.astype(date).tolist(), start=1)]
         
         # Ajustar última cuota
         if cuotas:
@@ -178,7 +168,7 @@ def calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia='Dia
     }
 
 
-def calcular_cuota_empeno(monto, tasa_interes, fecha_inicio):
+def calcular_cuota_empeno(monto, tasa_interes, fecha_inicio, calendario=None):
     """
     Calcula la cuota para Casa de Empeño (pago único al mes siguiente).
     
@@ -186,6 +176,7 @@ def calcular_cuota_empeno(monto, tasa_interes, fecha_inicio):
         monto: Monto del préstamo
         tasa_interes: Tasa de interés mensual (%)
         fecha_inicio: Fecha de inicio
+        calendario: BusinessCalendar (default: get_calendar())
     
     Returns:
         dict: {
@@ -197,7 +188,7 @@ def calcular_cuota_empeno(monto, tasa_interes, fecha_inicio):
     """
     import math
     
-    fecha_vencimiento = calcular_vencimiento_empeno(fecha_inicio)
+    fecha_vencimiento = calcular_vencimiento_empeno(fecha_inicio, calendario)
     
     # Interés simple mensual
     total_interes = monto * (tasa_interes / 100)
@@ -216,7 +207,7 @@ def calcular_cuota_empeno(monto, tasa_interes, fecha_inicio):
     }
 
 
-def calcular_cuota_bancario(monto, meses, fecha_inicio, tasa_mensual=10.0):
+def calcular_cuota_bancario(monto, meses, fecha_inicio, tasa_mensual=10.0, calendario=None):
     """
     Calcula las cuotas para Préstamo Bancario Programado.
     El interés es mensual y se aplica sobre el monto total cada mes.
@@ -226,6 +217,7 @@ def calcular_cuota_bancario(monto, meses, fecha_inicio, tasa_mensual=10.0):
         meses: Número de meses
         fecha_inicio: Fecha de inicio
         tasa_mensual: Tasa de interés mensual (%) - la que ingresa el usuario
+        calendario: BusinessCalendar (default: get_calendar())
     
     Returns:
         dict: {
@@ -256,25 +248,12 @@ def calcular_cuota_bancario(monto, meses, fecha_inicio, tasa_mensual=10.0):
     total_interes = interes_mensual * meses
     total_pagar = monto + total_interes
     
-    # Generar cuotas
-    cuotas = []
-    for i in range(1, meses + 1):
-        # Calcular fecha de vencimiento (mismo día cada mes)
-        mes_cuota = fecha_inicio.month + i
-        año_cuota = fecha_inicio.year
-        
-        while mes_cuota > 12:
-            mes_cuota -= 12
-            año_cuota += 1
-        
-        try:
-            fecha_cuota = fecha_inicio.replace(month=mes_cuota, year=año_cuota)
-        except ValueError:
-            # Manejar días que no existen
-            ultimo_dia = calendar.monthrange(año_cuota, mes_cuota)[1]
-            fecha_cuota = fecha_inicio.replace(day=ultimo_dia, month=mes_cuota, year=año_cuota)
-        
-        cuotas.append((i, fecha_cuota, monto_por_cuota))
+    # Generar cuotas: mismo día cada mes (recortado al último día del mes),
+    # pasando al siguiente día hábil si cae en domingo o feriado
+    calendario = calendario or get_calendar()
+    fechas = calendario.roll_forward(add_months(fecha_inicio, range(1, meses + 1)))
+    cuotas = [(i, fecha, monto_por_cuota)
+              for i, fecha in enumerate(fechas.astype(date).tolist(), start=1)]
     
     # Ajustar última cuota para que el total sea exacto
     if cuotas:
@@ -306,21 +285,139 @@ def obtener_info_prestamo(tipo_prestamo, monto, tasa_interes, fecha_inicio, **kw
         **kwargs: Parámetros adicionales según el tipo
             - frecuencia: Para rapidiario ('Diario' o 'Semanal')
             - meses: Para bancario (número de meses)
+            - calendario: BusinessCalendar (default: get_calendar())
     
     Returns:
         dict: Información completa del préstamo
     """
+    calendario = kwargs.get('calendario')
     if tipo_prestamo == 'rapidiario':
         frecuencia = kwargs.get('frecuencia', 'Diario')
-        return calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia)
+        return calcular_cuota_rapidiario(monto, tasa_interes, fecha_inicio, frecuencia, calendario)
     
     elif tipo_prestamo == 'empeno':
-        return calcular_cuota_empeno(monto, tasa_interes, fecha_inicio)
+        return calcular_cuota_empeno(monto, tasa_interes, fecha_inicio, calendario)
     
     elif tipo_prestamo == 'bancario':
         meses = kwargs.get('meses', 3)
         # Usar la tasa de interés que ingresó el usuario como tasa mensual
-        return calcular_cuota_bancario(monto, meses, fecha_inicio, tasa_interes)
+        return calcular_cuota_bancario(monto, meses, fecha_inicio, tasa_interes, calendario)
     
     else:
         raise ValueError(f"Tipo de préstamo no válido: {tipo_prestamo}")
+
+
+# --- Cronogramas en lote ------------------------------------------------------
+
+def _redondear_decimos(valores):
+    """Hacia arriba a múltiplos de 0.10 (igual que math.ceil(x * 10) / 10)."""
+    return np.ceil(valores * 10) / 10
+
+
+def _ajustar_ultima(montos, validas, total_pagar):
+    """
+    Suma a la última cuota de cada fila la diferencia con total_pagar.
+    La suma es acumulativa de izquierda a derecha, como sum() en las
+    funciones de un préstamo, para dar exactamente los mismos decimales.
+    """
+    montos = np.where(validas, montos, 0.0)
+    suma = np.cumsum(montos, axis=1)[:, -1]
+    ultima = validas.shape[1] - 1 - np.argmax(validas[:, ::-1], axis=1)
+    filas = np.arange(len(montos))
+    montos[filas, ultima] = montos[filas, ultima] + (total_pagar - suma)
+    return montos
+
+
+def _filas(indices, fechas, montos, validas):
+    """Pasa una matriz (préstamo x cuota) a columnas, sólo las celdas válidas."""
+    numeros = np.cumsum(validas, axis=1)
+    prestamo = np.broadcast_to(indices[:, None], validas.shape)
+    return prestamo[validas], numeros[validas], fechas[validas], montos[validas]
+
+
+def calcular_cronogramas(tipos, montos, tasas, fechas_inicio, frecuencias=None, meses=None,
+                         calendario=None):
+    """
+    Cronogramas de muchos préstamos en una sola llamada, con NumPy.
+
+    Mismas reglas que obtener_info_prestamo (redondeo a 0.10 hacia arriba y
+    ajuste de la última cuota), pero agrupando los préstamos por tipo y
+    calculando cada grupo como matriz en lugar de préstamo por préstamo.
+
+    Args:
+        tipos: 'rapidiario' (o 'rapid'), 'empeno' o 'bancario' por préstamo
+        montos, tasas: Monto y tasa (%) por préstamo
+        fechas_inicio: datetime.date o datetime64[D] por préstamo
+        frecuencias: 'Diario' o 'Semanal' por préstamo (rapidiario; default 'Diario')
+        meses: Número de meses por préstamo (bancario; default 3)
+        calendario: BusinessCalendar (default: get_calendar())
+
+    Returns:
+        dict: Columnas del mismo largo, ordenadas por préstamo y número de cuota:
+            'prestamo' (posición del préstamo en los argumentos), 'numero',
+            'fecha' (datetime64[D]) y 'monto'
+    """
+    calendario = calendario or get_calendar()
+    tipos = np.asarray(tipos, dtype=object)
+    n = len(tipos)
+    montos = np.asarray(montos, dtype=float)
+    tasas = np.asarray(tasas, dtype=float)
+    inicios = np.asarray(fechas_inicio, dtype='datetime64[D]')
+    frecuencias = np.asarray(frecuencias if frecuencias is not None else ['Diario'] * n, dtype=object)
+    meses = np.asarray(meses if meses is not None else [3] * n, dtype=int)
+
+    desconocidos = set(tipos.tolist()) - {'rapid', 'rapidiario', 'empeno', 'bancario'}
+    if desconocidos:
+        raise ValueError(f"Tipo de préstamo no válido: {sorted(desconocidos)[0]}")
+
+    total_interes = montos * (tasas / 100)
+    total_pagar = montos + total_interes
+    partes = []
+
+    # Rapidiario diario: una cuota por día hábil de los 30 siguientes
+    grupo = np.flatnonzero(np.isin(tipos, ['rapid', 'rapidiario']) & (frecuencias != 'Semanal'))
+    if len(grupo):
+        fechas, validas = calendario.daily_due_dates(inicios[grupo], 30)
+        # Igual que calcular_cuota_rapidiario: entre las cuotas generadas
+        cuota = _redondear_decimos(total_pagar[grupo] / validas.sum(axis=1))
+        valores = _ajustar_ultima(np.repeat(cuota[:, None], 30, axis=1), validas, total_pagar[grupo])
+        partes.append(_filas(grupo, fechas, valores, validas))
+
+    # Rapidiario semanal: 4 cuotas cada 7 días
+    grupo = np.flatnonzero(np.isin(tipos, ['rapid', 'rapidiario']) & (frecuencias == 'Semanal'))
+    if len(grupo):
+        semanas = np.arange(1, 5) * np.timedelta64(7, 'D')
+        fechas = calendario.roll_forward(inicios[grupo][:, None] + semanas)
+        validas = np.ones(fechas.shape, dtype=bool)
+        cuota = _redondear_decimos(total_pagar[grupo] / 4)
+        valores = _ajustar_ultima(np.repeat(cuota[:, None], 4, axis=1), validas, total_pagar[grupo])
+        partes.append(_filas(grupo, fechas, valores, validas))
+
+    # Empeño: pago único al mes siguiente, redondeado (sin ajuste)
+    grupo = np.flatnonzero(tipos == 'empeno')
+    if len(grupo):
+        fechas = calendario.roll_forward(add_months(inicios[grupo], 1))[:, None]
+        valores = _redondear_decimos(total_pagar[grupo])[:, None]
+        partes.append(_filas(grupo, fechas, valores, np.ones(fechas.shape, dtype=bool)))
+
+    # Bancario: capital + interés sobre el monto total cada mes; un bloque por plazo
+    bancarios = tipos == 'bancario'
+    for plazo in np.unique(meses[bancarios]):
+        grupo = np.flatnonzero(bancarios & (meses == plazo))
+        interes_mensual = montos[grupo] * (tasas[grupo] / 100)
+        cuota = _redondear_decimos(montos[grupo] / plazo + interes_mensual)
+        total = montos[grupo] + interes_mensual * plazo
+        fechas = calendario.roll_forward(add_months(inicios[grupo][:, None], np.arange(1, plazo + 1)))
+        validas = np.ones(fechas.shape, dtype=bool)
+        valores = _ajustar_ultima(np.repeat(cuota[:, None], plazo, axis=1), validas, total)
+        partes.append(_filas(grupo, fechas, valores, validas))
+
+    if not partes:
+        return {'prestamo': np.array([], dtype=int), 'numero': np.array([], dtype=int),
+                'fecha': np.array([], dtype='datetime64[D]'), 'monto': np.array([], dtype=float)}
+
+    prestamo, numero, fecha, monto = (np.concatenate(columna) for columna in zip(*partes))
+    orden = np.lexsort((numero, prestamo))
+    return {'prestamo': prestamo[orden], 'numero': numero[orden],
+            'fecha': fecha[orden], 'monto': monto[orden]}
+
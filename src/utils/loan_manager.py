@@ -1,6 +1,7 @@
 import sqlite3
 from datetime import datetime, timedelta
 from database import get_db_connection, log_action
+from utils.receivables_ledger import refresh_loan_balance
 
 def get_loan_details(loan_id):
     conn = get_db_connection()
@@ -106,6 +107,7 @@ def refinance_rapidiario(loan_id, user_id):
             INSERT INTO installments (loan_id, number, due_date, amount, status)
             VALUES (?, ?, ?, ?, ?)
         """, (new_loan_id, 1, due_date, new_total_amount, 'pending'))
+        refresh_loan_balance(cursor, new_loan_id)
         
         conn.commit()
         log_action(user_id, "Refinanciar", f"Préstamo #{loan_id} refinanciado a #{new_loan_id}")
@@ -156,60 +158,182 @@ def freeze_loan(loan_id, user_id):
     finally:
         conn.close()
 
+# Reglas de congelamiento automático: (tipo, condición SQL, descripción).
+# Los parámetros de cada condición son fechas límite calculadas en Python,
+# así el mismo SQL sirve en SQLite (texto AAAA-MM-DD) y en PostgreSQL (DATE).
+FREEZE_RULES = [
+    ('rapidiario', "COALESCE(l.refinance_count, 0) >= 3 AND l.due_date < ?",
+     "3 refinanciamientos + vencido"),
+    ('empeno', "l.start_date < ?", "> 75 días desde inicio"),
+    ('bancario', "l.start_date < ?", "> 105 días desde inicio"),
+]
+
+# Deuda = capital + interés - cuotas pagadas (igual que calculate_total_debt);
+# rapidiario suma 5% de gastos administrativos (igual que freeze_loan)
+_FREEZE_SELECT = """
+    SELECT id, client_id, loan_type, debt,
+           CASE WHEN loan_type = 'rapidiario' THEN debt * 0.05 ELSE 0 END AS admin_fee
+    FROM (
+        SELECT l.id, l.client_id, l.loan_type,
+               CASE WHEN l.amount * (1 + COALESCE(l.interest_rate, 0) / 100.0) - COALESCE(p.paid, 0) > 0
+                    THEN l.amount * (1 + COALESCE(l.interest_rate, 0) / 100.0) - COALESCE(p.paid, 0)
+                    ELSE 0
+               END AS debt
+        FROM loans l
+        LEFT JOIN (
+            SELECT loan_id, SUM(amount) AS paid
+            FROM installments
+            WHERE status = 'paid'
+            GROUP BY loan_id
+        ) p ON p.loan_id = l.id
+        WHERE l.status IN ('active', 'overdue')
+          AND l.start_date IS NOT NULL
+          AND ({rules})
+    ) d
+    ORDER BY id
+"""
+
+
+def _freeze_cutoffs(today):
+    """Parámetros de FREEZE_RULES para la fecha dada, en el mismo orden."""
+    return {
+        'rapidiario': today.isoformat(),
+        'empeno': (today - timedelta(days=75)).isoformat(),
+        'bancario': (today - timedelta(days=105)).isoformat(),
+    }
+
+
+def find_loans_to_freeze(cursor, today=None):
+    """
+    Préstamos activos/vencidos que cumplen alguna regla de FREEZE_RULES, con su
+    monto congelado ya calculado, en una sola consulta.
+
+    Returns:
+        list: dicts con id, client_id, loan_type, debt, admin_fee y frozen_amount
+    """
+    today = today or datetime.now().date()
+    cutoffs = _freeze_cutoffs(today)
+    rules = " OR ".join(f"(l.loan_type = ? AND {condition})" for _, condition, _ in FREEZE_RULES)
+    params = []
+    for loan_type, _, _ in FREEZE_RULES:
+        params += [loan_type, cutoffs[loan_type]]
+
+    cursor.execute(_FREEZE_SELECT.format(rules=rules), params)
+    candidates = []
+    for row in cursor.fetchall():
+        debt = float(row['debt'] or 0)
+        admin_fee = float(row['admin_fee'] or 0)
+        candidates.append({
+            'id': row['id'],
+            'client_id': row['client_id'],
+            'loan_type': row['loan_type'],
+            'debt': debt,
+            'admin_fee': admin_fee,
+            'frozen_amount': debt + admin_fee,
+        })
+    return candidates
+
+
+def _group_by_type(loans):
+    by_type = {}
+    for loan in loans:
+        count, total = by_type.get(loan['loan_type'], (0, 0.0))
+        by_type[loan['loan_type']] = (count + 1, total + loan['frozen_amount'])
+    return by_type
+
+
+def freeze_overdue_loans(user_id, dry_run=False, today=None):
+    """
+    Congela en lote los préstamos que cumplen FREEZE_RULES.
+
+    Todas las actualizaciones y sus registros de auditoría van en una sola
+    transacción; un préstamo que dejó de estar activo o vencido entre la
+    consulta y su UPDATE no se congela, ni se audita ni se cuenta. Con
+    dry_run=True sólo arma el reporte, sin escribir nada.
+
+    Returns:
+        dict: {'date', 'dry_run', 'loans': [...], 'by_type': {tipo: (cantidad, total)},
+               'total', 'frozen'} - frozen es 0 en dry_run; sin dry_run,
+               loans, by_type y total son los de los préstamos congelados
+    """
+    today = today or datetime.now().date()
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        candidates = find_loans_to_freeze(cursor, today)
+
+        report = {
+            'date': today,
+            'dry_run': dry_run,
+            'loans': candidates,
+            'by_type': _group_by_type(candidates),
+            'total': sum(loan['frozen_amount'] for loan in candidates),
+            'frozen': 0,
+        }
+        if dry_run or not candidates:
+            return report
+
+        frozen_date = today.isoformat()
+        frozen = []
+        for loan in candidates:
+            # El filtro de estado evita pisar un préstamo pagado o refinanciado mientras tanto
+            cursor.execute("""
+                UPDATE loans
+                SET status = 'frozen',
+                    frozen_amount = ?,
+                    admin_fee = ?,
+                    frozen_date = ?
+                WHERE id = ? AND status IN ('active', 'overdue')
+            """, (loan['frozen_amount'], loan['admin_fee'], frozen_date, loan['id']))
+            if cursor.rowcount == 1:
+                log_action(user_id, "Congelar", f"Préstamo #{loan['id']} congelado. Monto: {loan['frozen_amount']:.2f}",
+                           conn=conn)
+                frozen.append(loan)
+
+        conn.commit()
+        # El reporte final sólo cuenta los que realmente se congelaron
+        report['loans'] = frozen
+        report['by_type'] = _group_by_type(frozen)
+        report['total'] = sum(loan['frozen_amount'] for loan in frozen)
+        report['frozen'] = len(frozen)
+        return report
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error al congelar préstamos: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def format_freeze_report(report):
+    """Resumen de freeze_overdue_loans en texto, para mostrar o imprimir."""
+    if not report['loans']:
+        return "No se encontraron préstamos para congelar."
+    lines = []
+    for loan_type, condition in ((t, d) for t, _, d in FREEZE_RULES):
+        count, total = report['by_type'].get(loan_type, (0, 0.0))
+        if count:
+            lines.append(f"- {loan_type.capitalize()} ({condition}): {count} préstamos, S/ {total:,.2f}")
+    lines.append("")
+    lines.append(f"Total: {len(report['loans'])} préstamos, S/ {report['total']:,.2f}")
+    return "\n".join(lines)
+
+
 def check_and_freeze_loans(user_id):
     """
     Revisa todos los préstamos activos/vencidos y los congela si cumplen las condiciones:
     - Rapidiario: 3 refinanciamientos y vencido
     - Empeño: > 75 días desde inicio (60 + 15)
     - Bancario: > 105 días desde inicio (90 + 15)
+
+    Returns:
+        int: Número de préstamos congelados
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get candidates
-    cursor.execute("SELECT * FROM loans WHERE status IN ('active', 'overdue')")
-    loans = cursor.fetchall()
-    conn.close()
-    
-    frozen_count = 0
-    today = datetime.now().date()
-    
-    for loan in loans:
-        should_freeze = False
-        
-        # Parse dates safely
-        try:
-            start_date = datetime.strptime(loan['start_date'], '%Y-%m-%d').date()
-        except:
-            continue # Skip invalid dates
-            
-        days_since_start = (today - start_date).days
-        
-        if loan['loan_type'] == 'rapidiario':
-            # Freeze if max refinances reached AND overdue
-            try:
-                due_date = datetime.strptime(loan['due_date'], '%Y-%m-%d').date()
-                if (loan['refinance_count'] or 0) >= 3 and today > due_date:
-                    should_freeze = True
-            except:
-                pass
-                
-        elif loan['loan_type'] == 'empeno':
-            # Freeze after 75 days (60 days term + 15 days grace)
-            if days_since_start > 75:
-                should_freeze = True
-                
-        elif loan['loan_type'] == 'bancario':
-            # Freeze after 105 days (90 days term + 15 days grace)
-            if days_since_start > 105:
-                should_freeze = True
-                
-        if should_freeze:
-            success, msg = freeze_loan(loan['id'], user_id)
-            if success:
-                frozen_count += 1
-                
-    return frozen_count
+    try:
+        return freeze_overdue_loans(user_id)['frozen']
+    except Exception:
+        return 0
 
 def execute_collateral(loan_id, sale_price, sales_expense, user_id):
     """
@@ -356,6 +480,7 @@ def create_legacy_frozen_loan(client_id, loan_type, amount, frozen_date, **kwarg
             INSERT INTO installments (loan_id, number, amount, due_date, status, amount_paid)
             VALUES (?, 1, ?, ?, 'pending', 0)
         """, (loan_id, frozen_amount, frozen_date))
+        refresh_loan_balance(cursor, loan_id)
         
         conn.commit()
         return True, f"Préstamo histórico registrado. ID: {loan_id}. Total Congelado: {frozen_amount:.2f}"
@@ -4,6 +4,7 @@ Handles payment processing, status updates, and installment tracking
 """
 
 from database import get_db_connection, log_action
+from utils.receivables_ledger import apply_payment, refresh_loan_balance
 from datetime import datetime
 
 def calculate_outstanding_balance(loan_id):
@@ -32,6 +33,19 @@ def calculate_outstanding_balance(loan_id):
         conn.close()
         return None
     
+    balance = _read_balance(cursor, loan)
+    conn.close()
+    
+    return balance
+
+
+def _read_balance(cursor, loan):
+    """
+    Lee el saldo de un préstamo usando el cursor (y la transacción) del llamador.
+    Usa dos consultas agregadas: pagos registrados y resumen de cuotas.
+    """
+    loan_id = loan['id']
+    
     # Calculate total paid from transactions
     cursor.execute("""
         SELECT COALESCE(SUM(amount), 0) as total_paid
@@ -41,34 +55,37 @@ def calculate_outstanding_balance(loan_id):
     result = cursor.fetchone()
     total_paid = float(result['total_paid'])
     
-    # Calculate interest based on loan type
-    loan_amount = float(loan['amount'])
-    interest_rate = float(loan['interest_rate']) if loan['interest_rate'] else 0
-    
     # For scheduled loans, check installments
     cursor.execute("""
         SELECT COUNT(*) as total, 
-               SUM(CASE WHEN status = 'paid' THEN 1 ELSE 0 END) as paid
+               SUM(CASE WHEN status = 'paid' THEN 1 ELSE 0 END) as paid,
+               COALESCE(SUM(amount), 0) as total_installments
         FROM installments
         WHERE loan_id = ?
     """, (loan_id,))
     installment_info = cursor.fetchone()
     
-    has_installments = installment_info and installment_info['total'] > 0
+    return _build_balance(
+        loan,
+        total_paid,
+        installment_info['total'] if installment_info else 0,
+        installment_info['paid'] if installment_info else 0,
+        float(installment_info['total_installments']) if installment_info else 0.0
+    )
+
+
+def _build_balance(loan, total_paid, installments_total, installments_paid, total_installments):
+    """Arma el diccionario de saldo a partir de los totales ya calculados."""
+    # Calculate interest based on loan type
+    loan_amount = float(loan['amount'])
+    interest_rate = float(loan['interest_rate']) if loan['interest_rate'] else 0
+    
+    has_installments = bool(installments_total) and installments_total > 0
     
     if has_installments:
         # For scheduled loans, total debt is sum of all installments
-        cursor.execute("""
-            SELECT COALESCE(SUM(amount), 0) as total_installments,
-                   COALESCE(SUM(paid_amount), 0) as paid_installments
-            FROM installments
-            WHERE loan_id = ?
-        """, (loan_id,))
-        inst_result = cursor.fetchone()
-        total_debt = float(inst_result['total_installments'])
+        total_debt = total_installments
         interest_amount = total_debt - loan_amount
-        installments_paid = installment_info['paid']
-        installments_total = installment_info['total']
     else:
         # For simple loans, calculate interest
         # Simplified: interest_amount = loan_amount * (interest_rate / 100)
@@ -79,8 +96,6 @@ def calculate_outstanding_balance(loan_id):
     
     balance = total_debt - total_paid
     
-    conn.close()
-    
     return {
         'total_debt': total_debt,
         'total_paid': total_paid,
@@ -145,16 +160,7 @@ def update_installment_payment(installment_id, amount, payment_method, payment_d
     
     installment_amount = float(installment['amount'])
     current_paid = float(installment['paid_amount']) if installment['paid_amount'] else 0
-    new_paid = current_paid + amount
-    
-    # Determine new status
-    if new_paid >= installment_amount:
-        new_status = 'paid'
-        new_paid = installment_amount  # Cap at installment amount
-    elif new_paid > 0:
-        new_status = 'partial'
-    else:
-        new_status = 'pending'
+    new_status, new_paid = _installment_status(installment_amount, current_paid + amount)
     
     # Update installment
     cursor.execute("""
@@ -169,16 +175,63 @@ def update_installment_payment(installment_id, amount, payment_method, payment_d
     return True
 
 
+def _installment_status(installment_amount, new_paid):
+    """Devuelve (estado, monto_pagado) de una cuota tras aplicar un pago."""
+    if new_paid >= installment_amount:
+        return 'paid', installment_amount  # Cap at installment amount
+    elif new_paid > 0:
+        return 'partial', new_paid
+    return 'pending', new_paid
+
+
+def allocate_installment_payment(installments, amount):
+    """
+    Reparte un pago entre las cuotas pendientes, en memoria.
+    
+    Aplica el monto en orden de cuota (la lista debe venir ordenada por
+    número), con las mismas reglas que update_installment_payment.
+    
+    Args:
+        installments: Cuotas pendientes con 'id', 'amount' y 'paid_amount'
+        amount: Monto del pago
+    
+    Returns:
+        list: Tuplas (installment_id, nuevo_estado, nuevo_monto_pagado)
+    """
+    updates = []
+    remaining_amount = amount
+    
+    for inst in installments:
+        if remaining_amount <= 0:
+            break
+        
+        inst_amount = float(inst['amount'])
+        inst_paid = float(inst['paid_amount']) if inst['paid_amount'] else 0
+        inst_balance = inst_amount - inst_paid
+        
+        # Apply payment to this installment
+        payment_to_apply = min(remaining_amount, inst_balance)
+        new_status, new_paid = _installment_status(inst_amount, inst_paid + payment_to_apply)
+        updates.append((inst['id'], new_status, new_paid))
+        
+        remaining_amount -= payment_to_apply
+    
+    return updates
+
+
 def process_loan_payment(loan_id, amount, payment_method, session_id, user_id, description=None):
     """
     Procesa un pago de préstamo de manera completa.
     
-    Realiza todas las operaciones necesarias:
-    1. Registra la transacción
+    Realiza todas las operaciones necesarias en una sola transacción:
+    1. Registra la transacción (y la suma al libro de saldos)
     2. Actualiza cuotas si es préstamo programado
     3. Actualiza estado del préstamo si se cancela completamente
     4. Registra fecha de cancelación
     
+    Las cuotas pendientes se leen una sola vez y el reparto se calcula en
+    memoria; si algo falla no queda ningún cambio aplicado a medias.
+    
     Args:
         loan_id: ID del préstamo
         amount: Monto del pago
@@ -214,11 +267,7 @@ def process_loan_payment(loan_id, amount, payment_method, session_id, user_id, d
             return {'success': False, 'error': 'Este préstamo ya está cancelado'}
         
         # 2. Get balance info before payment
-        balance_before = calculate_outstanding_balance(loan_id)
-        
-        if not balance_before:
-            conn.close()
-            return {'success': False, 'error': 'Error al calcular saldo'}
+        balance_before = _read_balance(cursor, loan)
         
         # 3. Build description
         if not description:
@@ -231,28 +280,37 @@ def process_loan_payment(loan_id, amount, payment_method, session_id, user_id, d
         """, (amount, description, payment_method, session_id, loan_id, user_id))
         
         transaction_id = cursor.lastrowid
+        apply_payment(cursor, loan_id, amount)
         
         # 5. Update installments if applicable
+        newly_paid = 0
         if balance_before['has_installments']:
-            remaining_amount = amount
+            cursor.execute("""
+                SELECT id, amount, paid_amount FROM installments
+                WHERE loan_id = ? AND status = 'pending'
+                ORDER BY number ASC
+            """, (loan_id,))
             
-            while remaining_amount > 0:
-                next_inst = get_next_installment(loan_id)
-                if not next_inst:
-                    break  # No more pending installments
-                
-                inst_amount = float(next_inst['amount'])
-                inst_paid = float(next_inst['paid_amount']) if next_inst['paid_amount'] else 0
-                inst_balance = inst_amount - inst_paid
-                
-                # Apply payment to this installment
-                payment_to_apply = min(remaining_amount, inst_balance)
-                update_installment_payment(next_inst['id'], payment_to_apply, payment_method)
-                
-                remaining_amount -= payment_to_apply
+            updates = allocate_installment_payment(cursor.fetchall(), amount)
+            payment_date = datetime.now().strftime('%Y-%m-%d')
+            
+            if updates:
+                cursor.executemany("""
+                    UPDATE installments
+                    SET status = ?, paid_amount = ?, payment_date = ?, payment_method = ?
+                    WHERE id = ?
+                """, [(status, paid, payment_date, payment_method, inst_id) for inst_id, status, paid in updates])
+            
+            newly_paid = sum(1 for _, status, _ in updates if status == 'paid')
         
-        # 6. Calculate balance after payment
-        balance_after = calculate_outstanding_balance(loan_id)
+        # 6. Calculate balance after payment (in memory, same totals as a re-query)
+        balance_after = _build_balance(
+            loan,
+            balance_before['total_paid'] + amount,
+            balance_before['installments_total'],
+            balance_before['installments_paid'] + newly_paid,
+            balance_before['total_debt']
+        )
         
         # 7. Check if loan is fully paid
         loan_paid_off = False
@@ -266,8 +324,8 @@ def process_loan_payment(loan_id, amount, payment_method, session_id, user_id, d
             
             loan_paid_off = True
             
-            # Log action
-            log_action(user_id, 'loan_paid_off', f'Préstamo #{loan_id} cancelado completamente')
+            # Log action (same transaction)
+            log_action(user_id, 'loan_paid_off', f'Préstamo #{loan_id} cancelado completamente', conn=conn)
         
         conn.commit()
         conn.close()
@@ -316,6 +374,30 @@ def get_loan_payment_history(loan_id):
     return payments
 
 
+def insert_schedules(cursor, loan_ids, schedules):
+    """
+    Inserta con un solo executemany las cuotas de calcular_cronogramas().
+
+    Args:
+        loan_ids: ID de cada préstamo, en el orden en que se pasaron a calcular_cronogramas
+        schedules: Resultado de calcular_cronogramas
+
+    Returns:
+        int: Número de cuotas insertadas
+    """
+    loan_ids = list(loan_ids)
+    rows = [(loan_ids[index], number, due, amount)
+            for index, number, due, amount in zip(schedules['prestamo'].tolist(),
+                                                  schedules['numero'].tolist(),
+                                                  schedules['fecha'].astype(str).tolist(),
+                                                  schedules['monto'].tolist())]
+    cursor.executemany("""
+        INSERT INTO installments (loan_id, number, due_date, amount, status, paid_amount)
+        VALUES (?, ?, ?, ?, 'pending', 0)
+    """, rows)
+    return len(rows)
+
+
 def get_rapidiario_schedule(loan_id):
     """
     Obtiene el cronograma completo de un préstamo Rapidiario con estados actuales.
@@ -351,7 +433,7 @@ def get_rapidiario_schedule(loan_id):
         
         # Try to auto-generate installments
         try:
-            from utils.loan_calculator import calcular_cuota_rapidiario
+            from utils.loan_calculator import calcular_cronogramas
             
             conn2 = get_db_connection()
             cursor2 = conn2.cursor()
@@ -366,16 +448,11 @@ def get_rapidiario_schedule(loan_id):
                 start_date_str = loan['start_date']
                 start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
                 
-                # Generate installments
-                loan_info = calcular_cuota_rapidiario(amount, interest_rate, start_date, 'Diario')
-                
-                # Insert them
-                for num, due, amt in loan_info['cuotas']:
-                    cursor2.execute("""
-                        INSERT INTO installments (loan_id, number, due_date, amount, status, paid_amount)
-                        VALUES (?, ?, ?, ?, 'pending', 0)
-                    """, (loan_id, num, due, amt))
+                # Generate and insert installments
+                schedules = calcular_cronogramas(['rapidiario'], [amount], [interest_rate], [start_date])
+                insert_schedules(cursor2, [loan_id], schedules)
                 
+                refresh_loan_balance(cursor2, loan_id)
                 conn2.commit()
                 
                 # Re-fetch installments
@@ -500,6 +577,7 @@ def apply_rapidiario_payment(loan_id, amount, payment_method, session_id, user_i
         """, (amount, description, payment_method, session_id, loan_id, user_id))
         
         transaction_id = cursor.lastrowid
+        apply_payment(cursor, loan_id, amount)
         
         # Apply payment to installments
         remaining = amount
@@ -614,7 +692,7 @@ def apply_rapidiario_payment(loan_id, amount, payment_method, session_id, user_i
                 WHERE id = ?
             """, (loan_id,))
             
-            log_action(user_id, 'loan_paid_off', f'Préstamo Rapidiario #{loan_id} cancelado')
+            log_action(user_id, 'loan_paid_off', f'Préstamo Rapidiario #{loan_id} cancelado', conn=conn)
         
         conn.commit()
         conn.close()
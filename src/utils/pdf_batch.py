@@ -0,0 +1,210 @@
+"""
+PDF Batch - Genera muchos documentos de pdf_generator en varios procesos.
+
+Imprimir los cronogramas de fin de mes o los contratos de cientos de
+préstamos uno tras otro tardaba minutos y congelaba la ventana. render_batch
+reparte los documentos entre PDF_WORKERS procesos (ProcessPoolExecutor) y
+devuelve las rutas en el mismo orden en que se pidieron.
+
+Los procesos no tocan la base de datos: los datos de la empresa
+(pdf_templates.load_company) y los analistas de los cronogramas se leen una
+sola vez aquí y viajan con cada documento. Las filas sqlite3.Row se pasan a
+dict para poder enviarlas a otro proceso.
+
+Cada documento es un dict:
+    {'kind': 'payment_schedule', 'filename': 'cronograma_Juan_12.pdf',
+     'data': {argumentos de la función generadora}}
+
+Tipos y argumentos (los de cada función de pdf_generator):
+    payment_schedule     loan_data, client_data, installments, pawn_data, analyst
+    payment_receipt      payment_data, client_data, loan_data, user_data
+    rapidiario_contract  contract_data
+    pawn_contract        contract_data
+    collection_sheet     sheet (ver collection_sheets)
+    collection_image     sheet; imagen PNG de la hoja (ImageGenerator)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import PDF_WORKERS
+
+KINDS = ('payment_schedule', 'payment_receipt', 'rapidiario_contract', 'pawn_contract',
+         'collection_sheet', 'collection_image')
+
+_generator = None  # PDFGenerator de este proceso (contratos y hojas de cobranza)
+_image_generator = None  # ImageGenerator de este proceso (imágenes de las hojas)
+
+
+def _plain(value):
+    """sqlite3.Row (y listas/dicts que las contengan) a tipos que se pueden enviar a otro proceso."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if hasattr(value, 'keys'):
+        return {k: _plain(value[k]) for k in value.keys()}
+    return value
+
+
+def _render(kind, filepath, data, company):
+    """Genera un documento. Corre en el proceso trabajador."""
+    global _generator, _image_generator
+    from utils import pdf_generator
+
+    if kind == 'collection_image':
+        if _image_generator is None:
+            from utils.image_generator import ImageGenerator
+            _image_generator = ImageGenerator()
+        _image_generator.generate_collection_sheet_image(data['sheet'], company=company).save(filepath)
+        return filepath
+
+    if kind == 'payment_schedule':
+        return pdf_generator.generate_payment_schedule(
+            filepath, data['loan_data'], data['client_data'], data['installments'],
+            data.get('pawn_data'), company=company, analyst=data.get('analyst'))
+    if kind == 'payment_receipt':
+        return pdf_generator.generate_payment_receipt(
+            filepath, data['payment_data'], data['client_data'], data['loan_data'],
+            data['user_data'], company=company)
+
+    if _generator is None:
+        _generator = pdf_generator.PDFGenerator()
+    if kind == 'rapidiario_contract':
+        return _generator.generate_rapidiario_contract(filepath, data['contract_data'])
+    if kind == 'collection_sheet':
+        return _generator.generate_collection_sheet(filepath, data['sheet'], company=company)
+    return _generator.generate_pawn_contract(filepath, data['contract_data'])
+
+
+def _prepare(documents, company):
+    """Valida los documentos, completa los analistas (una consulta) y los pasa a dict."""
+    from utils.pdf_generator import DEFAULT_ANALYST, loan_analyst_id, get_analyst_contacts
+
+    for doc in documents:
+        if doc['kind'] not in KINDS:
+            raise ValueError(f"Tipo de documento desconocido: {doc['kind']}")
+
+    schedules = [doc for doc in documents
+                 if doc['kind'] == 'payment_schedule' and doc['data'].get('analyst') is None]
+    contacts = get_analyst_contacts([loan_analyst_id(doc['data']['loan_data']) for doc in schedules], company)
+
+    prepared = []
+    for doc in documents:
+        data = _plain(doc['data'])
+        if doc['kind'] == 'payment_schedule' and data.get('analyst') is None:
+            data['analyst'] = contacts.get(loan_analyst_id(data['loan_data']), DEFAULT_ANALYST)
+        prepared.append((doc['kind'], doc['filename'], data))
+    return prepared
+
+
+def render_batch(documents, output_dir, workers=None, progress=None, company=None):
+    """
+    Genera los documentos en output_dir usando varios procesos.
+
+    Args:
+        documents: lista de dicts {'kind', 'filename', 'data'} (ver el módulo)
+        workers: procesos a usar (PDF_WORKERS por defecto; 1 = en este proceso)
+        progress: progress(hechos, total, ruta) tras cada documento
+        company: datos de la empresa (load_company() por defecto)
+
+    Returns:
+        list: ruta de cada documento, en el orden recibido; None si falló
+    """
+    from utils.pdf_templates import load_company
+
+    company = company or load_company()
+    prepared = _prepare(documents, company)
+    os.makedirs(output_dir, exist_ok=True)
+    total = len(prepared)
+    paths = [None] * total
+    workers = min(workers or PDF_WORKERS, total)
+    started = time.perf_counter()
+
+    def finished(index, path, done):
+        paths[index] = path
+        if progress:
+            progress(done, total, path)
+
+    if workers <= 1:
+        for done, (kind, filename, data) in enumerate(prepared, start=1):
+            filepath = os.path.join(output_dir, filename)
+            try:
+                path = _render(kind, filepath, data, company)
+            except Exception as e:
+                print(f"Error generando {filename}: {e}")
+                path = None
+            finished(done - 1, path, done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_render, kind, os.path.join(output_dir, filename), data, company): index
+                for index, (kind, filename, data) in enumerate(prepared)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    path = future.result()
+                except Exception as e:
+                    print(f"Error generando {prepared[index][1]}: {e}")
+                    path = None
+                finished(index, path, done)
+
+    ok = sum(1 for path in paths if path)
+    print(f"PDF por lotes: {ok}/{total} documentos en {time.perf_counter() - started:.1f} s ({workers} procesos)")
+    return paths
+
+
+def schedule_documents(loan_ids):
+    """
+    Documentos payment_schedule de los préstamos dados, leídos con tres
+    consultas (préstamos con cliente, cuotas y garantías) en vez de tres por
+    préstamo. Los préstamos que no existen se omiten.
+    """
+    from database import get_db_connection
+
+    loan_ids = list(loan_ids)
+    if not loan_ids:
+        return []
+    marks = ', '.join('?' * len(loan_ids))
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT l.*, c.first_name, c.last_name, c.dni
+            FROM loans l
+            JOIN clients c ON l.client_id = c.id
+            WHERE l.id IN ({marks})
+        """, loan_ids)
+        loans = {row['id']: _plain(row) for row in cursor.fetchall()}
+
+        installments = {}
+        cursor.execute(f"SELECT * FROM installments WHERE loan_id IN ({marks}) ORDER BY loan_id, number", loan_ids)
+        for row in cursor.fetchall():
+            installments.setdefault(row['loan_id'], []).append(_plain(row))
+
+        pawns = {}
+        cursor.execute(f"SELECT * FROM pawn_details WHERE loan_id IN ({marks})", loan_ids)
+        for row in cursor.fetchall():
+            pawns.setdefault(row['loan_id'], []).append(_plain(row))
+    finally:
+        conn.close()
+
+    documents = []
+    for loan_id in loan_ids:
+        loan = loans.get(loan_id)
+        if loan is None:
+            continue
+        documents.append({
+            'kind': 'payment_schedule',
+            'filename': f"cronograma_{loan['first_name']}_{loan_id}.pdf",
+            'data': {
+                'loan_data': loan,
+                'client_data': loan,
+                'installments': installments.get(loan_id, []),
+                'pawn_data': pawns.get(loan_id, []),
+            },
+        })
+    return documents
@@ -1036,34 +1036,159 @@ class PDFGenerator:
         doc.build(story)
         return filepath
 
+    def generate_collection_sheet(self, filepath, sheet, company=None):
+        """
+        Generates an analyst's daily collection sheet (Hoja de Cobranza):
+        one row per loan with installments due today or overdue.
+        sheet: dict from utils.collection_sheets.build_sheets
+        company: load_company() data (read here when omitted)
+        """
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib.enums import TA_CENTER
+        from utils.pdf_templates import BRAND_COLOR, load_company, use_template
+        
+        company = company or load_company()
+        width, height = A4
+        day = datetime.strptime(sheet['date'], '%Y-%m-%d').strftime('%d/%m/%Y')
+        
+        def on_page(c, doc):
+            # Branding header/footer are the same form on every page
+            use_template(c, 'schedule_header', company)
+            use_template(c, 'schedule_footer', company, y=1.2*cm)
+            c.setFont("Helvetica", 8)
+            c.setFillColor(colors.grey)
+            c.drawRightString(width - 1*cm, 0.7*cm, f"{sheet['analyst_name']} - {day} - Página {doc.page}")
+        
+        doc = SimpleDocTemplate(filepath, pagesize=A4,
+                                rightMargin=1*cm, leftMargin=1*cm,
+                                topMargin=3.5*cm, bottomMargin=2*cm)
+        
+        styles = getSampleStyleSheet()
+        styles.add(ParagraphStyle(name='Center', alignment=TA_CENTER, fontName='Helvetica-Bold', fontSize=16, leading=20))
+        styles.add(ParagraphStyle(name='Info', fontName='Helvetica', fontSize=10, leading=14))
+        
+        story = [
+            Paragraph("HOJA DE COBRANZA", styles['Center']),
+            Spacer(1, 8),
+            Paragraph(f"<b>Analista:</b> {sheet['analyst_name']} | Tel: {sheet['analyst_phone']} | <b>Fecha:</b> {day}", styles['Info']),
+            Paragraph(f"<b>Clientes:</b> {len(sheet['rows'])} | <b>Cuotas:</b> {sheet['installments']} | "
+                      f"<b>Vence hoy:</b> S/ {sheet['total_today']:,.2f} | <b>Total a cobrar:</b> S/ {sheet['total_due']:,.2f}",
+                      styles['Info']),
+            Spacer(1, 10),
+        ]
+        
+        def cut(text, size):
+            text = text or ''
+            return text if len(text) <= size else text[:size - 1] + '…'
+        
+        table_data = [['N°', 'Cliente', 'Teléfono', 'Dirección', 'Préstamo', 'Cuotas', 'Desde', 'Hoy S/', 'Total S/']]
+        for i, row in enumerate(sheet['rows'], start=1):
+            table_data.append([
+                str(i),
+                cut(row['client_name'], 28),
+                cut(row['phone'], 12),
+                cut(row['address'], 28),
+                f"#{row['loan_id']} {row['loan_type'][:5].capitalize()}",
+                str(row['installments']),
+                datetime.strptime(row['oldest_due'], '%Y-%m-%d').strftime('%d/%m/%y'),
+                f"{row['due_today']:.2f}",
+                f"{row['amount_due']:.2f}",
+            ])
+        table_data.append(['', '', '', '', '', str(sheet['installments']), 'TOTAL:',
+                           f"{sheet['total_today']:.2f}", f"{sheet['total_due']:.2f}"])
+        
+        table = Table(table_data, repeatRows=1,
+                      colWidths=[0.8*cm, 4.2*cm, 2.2*cm, 4.0*cm, 2.0*cm, 1.2*cm, 1.8*cm, 1.4*cm, 1.4*cm])
+        style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(BRAND_COLOR)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+            ('ALIGN', (5, 1), (6, -1), 'CENTER'),
+            ('ALIGN', (7, 1), (8, -1), 'RIGHT'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f0f0f0')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ])
+        # Overdue since before today: red "Desde" cell
+        for i, row in enumerate(sheet['rows'], start=1):
+            if row['oldest_due'] < sheet['date']:
+                style.add('BACKGROUND', (6, i), (6, i), colors.HexColor('#FFCDD2'))
+        table.setStyle(style)
+        story.append(table)
+        
+        doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+        return filepath
+
+
+
+DEFAULT_ANALYST = ('---', '999 999 999')
+
+
+def loan_analyst_id(loan_data):
+    if hasattr(loan_data, 'get'):
+        return loan_data.get('analyst_id')
+    return loan_data['analyst_id'] if 'analyst_id' in loan_data.keys() else None
+
+
+def get_analyst_contacts(analyst_ids, company):
+    """
+    Name and phone shown in the schedule footer for each analyst, in one query.
+    Admins show the company manager (company_manager / manager_phone settings).
+
+    Returns:
+        dict: {analyst_id: (name, phone)}; missing ids are left out
+    """
+    ids = sorted({analyst_id for analyst_id in analyst_ids if analyst_id})
+    if not ids:
+        return {}
 
+    from database import get_db_connection
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, analyst_name, analyst_phone, role FROM users WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    contacts = {}
+    for row in rows:
+        if row['role'] == 'admin':
+            contacts[row['id']] = (company['company_manager'] or row['analyst_name'] or 'Gerente General',
+                                   company['manager_phone'] or row['analyst_phone'] or '999 999 999')
+        else:
+            contacts[row['id']] = (row['analyst_name'] or 'Analista',
+                                   row['analyst_phone'] or '999 999 999')
+    return contacts
 
-def generate_payment_schedule(filepath, loan_data, client_data, installments, pawn_data=None):
+
+def generate_payment_schedule(filepath, loan_data, client_data, installments, pawn_data=None,
+                              company=None, analyst=None):
     """
     Generates a professional PDF for payment schedules with company branding
+    company: load_company() data (read here when omitted)
+    analyst: (name, phone) for the footer (looked up here when omitted)
     """
-    from utils.settings_manager import get_setting
+    from utils.pdf_templates import BRAND_COLOR, load_company, use_template
+    
+    company = company or load_company()
+    if analyst is None:
+        analyst_id = loan_analyst_id(loan_data)
+        analyst = get_analyst_contacts([analyst_id], company).get(analyst_id, DEFAULT_ANALYST)
     
     c = canvas.Canvas(filepath, pagesize=A4)
     width, height = A4
     
-    # Get company settings
-    company_name = get_setting('company_name') or "Mi Empresa"
-    company_ruc = get_setting('company_ruc') or "---"
-    company_address = get_setting('company_address') or "Dirección"
-    company_phone = get_setting('company_phone') or "999 999 999"
-    company_phone2 = get_setting('company_phone2') or ""
-    manager_phone = get_setting('manager_phone') or ""
-    
-    # Header with company branding (Blue background)
-    c.setFillColor(colors.HexColor('#2196F3'))
-    c.rect(0, height - 3*cm, width, 3*cm, fill=True, stroke=False)
-    
-    c.setFillColor(colors.white)
-    c.setFont("Helvetica-Bold", 24)
-    c.drawCentredString(width/2, height - 1.5*cm, company_name)
-    c.setFont("Helvetica", 12)
-    c.drawCentredString(width/2, height - 2.2*cm, f"RUC: {company_ruc}")
+    # Header with company branding (shared form XObject)
+    use_template(c, 'schedule_header', company)
     
     # Reset to black for body
     c.setFillColor(colors.black)
@@ -1077,7 +1202,7 @@ def generate_payment_schedule(filepath, loan_data, client_data, installments, pa
     
     # Client and Loan Information Box
     c.setFont("Helvetica-Bold", 12)
-    c.setFillColor(colors.HexColor('#2196F3'))
+    c.setFillColor(colors.HexColor(BRAND_COLOR))
     c.drawString(2*cm, y, "DATOS DEL PRÉSTAMO")
     c.setFillColor(colors.black)
     y -= 0.6*cm
@@ -1101,7 +1226,7 @@ def generate_payment_schedule(filepath, loan_data, client_data, installments, pa
     # Pawn Details (if applicable)
     if pawn_data and len(pawn_data) > 0:
         c.setFont("Helvetica-Bold", 12)
-        c.setFillColor(colors.HexColor('#2196F3'))
+        c.setFillColor(colors.HexColor(BRAND_COLOR))
         c.drawString(2*cm, y, "GARANTÍAS PRENDARIAS")
         c.setFillColor(colors.black)
         y -= 0.6*cm
@@ -1116,7 +1241,7 @@ def generate_payment_schedule(filepath, loan_data, client_data, installments, pa
     
     # Payment Schedule Table
     c.setFont("Helvetica-Bold", 12)
-    c.setFillColor(colors.HexColor('#2196F3'))
+    c.setFillColor(colors.HexColor(BRAND_COLOR))
     c.drawString(2*cm, y, "CRONOGRAMA DE CUOTAS")
     c.setFillColor(colors.black)
     y -= 0.8*cm
@@ -1150,7 +1275,7 @@ def generate_payment_schedule(filepath, loan_data, client_data, installments, pa
     # Style the table
     style = TableStyle([
         # Header row
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2196F3')),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(BRAND_COLOR)),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
         ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
         ('FONTSIZE', (0, 0), (-1, 0), 10),
@@ -1197,43 +1322,19 @@ def generate_payment_schedule(filepath, loan_data, client_data, installments, pa
     
     y = y - table_height - 1.5*cm
     
-    # Get analyst information
-    analyst_name = '---'
-    analyst_phone = '999 999 999'
-    
-    analyst_id = loan_data.get('analyst_id') if hasattr(loan_data, 'get') else loan_data['analyst_id'] if 'analyst_id' in loan_data.keys() else None
-    if analyst_id:
-        from database import get_db_connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT analyst_name, analyst_phone, role FROM users WHERE id = ?", (analyst_id,))
-        analyst_row = cursor.fetchone()
-        conn.close()
-        if analyst_row:
-            if analyst_row['role'] == 'admin':
-                analyst_name = get_setting('company_manager') or analyst_row['analyst_name'] or 'Gerente General'
-                analyst_phone = manager_phone or analyst_row['analyst_phone'] or '999 999 999'
-            else:
-                analyst_name = analyst_row['analyst_name'] or 'Analista'
-                analyst_phone = analyst_row['analyst_phone'] or '999 999 999'
-    
-    # Footer
+    # Footer: company line (shared form) and the loan's analyst
+    use_template(c, 'schedule_footer', company, y=y)
+    y -= 0.4*cm
     c.setFont("Helvetica", 8)
     c.setFillColor(colors.grey)
-    
-    phones = company_phone
-    if company_phone2:
-        phones += f" / {company_phone2}"
-    
-    c.drawCentredString(width/2, y, f"{company_address} | Tel: {phones}")
-    y -= 0.4*cm
+    analyst_name, analyst_phone = analyst
     c.drawCentredString(width/2, y, f"Analista: {analyst_name} | Tel: {analyst_phone}")
     
     c.save()
     return filepath
 
 
-def generate_payment_receipt(filepath, payment_data, client_data, loan_data, user_data):
+def generate_payment_receipt(filepath, payment_data, client_data, loan_data, user_data, company=None):
     """
     Generates a professional payment receipt PDF
     
@@ -1241,30 +1342,17 @@ def generate_payment_receipt(filepath, payment_data, client_data, loan_data, use
     client_data: dict with client information
     loan_data: dict with loan information
     user_data: dict with cashier/user information
+    company: load_company() data (read here when omitted)
     """
-    from utils.settings_manager import get_setting
+    from utils.pdf_templates import BRAND_COLOR, load_company, use_template
+    
+    company = company or load_company()
     
     c = canvas.Canvas(filepath, pagesize=A4)
     width, height = A4
     
-    # Get company settings
-    company_name = get_setting('company_name') or "Mi Empresa"
-    company_ruc = get_setting('company_ruc') or "---"
-    company_address = get_setting('company_address') or "Dirección"
-    company_phone = get_setting('company_phone') or "999 999 999"
-    company_phone2 = get_setting('company_phone2') or ""
-    
-    # Header with company branding (Blue background)
-    c.setFillColor(colors.HexColor('#2196F3'))
-    c.rect(0, height - 3.5*cm, width, 3.5*cm, fill=True, stroke=False)
-    
-    c.setFillColor(colors.white)
-    c.setFont("Helvetica-Bold", 26)
-    c.drawCentredString(width/2, height - 1.5*cm, company_name)
-    c.setFont("Helvetica", 11)
-    c.drawCentredString(width/2, height - 2.2*cm, f"RUC: {company_ruc}")
-    c.setFont("Helvetica", 10)
-    c.drawCentredString(width/2, height - 2.8*cm, f"{company_address}")
+    # Header with company branding (shared form XObject)
+    use_template(c, 'receipt_header', company)
     
     # Reset to black for body
     c.setFillColor(colors.black)
@@ -1285,7 +1373,7 @@ def generate_payment_receipt(filepath, payment_data, client_data, loan_data, use
     
     # Client Information Box
     c.setFont("Helvetica-Bold", 12)
-    c.setFillColor(colors.HexColor('#2196F3'))
+    c.setFillColor(colors.HexColor(BRAND_COLOR))
     c.drawString(2*cm, y, "DATOS DEL CLIENTE")
     c.setFillColor(colors.black)
     y -= 0.6*cm
@@ -1304,7 +1392,7 @@ def generate_payment_receipt(filepath, payment_data, client_data, loan_data, use
     
     # Loan Information Box
     c.setFont("Helvetica-Bold", 12)
-    c.setFillColor(colors.HexColor('#2196F3'))
+    c.setFillColor(colors.HexColor(BRAND_COLOR))
     c.drawString(2*cm, y, "DATOS DEL PRÉSTAMO")
     c.setFillColor(colors.black)
     y -= 0.6*cm
@@ -1373,16 +1461,7 @@ def generate_payment_receipt(filepath, payment_data, client_data, loan_data, use
     c.drawString(2*cm, y, "Firma del Cliente")
     
     # Footer
-    y = 3*cm
-    c.setFont("Helvetica", 8)
-    c.setFillColor(colors.grey)
-    
-    phones = company_phone
-    if company_phone2:
-        phones += f" / {company_phone2}"
-    
-    c.drawCentredString(width/2, y, f"Tel: {phones}")
-    y -= 0.4*cm
+    use_template(c, 'receipt_footer', company, y=3*cm)
     # Watermark
     c.setFont("Helvetica", 8)
     c.setFillColor(colors.lightgrey)
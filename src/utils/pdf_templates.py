@@ -0,0 +1,139 @@
+"""
+Plantillas PDF - Encabezado y pie de página con la marca de la empresa.
+
+El cronograma y el recibo dibujaban en cada llamada la franja azul, el nombre,
+el RUC, la dirección y los teléfonos, y leían cada dato de la empresa con un
+get_setting distinto. Aquí:
+
+    - load_company() lee todos los datos de la empresa de una vez; el
+      generador por lotes lo hace una sola vez y se lo pasa a cada proceso.
+    - Cada parte fija (encabezado y pie de cada documento) se define en el
+      canvas como form XObject la primera vez que se usa y después sólo se
+      referencia (doForm).
+    - El nombre del form lleva la versión de los datos de la empresa (un
+      hash de sus valores): si cambian, es otro form y nunca se mezclan.
+
+reportlab no comparte forms entre archivos: cada PDF lleva su propia copia
+de la plantilla y, dentro del proceso, se reutiliza la versión ya calculada.
+"""
+
+import zlib
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+
+BRAND_COLOR = '#2196F3'
+
+# Datos de la empresa y su valor cuando no están configurados
+COMPANY_DEFAULTS = {
+    'company_name': "Mi Empresa",
+    'company_ruc': "---",
+    'company_address': "Dirección",
+    'company_phone': "999 999 999",
+    'company_phone2': "",
+    'manager_phone': "",
+    'company_manager': "",
+}
+
+
+def load_company():
+    """Datos de la empresa (COMPANY_DEFAULTS completados con la configuración)."""
+    from utils.settings_manager import get_setting
+    return {key: get_setting(key) or default for key, default in COMPANY_DEFAULTS.items()}
+
+
+_versions = {}  # valores de la empresa -> versión
+
+
+def company_version(company):
+    """Identificador estable de los datos de la empresa (igual en todos los procesos)."""
+    values = tuple(company.get(key) or '' for key in sorted(COMPANY_DEFAULTS))
+    version = _versions.get(values)
+    if version is None:
+        text = '\x1f'.join(f"{key}={value}" for key, value in zip(sorted(COMPANY_DEFAULTS), values))
+        version = _versions[values] = f"{zlib.crc32(text.encode('utf-8')):08x}"
+    return version
+
+
+def company_phones(company):
+    phones = company['company_phone']
+    if company['company_phone2']:
+        phones += f" / {company['company_phone2']}"
+    return phones
+
+
+# --- Partes fijas ----------------------------------------------------------
+# Coordenadas de página para los encabezados; los pies se dibujan con su
+# línea base en y = 0 y use_template los ubica donde corresponda.
+
+def _schedule_header(c, company):
+    width, height = A4
+    c.setFillColor(colors.HexColor(BRAND_COLOR))
+    c.rect(0, height - 3*cm, width, 3*cm, fill=True, stroke=False)
+
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 24)
+    c.drawCentredString(width/2, height - 1.5*cm, company['company_name'])
+    c.setFont("Helvetica", 12)
+    c.drawCentredString(width/2, height - 2.2*cm, f"RUC: {company['company_ruc']}")
+
+
+def _schedule_footer(c, company):
+    width, _ = A4
+    c.setFont("Helvetica", 8)
+    c.setFillColor(colors.grey)
+    c.drawCentredString(width/2, 0, f"{company['company_address']} | Tel: {company_phones(company)}")
+
+
+def _receipt_header(c, company):
+    width, height = A4
+    c.setFillColor(colors.HexColor(BRAND_COLOR))
+    c.rect(0, height - 3.5*cm, width, 3.5*cm, fill=True, stroke=False)
+
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 26)
+    c.drawCentredString(width/2, height - 1.5*cm, company['company_name'])
+    c.setFont("Helvetica", 11)
+    c.drawCentredString(width/2, height - 2.2*cm, f"RUC: {company['company_ruc']}")
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(width/2, height - 2.8*cm, f"{company['company_address']}")
+
+
+def _receipt_footer(c, company):
+    width, _ = A4
+    c.setFont("Helvetica", 8)
+    c.setFillColor(colors.grey)
+    c.drawCentredString(width/2, 0, f"Tel: {company_phones(company)}")
+
+
+TEMPLATES = {
+    'schedule_header': _schedule_header,
+    'schedule_footer': _schedule_footer,
+    'receipt_header': _receipt_header,
+    'receipt_footer': _receipt_footer,
+}
+
+
+def use_template(c, name, company, y=0):
+    """
+    Dibuja la plantilla name en el canvas c, desplazada y puntos hacia arriba.
+    La primera vez en este canvas (y con estos datos de empresa) la define
+    como form XObject; las siguientes sólo la referencian.
+    """
+    form = f"{name}_{company_version(company)}"
+    defined = c.__dict__.setdefault('_template_forms', set())
+    if form not in defined:
+        width, height = A4
+        # Margen de 1 cm debajo de y = 0 para los trazos descendentes de los pies
+        c.beginForm(form, lowerx=0, lowery=-1*cm, upperx=width, uppery=height)
+        c.saveState()
+        TEMPLATES[name](c, company)
+        c.restoreState()
+        c.endForm()
+        defined.add(form)
+
+    c.saveState()
+    c.translate(0, y)
+    c.doForm(form)
+    c.restoreState()
@@ -0,0 +1,90 @@
+"""
+Receivables Ledger - Saldo por préstamo mantenido de forma incremental.
+
+La tabla loan_balances guarda, por préstamo, el total a pagar, lo pagado y el
+saldo separado en capital e interés. Los caminos que la modifican (pagos,
+desembolsos, refinanciamientos, generación de cuotas) la actualizan con el
+mismo cursor y en la misma transacción que el cambio original, así la pestaña
+de Cuentas por Cobrar se resuelve con una sola consulta.
+
+Reglas (las mismas de calculate_outstanding_balance):
+    - total_due: suma de cuotas; sin cuotas, capital + interés simple
+    - paid: ingresos de categoría 'payment' del préstamo
+    - Lo pagado cubre primero el capital y luego el interés
+
+Ninguna función hace commit; eso queda a cargo del llamador.
+"""
+
+# Cifras de cada préstamo calculadas desde cuotas y transacciones.
+# {where} filtra los préstamos a recalcular.
+_BALANCE_SELECT = """
+    SELECT id, principal, total_due, paid,
+           CASE WHEN paid < principal THEN principal - paid ELSE 0 END,
+           CASE WHEN paid < principal THEN total_due - principal ELSE total_due - paid END,
+           CURRENT_TIMESTAMP
+    FROM (
+        SELECT l.id, l.amount AS principal,
+               CASE WHEN EXISTS (SELECT 1 FROM installments i WHERE i.loan_id = l.id)
+                    THEN (SELECT SUM(i.amount) FROM installments i WHERE i.loan_id = l.id)
+                    ELSE l.amount * (1 + COALESCE(l.interest_rate, 0) / 100.0)
+               END AS total_due,
+               (SELECT COALESCE(SUM(t.amount), 0) FROM transactions t
+                WHERE t.loan_id = l.id AND t.type = 'income' AND t.category = 'payment') AS paid
+        FROM loans l
+        {where}
+    ) b
+"""
+
+_INSERT = """
+    INSERT INTO loan_balances (loan_id, principal, total_due, paid,
+                               capital_outstanding, interest_outstanding, updated_at)
+"""
+
+
+def refresh_loan_balance(cursor, loan_id):
+    """
+    Recalcula el saldo de un préstamo desde sus cuotas y pagos.
+    Llamar después de crear el préstamo o de cambiar su cronograma.
+    """
+    if loan_id is None:
+        return  # p. ej. lastrowid no disponible; sync_missing_balances lo completa
+    cursor.execute("DELETE FROM loan_balances WHERE loan_id = ?", (loan_id,))
+    cursor.execute(_INSERT + _BALANCE_SELECT.format(where="WHERE l.id = ?"), (loan_id,))
+
+
+def apply_payment(cursor, loan_id, amount):
+    """
+    Suma un pago al saldo del préstamo sin volver a leer sus transacciones.
+    Si el préstamo aún no tiene fila en el libro, la calcula completa.
+    """
+    cursor.execute("""
+        UPDATE loan_balances
+        SET paid = paid + ?,
+            capital_outstanding = CASE WHEN paid + ? < principal THEN principal - (paid + ?) ELSE 0 END,
+            interest_outstanding = CASE WHEN paid + ? < principal THEN total_due - principal
+                                        ELSE total_due - (paid + ?) END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE loan_id = ?
+    """, (amount, amount, amount, amount, amount, loan_id))
+
+    if cursor.rowcount == 0:
+        refresh_loan_balance(cursor, loan_id)
+
+
+def sync_missing_balances(cursor):
+    """Agrega al libro los préstamos que todavía no tienen fila."""
+    cursor.execute(_INSERT + _BALANCE_SELECT.format(
+        where="WHERE NOT EXISTS (SELECT 1 FROM loan_balances lb WHERE lb.loan_id = l.id)"))
+
+
+def rebuild_loan_balances(cursor):
+    """
+    Reconstruye todo el libro desde cero.
+
+    Returns:
+        int: Número de préstamos registrados
+    """
+    cursor.execute("DELETE FROM loan_balances")
+    cursor.execute(_INSERT + _BALANCE_SELECT.format(where=""))
+    cursor.execute("SELECT COUNT(*) AS total FROM loan_balances")
+    return cursor.fetchone()['total']
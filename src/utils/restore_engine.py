@@ -0,0 +1,316 @@
+"""
+Restore Engine - Restauración en bloque sobre una base de preparación (modo LOCAL).
+
+La base en uso no se toca hasta el final:
+    1. Se copia la base actual a DB_PATH + '.restore' (las tablas que la copia
+       no trae, como notifications, se conservan igual que antes).
+    2. Se quitan índices y triggers, se relajan los PRAGMA (sin journal, sin
+       fsync, sin claves foráneas) y se cargan las filas con executemany en
+       lotes de CHUNK_SIZE dentro de una sola transacción.
+    3. Se recrean índices y triggers, se reconstruyen el índice de búsqueda y
+       el libro de saldos, se sube settings_version (los triggers que lo
+       mueven no estaban durante la carga) y se ejecuta ANALYZE.
+    4. Se valida: integrity_check y conteos de filas contra la copia. Si algo
+       falla se descarta la base de preparación y la actual queda intacta.
+       Las filas huérfanas (foreign_key_check) se informan pero no detienen la
+       restauración: las copias antiguas pueden traerlas y antes se aceptaban.
+    5. Se reemplaza DB_PATH por la base preparada con os.replace.
+
+progress(fracción, mensaje) se llama desde el hilo que restaura; la ventana
+debe pasar el dato a Tkinter por su cuenta (ver DatabaseWindow).
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+from migrations import migrate
+from utils.backup_archive import EXTENSION, TABLES, resolve_chain, restore_archive, table_key
+from utils.excel_export import EXCLUDED_TABLES, SHEET_NAMES, COLUMN_NAMES
+from utils.receivables_ledger import rebuild_loan_balances
+
+CHUNK_SIZE = 5000
+STAGING_SUFFIX = '.restore'
+
+# Tramos de la barra de progreso
+_PREPARE, _LOAD, _REBUILD, _VALIDATE = 0.05, 0.80, 0.90, 0.97
+
+
+class RestoreError(Exception):
+    """La copia no pasó la validación; la base en uso no se modificó."""
+
+
+def _report(progress, fraction, message):
+    if progress:
+        progress(min(fraction, 1.0), message)
+
+
+def _count(cursor, table):
+    cursor.execute(f"SELECT COUNT(*) AS total FROM {table}")
+    return cursor.fetchone()['total']
+
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row['name'] for row in cursor.fetchall()]
+
+
+def _open_staging(db_path, staging_path, source_db=None):
+    """Crea la base de preparación: copia de source_db (por defecto la actual) al día en esquema."""
+    for path in (staging_path, staging_path + '-journal'):
+        if os.path.exists(path):
+            os.remove(path)  # Restauración anterior interrumpida
+
+    conn = sqlite3.connect(staging_path)
+    source = sqlite3.connect(source_db or db_path)
+    try:
+        source.backup(conn)
+    finally:
+        source.close()
+
+    conn.row_factory = sqlite3.Row
+    migrate(conn)  # Copias .db antiguas pueden no tener las últimas migraciones
+
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -65536")  # 64 MB
+    return conn
+
+
+def _drop_indexes_and_triggers(cursor):
+    """Quita índices y triggers explícitos; devuelve su SQL para recrearlos."""
+    cursor.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+    """)
+    objects = [(row['type'], row['name'], row['sql']) for row in cursor.fetchall()]
+    for kind, name, _ in objects:
+        cursor.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+    return objects
+
+
+def _recreate(cursor, objects):
+    # Índices primero: algunos triggers consultan tablas indexadas
+    for kind in ('index', 'trigger'):
+        for object_kind, _, sql in objects:
+            if object_kind == kind:
+                cursor.execute(sql)
+
+
+def _bump_settings_version(cursor, db_path):
+    """settings_version por encima del de la base en uso: las cachés de configuración se recargan."""
+    live = sqlite3.connect(db_path)
+    try:
+        row = live.execute("SELECT version FROM settings_version WHERE id = 1").fetchone()
+    except sqlite3.Error:
+        row = None  # Base anterior a la migración 0008
+    finally:
+        live.close()
+    cursor.execute("UPDATE settings_version SET version = MAX(version, ?) + 1 WHERE id = 1",
+                   (row[0] if row else 0,))
+
+
+def _insert_chunks(cursor, table, columns, rows, on_batch=None, verb='INSERT'):
+    query = (f"{verb} INTO {table} ({', '.join(columns)}) "
+             f"VALUES ({', '.join(['?'] * len(columns))})")
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        cursor.executemany(query, chunk)
+        if on_batch:
+            on_batch(table, len(chunk))
+
+
+def _load_archive(conn, source_path, on_batch):
+    """Copias .ndjson.gz (con su cadena). Conteos esperados sólo si es una copia completa suelta."""
+    chain = resolve_chain(source_path)
+    manifest = None
+    for path in chain:
+        manifest = restore_archive(conn, path, batch_size=CHUNK_SIZE, on_batch=on_batch)
+    if len(chain) == 1:
+        return {table: summary['rows'] for table, summary in manifest['tables'].items()}
+    return {}
+
+
+def _load_json(conn, source_path, on_batch):
+    """Copias .json antiguas (un solo documento, se carga completo)."""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    cursor = conn.cursor()
+    expected = {}
+    for table, rows in data.items():
+        cursor.execute(f"DELETE FROM {table}")
+        expected[table] = len(rows)
+        if not rows:
+            continue
+        columns = list(rows[0].keys())
+        _insert_chunks(cursor, table, columns, [[row[c] for c in columns] for row in rows], on_batch)
+    return expected
+
+
+def _load_excel(conn, source_path, on_batch):
+    """
+    Libros Excel de create_excel_backup: hojas y columnas vienen traducidas y
+    se devuelven a sus nombres en la base. Una traducción repetida se resuelve
+    con las columnas que la tabla tiene realmente. Las tablas internas o
+    derivadas (loan_balances se reconstruye después) que traigan libros
+    antiguos se omiten.
+    """
+    import pandas as pd
+
+    tables = {sheet: table for table, sheet in SHEET_NAMES.items()}
+    translations = {}
+    for column, label in COLUMN_NAMES.items():
+        translations.setdefault(label, []).append(column)
+
+    cursor = conn.cursor()
+    expected = {}
+    for sheet, df in pd.read_excel(source_path, sheet_name=None).items():
+        table = tables.get(sheet, sheet)
+        if table in EXCLUDED_TABLES:
+            continue
+        existing = _table_columns(cursor, table)
+        if not existing:
+            print(f"Hoja omitida (no hay tabla {table}): {sheet}")
+            continue
+
+        columns = []
+        for label in df.columns:
+            candidates = [c for c in translations.get(label, []) if c in existing]
+            columns.append(candidates[0] if candidates else label)
+
+        cursor.execute(f"DELETE FROM {table}")
+        df = df.astype(object).where(df.notna(), None)
+        rows = df.values.tolist()
+        # Un ID repetido en la hoja reemplaza al anterior, como en la importación original
+        key = table_key(table)
+        expected[table] = len({row[columns.index(key)] for row in rows}) if key in columns else len(rows)
+        _insert_chunks(cursor, table, columns, rows, on_batch, verb='INSERT OR REPLACE')
+    return expected
+
+
+def _validate(cursor, expected):
+    """
+    Returns:
+        list: Advertencias (filas huérfanas); los errores graves lanzan RestoreError
+    """
+    cursor.execute("PRAGMA integrity_check")
+    result = [row[0] for row in cursor.fetchall()]
+    if result != ['ok']:
+        raise RestoreError("La base restaurada está dañada: " + "; ".join(result[:5]))
+
+    for table, rows in expected.items():
+        found = _count(cursor, table)
+        if found != rows:
+            raise RestoreError(f"La tabla {table} tiene {found} filas y la copia {rows}.")
+
+    cursor.execute("PRAGMA foreign_key_check")
+    orphans = {}
+    for row in cursor.fetchall():
+        orphans[row[0]] = orphans.get(row[0], 0) + 1
+    return [f"{table}: {count} filas sin registro relacionado" for table, count in sorted(orphans.items())]
+
+
+def _swap(staging_path, db_path):
+    """Pone la base preparada en db_path. Llamar con todas las conexiones cerradas."""
+    # Un -wal/-shm viejo se aplicaría sobre el archivo nuevo
+    for suffix in ('-wal', '-shm', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    try:
+        os.replace(staging_path, db_path)
+    except PermissionError:
+        # Windows: otro proceso tiene abierta la base; se copia página a página
+        source = sqlite3.connect(staging_path)
+        target = sqlite3.connect(db_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        os.remove(staging_path)
+
+
+def restore(source_path, db_path, before_swap=None, progress=None):
+    """
+    Restaura source_path (.ndjson.gz, .json, .xlsx o .db) en db_path.
+
+    Args:
+        before_swap: Callback sin argumentos justo antes de reemplazar db_path
+            (copia de seguridad previa, cerrar conexiones); si lanza una
+            excepción no se reemplaza nada
+        progress: Callback(fracción 0-1, mensaje)
+
+    Returns:
+        dict: {'tables': {tabla: filas}, 'warnings': [...], 'seconds': ...}
+
+    Raises:
+        RestoreError: La copia no pasó la validación
+    """
+    start = time.perf_counter()
+    staging_path = db_path + STAGING_SUFFIX
+
+    _report(progress, 0.0, "Preparando base temporal...")
+    is_db = not source_path.endswith((EXTENSION, '.json', '.xlsx'))
+    conn = _open_staging(db_path, staging_path, source_db=source_path if is_db else None)
+    try:
+        cursor = conn.cursor()
+        objects = _drop_indexes_and_triggers(cursor)
+
+        # Total aproximado para la barra: filas de las tablas respaldadas de la base actual
+        total = max(sum(_count(cursor, t) for t in TABLES), 1)
+        loaded = [0]
+
+        def on_batch(table, rows):
+            loaded[0] += rows
+            share = min(loaded[0] / total, 1.0)
+            _report(progress, _PREPARE + share * (_LOAD - _PREPARE),
+                    f"Cargando {table}: {loaded[0]} filas")
+
+        _report(progress, _PREPARE, "Cargando datos...")
+        if source_path.endswith(EXTENSION):
+            expected = _load_archive(conn, source_path, on_batch)
+        elif source_path.endswith('.json'):
+            expected = _load_json(conn, source_path, on_batch)
+        elif source_path.endswith('.xlsx'):
+            expected = _load_excel(conn, source_path, on_batch)
+        else:
+            expected = {}  # La copia .db ya es la base de preparación
+
+        _report(progress, _LOAD, "Reconstruyendo índices...")
+        _recreate(cursor, objects)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'clients_fts'")
+        if cursor.fetchone():
+            cursor.execute("INSERT INTO clients_fts (clients_fts) VALUES ('rebuild')")
+        # Saldos derivados; la cadena de copias diferenciales ya no aplica
+        rebuild_loan_balances(cursor)
+        cursor.execute("DELETE FROM change_log")
+        cursor.execute("DELETE FROM backup_state")
+        _bump_settings_version(cursor, db_path)
+        conn.commit()
+        cursor.execute("ANALYZE")
+
+        _report(progress, _REBUILD, "Validando...")
+        warnings = _validate(cursor, expected)
+        tables = {t: _count(cursor, t) for t in TABLES if _table_columns(cursor, t)}
+        conn.commit()
+    except Exception:
+        conn.close()
+        os.remove(staging_path)
+        raise
+    conn.close()
+
+    _report(progress, _VALIDATE, "Reemplazando base de datos...")
+    if before_swap:
+        try:
+            before_swap()
+        except Exception:
+            os.remove(staging_path)
+            raise
+    _swap(staging_path, db_path)
+
+    _report(progress, 1.0, "Restauración completa.")
+    return {'tables': tables, 'warnings': warnings, 'seconds': time.perf_counter() - start}
@@ -1,33 +1,115 @@
+"""
+Settings Manager - Lectura y escritura de la tabla settings con caché en memoria.
+
+get_setting se llama decenas de veces al abrir ventanas y generar PDFs; en
+modo CLOUD cada consulta es un viaje a la base. La caché carga todas las filas
+de una vez con get_all_settings y responde desde memoria.
+
+Coherencia entre terminales: la tabla settings_version (migración 0008) sube
+con cada cambio en settings. Pasados SETTINGS_CACHE_TTL segundos desde la
+última revisión, la siguiente lectura consulta sólo ese contador y recarga
+todo si cambió. update_setting escribe en la base y en la caché, y fuerza la
+revisión en la próxima lectura.
+"""
+
+import threading
+import time
+
+from config import SETTINGS_CACHE_TTL
 from database import get_db_connection
 
-def get_setting(key):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
+_lock = threading.Lock()
+_cache = None        # {clave: valor}, None hasta la primera lectura
+_version = None      # settings_version con el que se cargó la caché
+_checked_at = 0.0    # time.monotonic() de la última revisión del contador
+
+
+def _read_version(cursor):
+    cursor.execute("SELECT version FROM settings_version WHERE id = 1")
     row = cursor.fetchone()
-    conn.close()
-    return row['value'] if row else None
+    return row['version'] if row else None
 
-def get_all_settings():
+
+def _refresh():
+    """Recarga la caché si es la primera vez o si settings_version cambió. Llamar con _lock."""
+    global _cache, _version, _checked_at
+    now = time.monotonic()
+    if _cache is not None and now - _checked_at < SETTINGS_CACHE_TTL:
+        return
+
+    if _cache is not None:
+        conn = get_db_connection()
+        try:
+            version = _read_version(conn.cursor())
+        finally:
+            conn.close()
+        if version is not None and version == _version:
+            _checked_at = now
+            return
+
+    rows, _version = _load_all()
+    _cache = {row['key']: row['value'] for row in rows}
+    _checked_at = now
+
+
+def _load_all():
+    # El contador se lee antes que las filas: un cambio entre ambas lecturas
+    # deja la caché con una versión vieja y se recarga en la siguiente revisión
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM settings")
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        cursor = conn.cursor()
+        version = _read_version(cursor)
+        cursor.execute("SELECT * FROM settings")
+        return cursor.fetchall(), version
+    finally:
+        conn.close()
+
+
+def invalidate_cache():
+    """Descarta la caché; la próxima lectura recarga todo (p. ej. tras restaurar)."""
+    global _cache, _version
+    with _lock:
+        _cache = None
+        _version = None
+
+
+def get_setting(key):
+    with _lock:
+        _refresh()
+        return _cache.get(key)
+
+
+def get_all_settings():
+    """Filas completas de settings (con descripción), leídas de la base; también renueva la caché."""
+    global _cache, _version, _checked_at
+    rows, version = _load_all()
+    with _lock:
+        _cache = {row['key']: row['value'] for row in rows}
+        _version = version
+        _checked_at = time.monotonic()
     return rows
 
+
 def update_setting(key, value):
+    global _checked_at
     conn = get_db_connection()
     cursor = conn.cursor()
-    
+
     # Check if key exists
     cursor.execute("SELECT 1 FROM settings WHERE key = ?", (key,))
     exists = cursor.fetchone()
-    
+
     if exists:
         cursor.execute("UPDATE settings SET value = ? WHERE key = ?", (value, key))
     else:
         cursor.execute("INSERT INTO settings (key, value) VALUES (?, ?)", (key, value))
-        
+
     conn.commit()
     conn.close()
+
+    # Write-through: este proceso ve el valor nuevo al instante; la revisión
+    # forzada recoge además cualquier cambio de otra terminal
+    with _lock:
+        if _cache is not None:
+            _cache[key] = None if value is None else str(value)  # settings.value es TEXT
+        _checked_at = 0.0
@@ -0,0 +1,118 @@
+"""
+Startup Profiler - Desglose del tiempo de arranque (python main.py --profile-startup).
+
+Mide dos cosas:
+    - Importaciones: envuelve builtins.__import__ y anota cuánto tarda la
+      primera carga de cada módulo, total (con lo que importa a su vez) y
+      propio (sin sus dependencias).
+    - Fases: bloques marcados con profiler.phase('init_db'), etc.
+
+Sin la opción, StartupProfiler.from_argv devuelve un perfilador inactivo cuyas
+fases no miden nada, así main.py no necesita ramas aparte.
+"""
+
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+FLAG = '--profile-startup'
+
+
+class StartupProfiler:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.imports = {}   # módulo -> [total, propio, profundidad]
+        self.phases = []    # (nombre, segundos)
+        self._stack = []    # tiempo de hijos acumulado por import en curso
+        self._original_import = None
+        self._thread = threading.get_ident()
+
+    @classmethod
+    def from_argv(cls, argv):
+        """Perfilador activo si argv trae --profile-startup (y lo quita de argv)."""
+        if FLAG not in argv:
+            return cls(enabled=False)
+        argv.remove(FLAG)
+        profiler = cls()
+        profiler.install()
+        return profiler
+
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if threading.get_ident() != self._thread:
+            # Sólo se mide el hilo principal (la fase en segundo plano corre en paralelo)
+            return original(name, globals, locals, fromlist, level)
+        if level:
+            package = (globals or {}).get('__package__') or ''
+            try:
+                name_key = importlib.util.resolve_name('.' * level + name, package)
+            except (ImportError, ValueError):
+                name_key = name
+        else:
+            name_key = name
+        if not name_key or name_key in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            entry = self.imports.setdefault(name_key, [0.0, 0.0, len(self._stack)])
+            entry[0] += total
+            entry[1] += total - children
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, top=15):
+        """Imprime fases, importaciones directas y los módulos más lentos."""
+        if not self.enabled:
+            return
+        self.uninstall()
+        elapsed = time.perf_counter() - self.started
+
+        print("")
+        print(f"=== Arranque: {elapsed * 1000:.0f} ms hasta la ventana de inicio de sesión ===")
+        print(f"{'Fase':<40}{'ms':>10}")
+        for name, seconds in self.phases:
+            print(f"{name:<40}{seconds * 1000:>10.1f}")
+
+        direct = sorted(((n, e) for n, e in self.imports.items() if e[2] == 0),
+                        key=lambda item: item[1][0], reverse=True)
+        print("")
+        print(f"{'Importación directa':<40}{'total ms':>10}")
+        for name, (total, _, _) in direct[:top]:
+            print(f"{name:<40}{total * 1000:>10.1f}")
+
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        print("")
+        print(f"{'Módulo (tiempo propio)':<40}{'propio ms':>10}{'total ms':>10}")
+        for name, (total, own, _) in slowest[:top]:
+            print(f"{name:<40}{own * 1000:>10.1f}{total * 1000:>10.1f}")
+        print("")
@@ -1,39 +0,0 @@
-import sqlite3
-import os
-
-DB_PATH = 'database/system.db'
-
-def update_schema():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    print("Checking columns in loans table...")
-    cursor.execute("PRAGMA table_info(loans)")
-    columns = [info[1] for info in cursor.fetchall()]
-    
-    new_columns = {
-        'refinance_count': 'INTEGER DEFAULT 0',
-        'frozen_amount': 'REAL DEFAULT 0',
-        'admin_fee': 'REAL DEFAULT 0',
-        'collateral_sale_price': 'REAL DEFAULT 0',
-        'frozen_date': 'DATE',
-        'original_amount': 'REAL' 
-    }
-    
-    for col, dtype in new_columns.items():
-        if col not in columns:
-            print(f"Adding column '{col}'...")
-            try:
-                cursor.execute(f"ALTER TABLE loans ADD COLUMN {col} {dtype}")
-                print(f"✓ Added {col}")
-            except Exception as e:
-                print(f"Error adding {col}: {e}")
-        else:
-            print(f"Column '{col}' already exists.")
-            
-    conn.commit()
-    conn.close()
-    print("Schema update completed.")
-
-if __name__ == "__main__":
-    update_schema()